@@ -1,6 +1,8 @@
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
+from app.services.query_profiler import query_profiler
 
 # Create database engine
 engine = create_engine(
@@ -10,16 +12,49 @@ engine = create_engine(
     echo=False
 )
 
-# Create session maker
+# Optional read replica engine (GET traffic); falls back to the primary
+if settings.DATABASE_READ_URL:
+    read_engine = create_engine(
+        settings.DATABASE_READ_URL,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        echo=False
+    )
+else:
+    read_engine = engine
+
+# SQL profiler hooks (no-op unless enabled)
+query_profiler.attach(engine)
+if read_engine is not engine:
+    query_profiler.attach(read_engine)
+
+# Create session makers
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Create base class for models
 Base = declarative_base()
 
-# Dependency to get DB session
+# Dependency to get DB session (primary, for writes)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+# Session maker for a read-only request (replica unless the client must read its own writes)
+def read_sessionmaker(request: Request) -> sessionmaker:
+    from app.services.read_routing import read_router, client_key
+
+    if read_engine is engine or read_router.use_primary(client_key(request)):
+        return SessionLocal
+    return ReadSessionLocal
+
+# Dependency to get a read-only DB session
+def get_read_db(request: Request):
+    db = read_sessionmaker(request)()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,20 +1,61 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy.exc import OperationalError
 from app.config import settings
 from app.database import engine, Base
-from app.routers import auth_router, patients_router, users_router, import_router
+from app.routers import auth_router, patients_router, users_router, import_router, profiler_router, traces_router
 from app.routers.surgery import router as surgery_router
+from app.routers.surgery_events import router as surgery_events_router
+from app.routers.or_rooms import router as or_rooms_router
 from app.routers.work_schedule import router as work_schedule_router
+from app.services.duration_stats import duration_stats
+from app.services.hn_lookup import hn_lookup
+from app.services.name_index import name_index
+from app.services.case_search import case_search
+from app.services.event_bus import event_bus
+from app.services.npo_timers import npo_timers
+from app.services.or_rotation import or_rotation
+from app.services.or_room_state import or_room_state
+from app.services.query_profiler import query_profiler
+from app.services.read_routing import client_key, read_router
+from app.services.surgery_events import surgery_projections
+from app.services.trace_recorder import trace_recorder
+from app.services.version_store import version_store
+from app.services.warm_snapshot import warm_snapshots
+from app.utils.compression import choose_encoding, compress, is_compressible
 
 # Create tables on startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create database tables
-    Base.metadata.create_all(bind=engine)
-    print("[OK] Database tables created/verified")
+    # Startup: Serve today's boards from the warm snapshot file until the database answers
+    if warm_snapshots is not None:
+        print(f"[OK] Loaded {warm_snapshots.load()} warm snapshot(s) from {warm_snapshots.path}")
+        warm_snapshots.attach()
+    print(f"[OK] OR rotation compiled for {or_rotation.build()} day(s)")
+    # Create database tables
+    try:
+        Base.metadata.create_all(bind=engine)
+        print("[OK] Database tables created/verified")
+        print(f"[OK] Loaded {version_store.load()} shared cache version(s)")
+        or_room_state.ensure_today()
+        print(f"[OK] Restored {npo_timers.restore()} NPO timer(s)")
+        print(f"[OK] Loaded durations of {duration_stats.load()} completed case(s)")
+        print(f"[OK] Indexed {hn_lookup.load()} HN(s)")
+        print(f"[OK] Indexed {name_index.load()} patient name(s)")
+        print(f"[OK] Indexed {case_search.load()} case(s) for search")
+    except OperationalError as e:
+        # Keep serving cached snapshots read-only; requests that need the database will fail
+        print(f"[ERROR] Database unreachable at startup: {e.orig}")
+    event_bus.start()
+    surgery_projections.start()
+    npo_timers.start()
     yield
     # Shutdown
+    npo_timers.stop()
+    surgery_projections.stop()
+    event_bus.stop()
     print("[INFO] Shutting down...")
 
 # Create FastAPI app
@@ -34,12 +75,74 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# SQL profiler middleware (records per-request query stats when enabled)
+@app.middleware("http")
+async def profile_queries(request: Request, call_next):
+    token = query_profiler.start_request(request.method, request.scope)
+    try:
+        response = await call_next(request)
+    except Exception:
+        profile = query_profiler.finish_request(token)
+        if profile is not None:
+            query_profiler.complete(profile)
+        raise
+    profile = query_profiler.finish_request(token)
+    if profile is not None:
+        # Headers carry the queries run so far; streamed bodies add theirs to the profile afterwards
+        response.headers["X-Query-Count"] = str(len(profile.queries))
+        response.headers["X-Query-Time-Ms"] = f"{profile.total_ms:.1f}"
+        response.body_iterator = query_profiler.profile_body(profile, response.body_iterator)
+    return response
+
+# Request trace recorder (for replaying peak traffic offline)
+@app.middleware("http")
+async def record_traces(request: Request, call_next):
+    if not trace_recorder.enabled or not request.url.path.startswith(settings.API_V1_STR):
+        return await call_next(request)
+    started = time.time()
+    body = await trace_recorder.capture_body(request)
+    response = await call_next(request)
+    trace_recorder.record(request, body, started, response.status_code)
+    return response
+
+# Read-your-writes: pin a client to the primary database after a successful write
+@app.middleware("http")
+async def pin_writers(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        read_router.pin(client_key(request))
+    return response
+
+# Response compression (gzip/brotli) above COMPRESSION_MIN_SIZE
+# Snapshot endpoints send precompressed bodies with Content-Encoding already set and are left alone
+@app.middleware("http")
+async def compress_responses(request: Request, call_next):
+    response = await call_next(request)
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if (
+        encoding is None
+        or "content-encoding" in response.headers
+        or not is_compressible(response.headers.get("content-type"))
+    ):
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    if len(body) >= settings.COMPRESSION_MIN_SIZE:
+        body = compress(body, encoding)
+        headers["content-encoding"] = encoding
+        headers["vary"] = "Accept-Encoding"
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
 # Include routers
 app.include_router(auth_router, prefix=settings.API_V1_STR)
 app.include_router(patients_router, prefix=settings.API_V1_STR)
 app.include_router(users_router, prefix=settings.API_V1_STR)
 app.include_router(import_router, prefix=settings.API_V1_STR)
+app.include_router(profiler_router, prefix=settings.API_V1_STR)
+app.include_router(traces_router, prefix=settings.API_V1_STR)
 app.include_router(surgery_router)
+app.include_router(surgery_events_router)
+app.include_router(or_rooms_router)
 app.include_router(work_schedule_router)
 
 @app.get("/")
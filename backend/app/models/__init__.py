@@ -3,6 +3,8 @@ from app.models.user import User, UserRole
 from app.models.patient import Patient, PatientType, SurgeryStatus, Gender, StatusHistory
 from app.models.session_log import SessionLog
 from app.models.surgery import SurgeryRegistration, SurgeryTypeEnum, CaseSizeEnum, SurgeryStatusEnum
+from app.models.surgery_event import SurgeryEvent, ProjectionCheckpoint, OrRoomTimeline, SurgeryDaySummary
+from app.models.cache_version import CacheVersion
 
 __all__ = [
     "User",
@@ -17,4 +19,9 @@ __all__ = [
     "SurgeryTypeEnum",
     "CaseSizeEnum",
     "SurgeryStatusEnum",
+    "SurgeryEvent",
+    "ProjectionCheckpoint",
+    "OrRoomTimeline",
+    "SurgeryDaySummary",
+    "CacheVersion",
 ]
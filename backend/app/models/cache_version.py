@@ -0,0 +1,11 @@
+from sqlalchemy import Column, BigInteger, String
+from app.database import Base
+
+
+class CacheVersion(Base):
+    """ตัวนับเวอร์ชันของ ETag ที่ทุก worker ใช้ร่วมกัน (ดู app.services.version_store)"""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True, comment="ชื่อตาราง หรือ '_epoch'")
+    scope = Column(String(10), primary_key=True, comment="วันที่ (YYYY-MM-DD), เดือน (YYYY-MM) หรือ '*' ทั้งตาราง")
+    version = Column(BigInteger, nullable=False, default=0)
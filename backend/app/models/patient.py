@@ -53,6 +53,7 @@ class Patient(Base):
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # เวอร์ชันแถว (ตรวจการแก้ไขชนกัน)
 
     def __repr__(self):
         return f"<Patient(id={self.id}, hn='{self.hn}', name='{self.full_name}', status='{self.status}')>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Time, Enum, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, Time, Enum, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -26,6 +26,10 @@ class SurgeryStatusEnum(str, enum.Enum):
 
 class SurgeryRegistration(Base):
     __tablename__ = "surgery_registrations"
+    __table_args__ = (
+        Index("idx_surgery_date", "surgery_date"),
+        Index("idx_hn_date", "hn", "surgery_date"),  # ค้นประวัติตาม HN
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     
@@ -69,6 +73,7 @@ class SurgeryRegistration(Base):
     
     # Queue Management
     queue_order = Column(Integer, nullable=True, comment="ลำดับคิว")
+    queue_rank = Column(BigInteger, nullable=True, comment="ลำดับคิวแบบเว้นช่วง (ย้ายคิวแก้ไขแถวเดียว)")
     selected_or = Column(String(20), nullable=True, comment="ห้องผ่าตัดที่เลือก (Emergency)")
     
     # Status
@@ -83,3 +88,4 @@ class SurgeryRegistration(Base):
     created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1", comment="เวอร์ชันแถว (ตรวจการแก้ไขชนกัน)")
@@ -0,0 +1,59 @@
+from sqlalchemy import Column, Integer, String, Date, Time, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SurgeryEvent(Base):
+    """Append-only log ของการเปลี่ยนแปลง SurgeryRegistration (เขียนใน transaction เดียวกับการแก้ไข)"""
+    __tablename__ = "surgery_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="ลำดับใน event stream")
+    # No foreign key: events outlive the surgery they describe
+    surgery_id = Column(Integer, nullable=True, index=True)
+    surgery_date = Column(Date, nullable=True, comment="วันที่ผ่าตัด")
+    or_room = Column(String(20), nullable=True, comment="ห้องผ่าตัด (selected_or หรือ or_room) หลังการเปลี่ยนแปลง")
+    event_type = Column(String(20), nullable=False)  # 'created', 'updated', 'deleted', 'reset'
+    status = Column(String(20), nullable=True, comment="สถานะหลังการเปลี่ยนแปลง")
+    changes = Column(JSON, nullable=True, comment='{"field": [old, new]}')
+    created_at = Column(DateTime, server_default=func.now())
+
+    def __repr__(self):
+        return f"<SurgeryEvent(#{self.id} surgery={self.surgery_id}, {self.event_type})>"
+
+
+class ProjectionCheckpoint(Base):
+    """ตำแหน่งล่าสุดใน surgery_events ที่ projection ประมวลผลแล้ว"""
+    __tablename__ = "projection_checkpoints"
+
+    name = Column(String(50), primary_key=True)
+    last_event_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class OrRoomTimeline(Base):
+    """Projection: ลำดับสถานะของแต่ละห้องผ่าตัดในแต่ละวัน"""
+    __tablename__ = "or_room_timelines"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    surgery_date = Column(Date, nullable=True)
+    or_room = Column(String(20), nullable=True)
+    surgery_id = Column(Integer, nullable=True)
+    event_id = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=True)
+    at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_or_room_timelines_date_room", "surgery_date", "or_room"),)
+
+
+class SurgeryDaySummary(Base):
+    """Projection: สรุปรายวัน"""
+    __tablename__ = "surgery_day_summaries"
+
+    surgery_date = Column(Date, primary_key=True)
+    total_cases = Column(Integer, nullable=False, default=0)
+    completed_cases = Column(Integer, nullable=False, default=0)
+    cancelled_cases = Column(Integer, nullable=False, default=0)
+    status_changes = Column(Integer, nullable=False, default=0)
+    first_start_time = Column(Time, nullable=True)
+    last_end_time = Column(Time, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
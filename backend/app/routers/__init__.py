@@ -3,10 +3,14 @@ from app.routers.auth import router as auth_router
 from app.routers.patients import router as patients_router
 from app.routers.users import router as users_router
 from app.routers.import_data import router as import_router
+from app.routers.profiler import router as profiler_router
+from app.routers.traces import router as traces_router
 
 __all__ = [
     "auth_router",
     "patients_router",
     "users_router",
     "import_router",
+    "profiler_router",
+    "traces_router",
 ]
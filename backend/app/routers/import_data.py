@@ -10,6 +10,8 @@ from app.models.user import User
 from app.models.patient import Patient, PatientType
 from app.schemas.patient import PatientResponse
 from app.utils.security import get_current_user
+from app.services.name_index import name_index
+from app.services.version_store import version_store
 
 router = APIRouter(prefix="/import", tags=["Import/Export"])
 
@@ -146,11 +148,13 @@ async def import_from_excel(
             db.add(patient)
             imported_patients.append(patient)
         
+        version_store.bump_many(db, Patient.__tablename__, (p.scheduled_date for p in imported_patients))
         db.commit()
         
         # Refresh all to get IDs
         for p in imported_patients:
             db.refresh(p)
+        name_index.publish_patients(imported_patients)
         
         return imported_patients
     
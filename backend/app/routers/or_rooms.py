@@ -0,0 +1,124 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.models.surgery import SurgeryRegistration
+from app.schemas.surgery import PlanApply
+from app.services import surgery_events
+from app.services.duration_stats import duration_stats
+from app.services.or_planner import plan_day
+from app.services.or_room_state import or_room_state
+from app.services.or_rotation import or_rotation
+from app.services.or_simulation import or_simulation
+from app.services.queue_ranks import rank_for_order
+from app.services.version_store import version_store
+from app.utils.fast_json import FastJSONResponse
+from app.utils.row_version import changed_values
+
+router = APIRouter(prefix="/api/or-rooms", tags=["or-rooms"], default_response_class=FastJSONResponse)
+
+
+@router.get("/live")
+async def get_live_rooms(room: Optional[str] = None):
+    """Current case, next case, queue and idle time per OR room today (served from memory)"""
+    return FastJSONResponse(or_room_state.live(room))
+
+
+@router.get("/eta")
+async def get_room_eta(room: Optional[str] = None):
+    """Expected start/end times down each OR room's queue today (historical durations, no aggregate queries)"""
+    return FastJSONResponse(duration_stats.eta(room))
+
+
+@router.get("/rotation/{rotation_date}")
+async def get_rotation(rotation_date: date, surgeon: Optional[str] = None, time: Optional[str] = None):
+    """Doctors per OR room (AM/PM) on a date; with `surgeon` (and `time`), the room they would be assigned"""
+    result = {"date": rotation_date.isoformat(), "rooms": or_rotation.schedule_for(rotation_date)}
+    if surgeon:
+        result["suggested_room"] = or_rotation.room_for(surgeon, rotation_date, time)
+    return FastJSONResponse(result)
+
+
+@router.get("/plan/{plan_date}")
+async def get_day_plan(plan_date: date, db: Session = Depends(get_read_db)):
+    """Proposed room assignment and queue order for a day's elective cases (nothing is saved)"""
+    return FastJSONResponse(plan_day(db, plan_date))
+
+
+@router.get("/simulate/{plan_date}")
+async def simulate_day(
+    plan_date: date,
+    runs: int = Query(settings.OR_SIMULATION_RUNS, ge=100, le=20000),
+    db: Session = Depends(get_read_db),
+):
+    """Monte Carlo probability that each OR room runs past the elective block with the current plan"""
+    return FastJSONResponse(or_simulation.simulate(db, plan_date, runs))
+
+
+@router.post("/plan/{plan_date}/apply")
+async def apply_day_plan(plan_date: date, data: PlanApply, db: Session = Depends(get_db)):
+    """
+    Apply a (possibly edited) plan in one transaction: room and queue order of every listed case.
+    Only cases that actually change are written; if any case's `version` is out of date the whole
+    plan is refused with 409 (re-plan from the current state).
+    """
+    ids = [a.id for a in data.assignments]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Each surgery may appear only once per plan")
+    # Rows stay locked until commit, so the versions checked here are the ones overwritten
+    surgeries = {
+        s.id: s for s in db.query(SurgeryRegistration).filter(
+            SurgeryRegistration.id.in_(ids),
+            SurgeryRegistration.surgery_date == plan_date,
+        ).with_for_update().all()
+    }
+    missing = [i for i in ids if i not in surgeries]
+    if missing:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=f"Surgeries not found on {plan_date}: {missing}")
+    stale = [a.id for a in data.assignments if a.version is not None and a.version != surgeries[a.id].version]
+    if stale:
+        current = [{"id": i, "version": surgeries[i].version} for i in stale]
+        db.rollback()
+        raise HTTPException(status_code=409, detail={"message": "Surgeries were changed by someone else", "current": current})
+
+    try:
+        changed = []
+        for assignment in data.assignments:
+            surgery = surgeries[assignment.id]
+            values = {
+                "or_room": assignment.or_room,
+                "queue_order": assignment.queue_order,
+                "queue_rank": rank_for_order(assignment.queue_order),
+            }
+            if surgery.selected_or:
+                # The board shows selected_or over or_room: move both, or the new room never shows
+                values["selected_or"] = assignment.or_room
+            changes = changed_values(surgery, values)
+            if not changes:
+                continue
+            before = surgery_events.capture(surgery)
+            for field, value in changes.items():
+                setattr(surgery, field, value)
+            surgery.version = surgery.version + 1
+            surgery_events.record_updated(db, surgery, before)
+            changed.append(surgery)
+        if changed:
+            db.flush()
+            for surgery in changed:
+                db.expunge(surgery)  # the new values are already on it; no refresh after commit
+            version_store.bump(db, SurgeryRegistration.__tablename__, plan_date)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if changed:
+        surgery_events.surgery_projections.notify()
+        for surgery in changed:
+            or_room_state.publish_upsert(surgery)
+    return {"message": f"จัดห้องและลำดับคิวสำเร็จ {len(changed)} รายการ", "count": len(changed)}
@@ -1,9 +1,9 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import date, datetime
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.models.patient import Patient, StatusHistory, SurgeryStatus, PatientType
 from app.schemas.patient import (
@@ -15,8 +15,13 @@ from app.schemas.patient import (
     DashboardStats,
 )
 from app.utils.security import get_current_user
+from app.utils.fast_json import FastJSONResponse
+from app.utils.row_version import UPDATE_ATTEMPTS, conditional_update
+from app.services.name_index import name_index
+from app.services.snapshot_cache import snapshot_response
+from app.services.version_store import version_store, conditional_get
 
-router = APIRouter(prefix="/patients", tags=["Patients"])
+router = APIRouter(prefix="/patients", tags=["Patients"], default_response_class=FastJSONResponse)
 
 # Helper function to convert status to Thai
 def status_to_thai(status: SurgeryStatus) -> str:
@@ -42,6 +47,29 @@ def mask_name(full_name: str) -> str:
         return parts[0][:3] + "***"
     return full_name[:3] + "***" if len(full_name) > 3 else full_name
 
+def build_public_display(db: Session, today: date) -> list:
+    """Masked rows for the public TV display"""
+    rows = db.query(Patient.or_room, Patient.hn, Patient.full_name, Patient.status).filter(
+        Patient.scheduled_date == today,
+        Patient.status.in_([
+            SurgeryStatus.waiting,
+            SurgeryStatus.in_surgery,
+            SurgeryStatus.recovering,
+            SurgeryStatus.returning
+        ])
+    ).order_by(Patient.or_room).all()
+    
+    return [
+        {
+            "or_room": or_room,
+            "hn_masked": mask_hn(hn),
+            "name_masked": mask_name(full_name),
+            "status": patient_status.value,
+            "status_thai": status_to_thai(patient_status),
+        }
+        for or_room, hn, full_name, patient_status in rows
+    ]
+
 @router.get("/", response_model=List[PatientResponse])
 async def get_patients(
     patient_type: Optional[PatientType] = None,
@@ -49,7 +77,7 @@ async def get_patients(
     scheduled_date: Optional[date] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all patients with optional filters"""
@@ -68,7 +96,8 @@ async def get_patients(
 @router.get("/today", response_model=List[PatientResponse])
 async def get_today_patients(
     patient_type: Optional[PatientType] = None,
-    db: Session = Depends(get_db),
+    etag: Optional[str] = Depends(conditional_get(Patient.__tablename__)),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all patients scheduled for today"""
@@ -82,33 +111,17 @@ async def get_today_patients(
     return patients
 
 @router.get("/public", response_model=List[PatientPublicDisplay])
-async def get_public_display(db: Session = Depends(get_db)):
+async def get_public_display(
+    request: Request,
+    etag: Optional[str] = Depends(conditional_get(Patient.__tablename__)),
+):
     """Get patients for public TV display (masked data for PDPA)"""
     today = date.today()
-    patients = db.query(Patient).filter(
-        Patient.scheduled_date == today,
-        Patient.status.in_([
-            SurgeryStatus.waiting,
-            SurgeryStatus.in_surgery,
-            SurgeryStatus.recovering,
-            SurgeryStatus.returning
-        ])
-    ).order_by(Patient.or_room).all()
-    
-    result = []
-    for p in patients:
-        result.append(PatientPublicDisplay(
-            or_room=p.or_room,
-            hn_masked=mask_hn(p.hn),
-            name_masked=mask_name(p.full_name),
-            status=p.status,
-            status_thai=status_to_thai(p.status)
-        ))
-    return result
+    return await snapshot_response(request, "patients", ("public", today), lambda db: build_public_display(db, today), etag)
 
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get dashboard statistics for today"""
@@ -130,7 +143,7 @@ async def get_dashboard_stats(
 @router.get("/{patient_id}", response_model=PatientResponse)
 async def get_patient(
     patient_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific patient by ID"""
@@ -151,8 +164,10 @@ async def create_patient(
         created_by=current_user.id
     )
     db.add(db_patient)
+    version_store.bump(db, Patient.__tablename__, db_patient.scheduled_date)
     db.commit()
     db.refresh(db_patient)
+    name_index.publish_patients([db_patient])
     return db_patient
 
 @router.put("/{patient_id}", response_model=PatientResponse)
@@ -167,12 +182,16 @@ async def update_patient(
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
+    old_date = patient.scheduled_date
     update_data = patient_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(patient, field, value)
+    patient.version = Patient.version + 1
     
+    version_store.bump(db, Patient.__tablename__, old_date, patient.scheduled_date)
     db.commit()
     db.refresh(patient)
+    name_index.publish_patients([patient])
     return patient
 
 @router.patch("/{patient_id}/status", response_model=PatientResponse)
@@ -187,16 +206,28 @@ async def update_patient_status(
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    old_status = patient.status
     new_status = status_data.status
     
-    # Update timestamps based on status
-    if new_status == SurgeryStatus.in_surgery and patient.actual_start_time is None:
-        patient.actual_start_time = datetime.now()
-    elif new_status in [SurgeryStatus.recovering, SurgeryStatus.returning] and patient.actual_end_time is None:
-        patient.actual_end_time = datetime.now()
-    
-    patient.status = new_status
+    # Conditional UPDATE (WHERE id = ? AND version = ?); without a client version, retry on a lost race
+    for _ in range(1 if status_data.version is not None else UPDATE_ATTEMPTS):
+        old_status = patient.status
+        now = datetime.now()
+        values = {"status": new_status, "updated_at": now}
+        
+        # Update timestamps based on status
+        if new_status == SurgeryStatus.in_surgery and patient.actual_start_time is None:
+            values["actual_start_time"] = now
+        elif new_status in [SurgeryStatus.recovering, SurgeryStatus.returning] and patient.actual_end_time is None:
+            values["actual_end_time"] = now
+        
+        expected = status_data.version if status_data.version is not None else patient.version
+        if conditional_update(db, patient, values, expected):
+            break
+        db.refresh(patient)
+    else:
+        current = PatientResponse.model_validate(patient).model_dump(mode="json")
+        db.rollback()
+        raise HTTPException(status_code=409, detail={"message": "Patient was changed by someone else", "current": current})
     
     # Log status change for PDPA audit
     status_log = StatusHistory(
@@ -208,8 +239,9 @@ async def update_patient_status(
     )
     db.add(status_log)
     
+    db.expunge(patient)  # already holds the new values; no refresh after commit
+    version_store.bump(db, Patient.__tablename__, patient.scheduled_date)
     db.commit()
-    db.refresh(patient)
     return patient
 
 @router.delete("/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -226,6 +258,8 @@ async def delete_patient(
     # Delete related status history first
     db.query(StatusHistory).filter(StatusHistory.patient_id == patient_id).delete()
     
+    scheduled_date = patient.scheduled_date
     db.delete(patient)
+    version_store.bump(db, Patient.__tablename__, scheduled_date)
     db.commit()
     return None
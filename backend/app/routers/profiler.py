@@ -0,0 +1,42 @@
+from typing import Optional
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from app.models.user import User
+from app.services.query_profiler import query_profiler
+from app.utils.security import get_current_admin_user
+
+router = APIRouter(prefix="/admin/profiler", tags=["Admin"])
+
+
+class ProfilerSettingsUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    slow_threshold_ms: Optional[float] = Field(None, ge=0)
+
+
+@router.get("/")
+async def get_profiler_status(current_user: User = Depends(get_current_admin_user)):
+    """Get SQL profiler settings and the most recent request profiles (Admin only)"""
+    return {
+        **query_profiler.status(),
+        "recent": list(query_profiler.recent),
+    }
+
+
+@router.put("/")
+async def update_profiler_settings(
+    data: ProfilerSettingsUpdate,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Turn the SQL profiler on/off or change the slow-query threshold without a restart (Admin only)"""
+    if data.enabled is not None:
+        query_profiler.enabled = data.enabled
+    if data.slow_threshold_ms is not None:
+        query_profiler.slow_threshold_ms = data.slow_threshold_ms
+    return query_profiler.status()
+
+
+@router.delete("/recent")
+async def clear_profiler_history(current_user: User = Depends(get_current_admin_user)):
+    """Clear recorded request profiles (Admin only)"""
+    query_profiler.recent.clear()
+    return {"message": "Profiler history cleared"}
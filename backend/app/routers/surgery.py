@@ -1,19 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List
+from sqlalchemy.orm.attributes import set_committed_value
+import time as timer
+from typing import List, Optional
+from functools import lru_cache
 from datetime import date, datetime, time
 
-from app.database import get_db
-from app.models.surgery import SurgeryRegistration, SurgeryTypeEnum, SurgeryStatusEnum
+from app.config import settings
+from app.database import get_db, get_read_db, read_sessionmaker
+from app.models.surgery import SurgeryRegistration, SurgeryTypeEnum, SurgeryStatusEnum, CaseSizeEnum
+from app.services import surgery_events
+from app.services.case_search import case_search
+from app.services.duration_stats import duration_stats
+from app.services.hn_lookup import hn_lookup
+from app.services.name_index import name_index
+from app.services.npo_timers import npo_timers
+from app.services.or_room_state import or_room_state
+from app.services.or_rotation import or_rotation
+from app.services.queue_ranks import (
+    MIN_GAP, has_unranked, neighbour_rank, positions_of, queue_positions, rank_between, rank_for_order,
+    rebalance, rebalance_room, room_column,
+)
+from app.services.snapshot_cache import snapshot_response
+from app.services.version_store import version_store, conditional_get
+from app.utils.fast_json import FastJSONResponse, compile_row_encoder, dumps
+from app.utils.row_version import UPDATE_ATTEMPTS, changed_values, conditional_update
 from app.schemas.surgery import (
     SurgeryCreate,
     SurgeryUpdate,
     SurgeryResponse,
     SurgeryBulkCreate,
+    SurgeryBatchUpdate,
+    QueueMove,
 )
 
-router = APIRouter(prefix="/api/surgery", tags=["surgery"])
+router = APIRouter(prefix="/api/surgery", tags=["surgery"], default_response_class=FastJSONResponse)
 
 
 def time_str_to_time(time_str: str) -> time:
@@ -68,13 +91,160 @@ def surgery_to_response(surgery: SurgeryRegistration) -> dict:
         "scrub_nurse": surgery.scrub_nurse,
         "circulate_nurse": surgery.circulate_nurse,
         "queue_order": surgery.queue_order,
+        "queue_rank": surgery.queue_rank,
         "selected_or": surgery.selected_or,
         "status": get_enum_value_safe(surgery.status),
         "not_ready_reason": surgery.not_ready_reason,
         "created_at": surgery.created_at.isoformat() if surgery.created_at else None,
+        "version": surgery.version,
     }
 
 
+# Fast path for list endpoints: same fields as surgery_to_response, selected as tuples
+SURGERY_FIELDS = [
+    ("id", None),
+    ("hn", None),
+    ("patient_name", None),
+    ("age", None),
+    ("surgery_date", "date"),
+    ("scheduled_time", "time"),
+    ("surgery_type", "enum"),
+    ("or_room", None),
+    ("department", None),
+    ("surgeon", None),
+    ("diagnosis", None),
+    ("operation", None),
+    ("ward", None),
+    ("case_size", "enum"),
+    ("start_time", "time"),
+    ("end_time", "time"),
+    ("assist1", None),
+    ("assist2", None),
+    ("scrub_nurse", None),
+    ("circulate_nurse", None),
+    ("queue_order", None),
+    ("queue_rank", None),
+    ("selected_or", None),
+    ("status", "enum"),
+    ("not_ready_reason", None),
+    ("created_at", "datetime"),
+    ("version", None),
+]
+SURGERY_FIELD_KINDS = dict(SURGERY_FIELDS)
+ALL_SURGERY_FIELDS = tuple(name for name, _ in SURGERY_FIELDS)
+
+# Named presets for ?fields= (board cards / TV display need only a few columns)
+SURGERY_FIELD_PRESETS = {
+    "full": ALL_SURGERY_FIELDS,
+    "board": (
+        "id", "hn", "patient_name", "scheduled_time", "or_room", "selected_or",
+        "queue_order", "queue_rank", "case_size", "status", "not_ready_reason", "version",
+    ),
+    "tv": (
+        "id", "patient_name", "or_room", "selected_or", "queue_order", "queue_rank",
+        "scheduled_time", "surgery_type", "status",
+    ),
+}
+
+
+@lru_cache(maxsize=64)
+def surgery_row_encoder(fields: tuple):
+    """Compiled row -> dict encoder for a field subset (cached per subset)"""
+    return compile_row_encoder([(name, SURGERY_FIELD_KINDS[name]) for name in fields])
+
+
+def surgery_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated field list or preset (" + ", ".join(SURGERY_FIELD_PRESETS) + "); default: full",
+    )
+) -> tuple:
+    """Resolve ?fields= into a tuple of response fields ('id' is always included)"""
+    if not fields:
+        return ALL_SURGERY_FIELDS
+    if fields in SURGERY_FIELD_PRESETS:
+        return SURGERY_FIELD_PRESETS[fields]
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in SURGERY_FIELD_KINDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # Keep the canonical order so equal subsets share one compiled encoder
+    selected = set(requested) | {"id"}
+    return tuple(name for name in ALL_SURGERY_FIELDS if name in selected)
+
+
+def select_surgery_rows(fields: tuple, *criteria):
+    """SELECT of the requested columns; queue_order is the case's queue position, not the stored value"""
+    columns = [getattr(SurgeryRegistration, name) for name in fields]
+    if "queue_order" not in fields:
+        return select(*columns).where(*criteria)
+    positions = queue_positions(*criteria)
+    columns[fields.index("queue_order")] = positions.c.queue_order
+    return (
+        select(*columns)
+        .select_from(SurgeryRegistration)
+        .outerjoin(positions, positions.c.id == SurgeryRegistration.id)
+        .where(*criteria)
+    )
+
+
+def query_surgery_rows(
+    db: Session,
+    *criteria,
+    order_by=SurgeryRegistration.scheduled_time,
+    fields: tuple = ALL_SURGERY_FIELDS,
+    skip: int = 0,
+    limit: Optional[int] = None,
+) -> list:
+    """Select only the requested surgery columns as tuples and encode them to response dicts"""
+    encode = surgery_row_encoder(fields)
+    statement = select_surgery_rows(fields, *criteria).order_by(*order_by if isinstance(order_by, tuple) else (order_by,))
+    if skip:
+        statement = statement.offset(skip)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return [encode(row) for row in db.execute(statement).all()]
+
+
+def with_queue_positions(db: Session, responses: list) -> list:
+    """Replace the stored queue_order of response dicts by the cases' queue positions (one query)"""
+    positions = positions_of(db, [response["id"] for response in responses])
+    for response in responses:
+        response["queue_order"] = positions.get(response["id"])
+    return responses
+
+
+def version_conflict(db: Session, surgery: SurgeryRegistration) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Surgery was changed by someone else",
+            "current": with_queue_positions(db, [surgery_to_response(surgery)])[0],
+        },
+    )
+
+
+def update_values(data: SurgeryUpdate) -> dict:
+    """Column values set by an update payload (fields left out or null stay unchanged)"""
+    values = {}
+    if data.or_room is not None:
+        values["or_room"] = data.or_room
+    if data.status is not None:
+        values["status"] = SurgeryStatusEnum(data.status.value)
+    if data.not_ready_reason is not None:
+        values["not_ready_reason"] = data.not_ready_reason
+    if data.queue_order is not None:
+        values["queue_order"] = data.queue_order
+        values["queue_rank"] = rank_for_order(data.queue_order)
+    if data.selected_or is not None:
+        values["selected_or"] = data.selected_or
+    if data.start_time is not None:
+        values["start_time"] = time_str_to_time(data.start_time)
+    if data.end_time is not None:
+        values["end_time"] = time_str_to_time(data.end_time)
+    return values
+
+
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def create_surgery(surgery: SurgeryCreate, db: Session = Depends(get_db)):
     """Register a new surgery"""
@@ -86,7 +256,7 @@ async def create_surgery(surgery: SurgeryCreate, db: Session = Depends(get_db)):
             surgery_date=surgery.surgery_date,
             scheduled_time=time_str_to_time(surgery.scheduled_time),
             surgery_type=SurgeryTypeEnum(surgery.surgery_type.value),
-            or_room=surgery.or_room,
+            or_room=surgery.or_room or or_rotation.room_for(surgery.surgeon, surgery.surgery_date, surgery.scheduled_time),
             department=surgery.department,
             surgeon=surgery.surgeon,
             diagnosis=surgery.diagnosis,
@@ -102,9 +272,14 @@ async def create_surgery(surgery: SurgeryCreate, db: Session = Depends(get_db)):
             status=SurgeryStatusEnum.REGISTERED,
         )
         db.add(new_surgery)
+        db.flush()
+        surgery_events.record_created(db, new_surgery)
+        version_store.bump(db, SurgeryRegistration.__tablename__, new_surgery.surgery_date)
         db.commit()
+        surgery_events.surgery_projections.notify()
         db.refresh(new_surgery)
-        return surgery_to_response(new_surgery)
+        or_room_state.publish_upsert(new_surgery)
+        return with_queue_positions(db, [surgery_to_response(new_surgery)])[0]
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
@@ -112,7 +287,7 @@ async def create_surgery(surgery: SurgeryCreate, db: Session = Depends(get_db)):
 
 @router.post("/register/bulk", status_code=status.HTTP_201_CREATED)
 async def create_surgeries_bulk(data: SurgeryBulkCreate, db: Session = Depends(get_db)):
-    """Register multiple surgeries at once"""
+    """Register multiple surgeries at once (empty or_room is filled from the OR/doctor rotation)"""
     created = []
     try:
         for surgery in data.registrations:
@@ -136,7 +311,7 @@ async def create_surgeries_bulk(data: SurgeryBulkCreate, db: Session = Depends(g
                 surgery_date=surgery_date_val,
                 scheduled_time=time_str_to_time(surgery.scheduled_time) if surgery.scheduled_time else None,
                 surgery_type=surgery_type_val,
-                or_room=surgery.or_room or '',
+                or_room=surgery.or_room or or_rotation.room_for(surgery.surgeon, surgery_date_val, surgery.scheduled_time) or '',
                 department=surgery.department or '',
                 surgeon=surgery.surgeon or '',
                 diagnosis=surgery.diagnosis or '',
@@ -154,15 +329,21 @@ async def create_surgeries_bulk(data: SurgeryBulkCreate, db: Session = Depends(g
             db.add(new_surgery)
             created.append(new_surgery)
         
+        db.flush()
+        for s in created:
+            surgery_events.record_created(db, s)
+        version_store.bump_many(db, SurgeryRegistration.__tablename__, (s.surgery_date for s in created))
         db.commit()
+        surgery_events.surgery_projections.notify()
         
         for s in created:
             db.refresh(s)
+            or_room_state.publish_upsert(s)
         
         return {
             "message": f"สร้างรายการผ่าตัดสำเร็จ {len(created)} รายการ",
             "count": len(created),
-            "registrations": [surgery_to_response(s) for s in created]
+            "registrations": with_queue_positions(db, [surgery_to_response(s) for s in created])
         }
     except Exception as e:
         db.rollback()
@@ -170,105 +351,233 @@ async def create_surgeries_bulk(data: SurgeryBulkCreate, db: Session = Depends(g
 
 
 @router.get("/check-hn/{hn}")
-async def check_patient_by_hn(hn: str, db: Session = Depends(get_db)):
+async def check_patient_by_hn(hn: str, db: Session = Depends(get_read_db)):
     """
-    Check if patient exists by HN and return surgery history.
-    Used for duplicate patient detection during registration.
+    Check if patient exists by HN and return a short surgery history (latest cases, cached).
+    Used for duplicate patient detection during registration; the full history is paginated
+    at /api/surgery/hn/{hn}/history.
     """
     try:
-        surgeries = db.query(SurgeryRegistration).filter(
-            SurgeryRegistration.hn == hn
-        ).order_by(SurgeryRegistration.surgery_date.desc()).all()
-        
-        if not surgeries:
+        summary = hn_lookup.summary(db, hn)
+        if summary is None:
             return {
                 "exists": False,
                 "patient": None,
-                "history": []
+                "history": [],
+                "total_surgeries": 0,
             }
-        
-        # Get latest patient info
-        latest = surgeries[0]
-        
-        # Convert each surgery to response format
-        history = []
-        for s in surgeries:
-            try:
-                history.append(surgery_to_response(s))
-            except Exception as e:
-                print(f"Error converting surgery {s.id}: {str(e)}")
-                # Add minimal info if conversion fails
-                history.append({
-                    "id": s.id,
-                    "surgery_date": s.surgery_date.isoformat() if s.surgery_date else None,
-                    "operation": s.operation,
-                    "surgeon": s.surgeon,
-                    "status": s.status.value if s.status else None
-                })
-        
-        return {
+        return FastJSONResponse({
             "exists": True,
             "patient": {
-                "hn": latest.hn,
-                "patient_name": latest.patient_name,
-                "age": latest.age
+                "hn": summary["hn"],
+                "patient_name": summary["patient_name"],
+                "age": summary["age"]
             },
-            "history": history
-        }
+            "history": summary["recent_surgeries"],
+            "total_surgeries": summary["total_surgeries"],
+        })
     except Exception as e:
         print(f"Error in check_patient_by_hn: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/hn/suggest")
+async def suggest_hn(prefix: str = Query(..., min_length=1, max_length=20), limit: int = Query(10, ge=1, le=50)):
+    """HN typeahead: known HNs starting with `prefix` and their latest patient name (in-memory)"""
+    return FastJSONResponse(hn_lookup.suggest(prefix, limit))
+
+
+@router.get("/duplicates")
+async def find_duplicate_patients(
+    name: str = Query(..., min_length=2, max_length=255),
+    age: Optional[int] = Query(None, ge=0, le=150),
+    hn: Optional[str] = Query(None, max_length=20, description="HN being registered (excluded; near-miss HNs rank higher)"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Likely duplicates of a patient by name (+ age) across surgeries and patients, best match first (in-memory)"""
+    return FastJSONResponse(name_index.candidates(name, age, hn, limit))
+
+
+@router.get("/search")
+async def search_surgeries(
+    q: str = Query(..., min_length=2, max_length=255, description="Words of diagnosis/operation (3+ letters also match as prefix)"),
+    surgeon: Optional[str] = Query(None, max_length=255),
+    department: Optional[str] = Query(None, max_length=100),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    case_size: Optional[CaseSizeEnum] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    fields: tuple = Depends(surgery_fields),
+    db: Session = Depends(get_read_db),
+):
+    """Full-text search of diagnosis and operation history, newest first, one page at a time"""
+    started = timer.perf_counter()
+    result = case_search.search(
+        q,
+        surgeon=surgeon,
+        department=department,
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None,
+        case_size=case_size.value if case_size else None,
+        skip=skip,
+        limit=limit,
+    )
+    ids = result["ids"]
+    items = query_surgery_rows(db, SurgeryRegistration.id.in_(ids), fields=fields) if ids else []
+    position = {surgery_id: i for i, surgery_id in enumerate(ids)}
+    items.sort(key=lambda item: position[item["id"]])
+    return FastJSONResponse({
+        "q": q,
+        "total": result["total"],
+        "by_year": result["by_year"],
+        "skip": skip,
+        "limit": limit,
+        "items": items,
+        "elapsed_ms": round((timer.perf_counter() - started) * 1000, 2),
+    })
+
+
+@router.get("/hn/{hn}/history")
+async def get_hn_history(
+    hn: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    fields: tuple = Depends(surgery_fields),
+    db: Session = Depends(get_read_db),
+):
+    """Surgery history of an HN, newest first, one page at a time"""
+    total = db.query(func.count(SurgeryRegistration.id)).filter(SurgeryRegistration.hn == hn).scalar()
+    items = query_surgery_rows(
+        db,
+        SurgeryRegistration.hn == hn,
+        order_by=(SurgeryRegistration.surgery_date.desc(), SurgeryRegistration.id.desc()),
+        fields=fields,
+        skip=skip,
+        limit=limit,
+    )
+    return FastJSONResponse({"hn": hn, "total": total, "skip": skip, "limit": limit, "items": items})
+
+
 @router.get("/today")
-async def get_today_surgeries(db: Session = Depends(get_db)):
+async def get_today_surgeries(
+    request: Request,
+    etag: Optional[str] = Depends(conditional_get(SurgeryRegistration.__tablename__)),
+    fields: tuple = Depends(surgery_fields),
+):
     """Get all surgeries for today"""
     today = date.today()
-    surgeries = db.query(SurgeryRegistration).filter(
-        SurgeryRegistration.surgery_date == today
-    ).order_by(SurgeryRegistration.scheduled_time).all()
-    
-    return [surgery_to_response(s) for s in surgeries]
+    return await snapshot_response(
+        request, "surgery", ("today", today, fields),
+        lambda db: query_surgery_rows(db, SurgeryRegistration.surgery_date == today, fields=fields),
+        etag,
+    )
 
 
 @router.get("/date/{surgery_date}")
-async def get_surgeries_by_date(surgery_date: date, db: Session = Depends(get_db)):
+async def get_surgeries_by_date(
+    request: Request,
+    surgery_date: date,
+    etag: Optional[str] = Depends(conditional_get(SurgeryRegistration.__tablename__, "surgery_date")),
+    fields: tuple = Depends(surgery_fields),
+):
     """Get all surgeries for a specific date"""
-    surgeries = db.query(SurgeryRegistration).filter(
-        SurgeryRegistration.surgery_date == surgery_date
-    ).order_by(SurgeryRegistration.scheduled_time).all()
-    
-    return [surgery_to_response(s) for s in surgeries]
+    return await snapshot_response(
+        request, "surgery", ("date", surgery_date, fields),
+        lambda db: query_surgery_rows(db, SurgeryRegistration.surgery_date == surgery_date, fields=fields),
+        etag,
+    )
 
 
 @router.get("/elective/{surgery_date}")
-async def get_elective_surgeries(surgery_date: date, db: Session = Depends(get_db)):
+async def get_elective_surgeries(
+    request: Request,
+    surgery_date: date,
+    etag: Optional[str] = Depends(conditional_get(SurgeryRegistration.__tablename__, "surgery_date")),
+    fields: tuple = Depends(surgery_fields),
+):
     """Get elective surgeries for a specific date"""
-    surgeries = db.query(SurgeryRegistration).filter(
-        and_(
+    return await snapshot_response(
+        request, "surgery", ("elective", surgery_date, fields),
+        lambda db: query_surgery_rows(
+            db,
             SurgeryRegistration.surgery_date == surgery_date,
-            SurgeryRegistration.surgery_type == SurgeryTypeEnum.ELECTIVE
-        )
-    ).order_by(SurgeryRegistration.scheduled_time).all()
-    
-    return [surgery_to_response(s) for s in surgeries]
+            SurgeryRegistration.surgery_type == SurgeryTypeEnum.ELECTIVE,
+            fields=fields,
+        ),
+        etag,
+    )
 
 
 @router.get("/emergency/{surgery_date}")
-async def get_emergency_surgeries(surgery_date: date, db: Session = Depends(get_db)):
+async def get_emergency_surgeries(
+    request: Request,
+    surgery_date: date,
+    etag: Optional[str] = Depends(conditional_get(SurgeryRegistration.__tablename__, "surgery_date")),
+    fields: tuple = Depends(surgery_fields),
+):
     """Get emergency surgeries for a specific date"""
-    surgeries = db.query(SurgeryRegistration).filter(
-        and_(
+    return await snapshot_response(
+        request, "surgery", ("emergency", surgery_date, fields),
+        lambda db: query_surgery_rows(
+            db,
             SurgeryRegistration.surgery_date == surgery_date,
-            SurgeryRegistration.surgery_type == SurgeryTypeEnum.EMERGENCY
-        )
-    ).order_by(SurgeryRegistration.scheduled_time).all()
-    
-    return [surgery_to_response(s) for s in surgeries]
+            SurgeryRegistration.surgery_type == SurgeryTypeEnum.EMERGENCY,
+            fields=fields,
+        ),
+        etag,
+    )
+
+
+@router.get("/range")
+def get_surgeries_in_range(
+    request: Request,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    surgery_type: Optional[SurgeryTypeEnum] = Query(None, alias="type"),
+    room: Optional[str] = Query(None, max_length=20, description="Room as shown on the board (selected_or, else or_room)"),
+    case_status: Optional[SurgeryStatusEnum] = Query(None, alias="status"),
+    fields: tuple = Depends(surgery_fields),
+):
+    """
+    Surgeries from `from` to `to` (inclusive) as newline-delimited JSON, one
+    case per line, ordered by date then id (the index order, so no sort
+    buffers the range before the first row). Rows are read through a
+    server-side cursor and flushed in batches of SURGERY_RANGE_BATCH.
+    Queue positions (`queue_order`) are numbered per date and room before the
+    first row; leave the field out for exports that don't need it.
+    """
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    criteria = [SurgeryRegistration.surgery_date.between(date_from, date_to)]
+    if surgery_type is not None:
+        criteria.append(SurgeryRegistration.surgery_type == surgery_type)
+    if room:
+        criteria.append(room_column == room)
+    if case_status is not None:
+        criteria.append(SurgeryRegistration.status == case_status)
+    encode = surgery_row_encoder(fields)
+    # Own session: yield-dependencies are closed before a streamed body is sent
+    session_factory = read_sessionmaker(request)
+
+    def lines():
+        db = session_factory()
+        try:
+            result = db.execute(
+                select_surgery_rows(fields, *criteria)
+                .order_by(SurgeryRegistration.surgery_date, SurgeryRegistration.id)
+                .execution_options(yield_per=settings.SURGERY_RANGE_BATCH)
+            )
+            for rows in result.partitions():
+                yield b"".join(dumps(encode(row)) + b"\n" for row in rows)
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.get("/{surgery_id}")
-async def get_surgery(surgery_id: int, db: Session = Depends(get_db)):
+async def get_surgery(surgery_id: int, db: Session = Depends(get_read_db)):
     """Get a specific surgery by ID"""
     surgery = db.query(SurgeryRegistration).filter(
         SurgeryRegistration.id == surgery_id
@@ -277,7 +586,67 @@ async def get_surgery(surgery_id: int, db: Session = Depends(get_db)):
     if not surgery:
         raise HTTPException(status_code=404, detail="Surgery not found")
     
-    return surgery_to_response(surgery)
+    return with_queue_positions(db, [surgery_to_response(surgery)])[0]
+
+
+@router.patch("/batch")
+async def update_surgeries_batch(data: SurgeryBatchUpdate, db: Session = Depends(get_db)):
+    """
+    Update several surgeries in one transaction (board drag-and-drop, room re-sequencing).
+    Rows changing the same set of fields share one bulk UPDATE; the updated rows are returned in request order.
+    """
+    ids = [item.id for item in data.updates]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Each surgery may appear only once per batch")
+    # Rows stay locked until commit, so the versions read here are the ones overwritten
+    surgeries = {
+        s.id: s for s in db.query(SurgeryRegistration).filter(SurgeryRegistration.id.in_(ids)).with_for_update().all()
+    }
+    missing = [i for i in ids if i not in surgeries]
+    if missing:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=f"Surgeries not found: {missing}")
+    stale = [item.id for item in data.updates if item.version is not None and item.version != surgeries[item.id].version]
+    if stale:
+        current = with_queue_positions(db, [surgery_to_response(surgeries[i]) for i in stale])
+        db.rollback()
+        raise HTTPException(status_code=409, detail={"message": "Surgeries were changed by someone else", "current": current})
+
+    try:
+        befores = {i: surgery_events.capture(s) for i, s in surgeries.items()}
+        values = {item.id: changed_values(surgeries[item.id], update_values(item)) for item in data.updates}
+        groups: dict[tuple, list] = {}
+        for surgery_id, changes in values.items():
+            if changes:
+                changes["version"] = surgeries[surgery_id].version + 1
+                groups.setdefault(tuple(sorted(changes)), []).append({"id": surgery_id, **changes})
+        for rows in groups.values():
+            db.execute(update(SurgeryRegistration), rows)
+
+        # Mirror the new values on the loaded rows instead of selecting them again
+        changed = []
+        for surgery_id, changes in values.items():
+            surgery = surgeries[surgery_id]
+            for field, value in changes.items():
+                set_committed_value(surgery, field, value)
+            if surgery_events.record_updated(db, surgery, befores[surgery_id]) is not None:
+                changed.append(surgery)
+        db.flush()
+        for surgery in surgeries.values():
+            db.expunge(surgery)  # keep their state readable after commit
+        version_store.bump_many(db, SurgeryRegistration.__tablename__, (s.surgery_date for s in changed))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if changed:
+        surgery_events.surgery_projections.notify()
+        for surgery in changed:
+            or_room_state.publish_upsert(surgery)
+            npo_timers.track(surgery)
+            duration_stats.observe(surgery)
+    return with_queue_positions(db, [surgery_to_response(surgeries[i]) for i in ids])
 
 
 @router.patch("/{surgery_id}")
@@ -290,29 +659,145 @@ async def update_surgery(surgery_id: int, data: SurgeryUpdate, db: Session = Dep
     if not surgery:
         raise HTTPException(status_code=404, detail="Surgery not found")
     
+    values = update_values(data)
     try:
-        if data.or_room is not None:
-            surgery.or_room = data.or_room
-        if data.status is not None:
-            surgery.status = SurgeryStatusEnum(data.status.value)
-        if data.not_ready_reason is not None:
-            surgery.not_ready_reason = data.not_ready_reason
-        if data.queue_order is not None:
-            surgery.queue_order = data.queue_order
-        if data.selected_or is not None:
-            surgery.selected_or = data.selected_or
-        if data.start_time is not None:
-            surgery.start_time = time_str_to_time(data.start_time)
-        if data.end_time is not None:
-            surgery.end_time = time_str_to_time(data.end_time)
-        
+        # UPDATE ... WHERE id = ? AND version = ?: with the client's version a mismatch is a
+        # conflict; without one, re-read and retry if another write got in between
+        for _ in range(1 if data.version is not None else UPDATE_ATTEMPTS):
+            if data.version is not None and data.version != surgery.version:
+                raise version_conflict(db, surgery)  # even if the change is already in place
+            before = surgery_events.capture(surgery)
+            changes = changed_values(surgery, values)
+            if not changes:
+                # Nothing to write: no version bump, no event
+                return with_queue_positions(db, [surgery_to_response(surgery)])[0]
+            expected = data.version if data.version is not None else surgery.version
+            if conditional_update(db, surgery, changes, expected):
+                break
+            db.refresh(surgery)
+        else:
+            raise version_conflict(db, surgery)
+
+        surgery_events.record_updated(db, surgery, before)
+        db.expunge(surgery)  # the updated values are already on it; no refresh after commit
+        version_store.bump(db, SurgeryRegistration.__tablename__, surgery.surgery_date)
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    surgery_events.surgery_projections.notify()
+    or_room_state.publish_upsert(surgery)
+    npo_timers.track(surgery)
+    duration_stats.observe(surgery)
+    return with_queue_positions(db, [surgery_to_response(surgery)])[0]
+
+
+def _move_bounds(db: Session, surgery: SurgeryRegistration, room: str, after, before) -> tuple:
+    """Ranks the moved case must fall between (None = open end)"""
+    day = surgery.surgery_date
+    if after is not None and before is not None:
+        if after.queue_rank >= before.queue_rank:
+            raise HTTPException(status_code=409, detail="after_id must be ahead of before_id in the queue")
+        return after.queue_rank, before.queue_rank
+    if after is not None:
+        return after.queue_rank, neighbour_rank(db, day, room, after.queue_rank, below=False, exclude_id=surgery.id)
+    if before is not None:
+        return neighbour_rank(db, day, room, before.queue_rank, below=True, exclude_id=surgery.id), before.queue_rank
+    last = db.query(func.max(SurgeryRegistration.queue_rank)).filter(
+        SurgeryRegistration.surgery_date == day,
+        room_column == room,
+        SurgeryRegistration.id != surgery.id,
+    ).scalar()
+    return last, None
+
+
+@router.post("/{surgery_id}/move")
+async def move_surgery(surgery_id: int, data: QueueMove, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Move a case in an OR room queue: right after `after_id` and/or right before `before_id`
+    (or to the end of `or_room`). Only the moved row is written: it gets a rank between its
+    new neighbours (the room is renumbered first if there is no gap left between them).
+    """
+    # Locked until commit, so the version checked here is the one overwritten
+    surgery = db.query(SurgeryRegistration).filter(
+        SurgeryRegistration.id == surgery_id
+    ).with_for_update().first()
+
+    if not surgery:
+        raise HTTPException(status_code=404, detail="Surgery not found")
+    if data.version is not None and data.version != surgery.version:
+        current = version_conflict(db, surgery)
+        db.rollback()
+        raise current
+
+    anchors = {}
+    for anchor_id in (data.after_id, data.before_id):
+        if anchor_id is None:
+            continue
+        if anchor_id == surgery_id:
+            raise HTTPException(status_code=400, detail="A case cannot be moved next to itself")
+        anchor = db.query(SurgeryRegistration).filter(SurgeryRegistration.id == anchor_id).first()
+        if anchor is None or anchor.surgery_date != surgery.surgery_date:
+            raise HTTPException(status_code=404, detail=f"Surgery {anchor_id} not found on {surgery.surgery_date}")
+        anchors[anchor_id] = anchor
+    after = anchors.get(data.after_id)
+    before = anchors.get(data.before_id)
+
+    rooms = {a.selected_or or a.or_room for a in anchors.values()}
+    if len(rooms) > 1:
+        raise HTTPException(status_code=400, detail="after_id and before_id are in different rooms")
+    room = rooms.pop() if rooms else data.or_room
+    if not room:
+        raise HTTPException(status_code=400, detail="Give after_id, before_id or or_room")
+
+    try:
+        rebalanced = []
+        rank = None
+        ranked = all(a.queue_rank is not None for a in anchors.values()) and (
+            anchors or not has_unranked(db, surgery.surgery_date, room, surgery.id)
+        )
+        if ranked:
+            lower, upper = _move_bounds(db, surgery, room, after, before)
+            rank = rank_between(lower, upper)
+        if rank is None:
+            # Cases without a rank yet (set before ranks existed), or no gap left: renumber the room first
+            rebalanced = rebalance(db, surgery.surgery_date, room, exclude_id=surgery.id)
+            lower, upper = _move_bounds(db, surgery, room, after, before)
+            rank = rank_between(lower, upper)
+
+        before_values = surgery_events.capture(surgery)
+        surgery.queue_rank = rank
+        surgery.version = surgery.version + 1
+        if (surgery.selected_or or surgery.or_room) != room:
+            if surgery.selected_or:
+                surgery.selected_or = room
+            else:
+                surgery.or_room = room
+        surgery_events.record_updated(db, surgery, before_values)
+        db.flush()
+        changed = [surgery] + rebalanced
+        for case in changed:
+            db.expunge(case)  # the new values are already on them; no refresh after commit
+        version_store.bump(db, SurgeryRegistration.__tablename__, surgery.surgery_date)
         db.commit()
-        db.refresh(surgery)
-        return surgery_to_response(surgery)
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+    surgery_events.surgery_projections.notify()
+    for case in changed:
+        or_room_state.publish_upsert(case)
+    if min(rank - lower if lower is not None else MIN_GAP, upper - rank if upper is not None else MIN_GAP) < MIN_GAP:
+        background_tasks.add_task(rebalance_room, surgery.surgery_date, room)
+    return with_queue_positions(db, [surgery_to_response(surgery)])[0]
+
 
 @router.delete("/{surgery_id}")
 async def delete_surgery(surgery_id: int, db: Session = Depends(get_db)):
@@ -325,8 +810,14 @@ async def delete_surgery(surgery_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Surgery not found")
     
     try:
+        surgery_date, hn = surgery.surgery_date, surgery.hn
+        surgery_events.record_deleted(db, surgery)
         db.delete(surgery)
+        version_store.bump(db, SurgeryRegistration.__tablename__, surgery_date)
         db.commit()
+        surgery_events.surgery_projections.notify()
+        or_room_state.publish_delete(surgery_id, hn)
+        duration_stats.forget(surgery_id)
         return {"message": "Surgery deleted successfully"}
     except Exception as e:
         db.rollback()
@@ -342,7 +833,11 @@ async def reset_all_data(db: Session = Depends(get_db)):
     try:
         # Delete all records
         db.query(SurgeryRegistration).delete()
+        surgery_events.record_reset(db)
+        version_store.bump_all(db, SurgeryRegistration.__tablename__)
         db.commit()
+        surgery_events.surgery_projections.notify()
+        or_room_state.publish_reset()
         return {"message": "All surgery data has been reset successfully"}
     except Exception as e:
         db.rollback()
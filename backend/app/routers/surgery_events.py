@@ -0,0 +1,75 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.models.surgery_event import SurgeryEvent, OrRoomTimeline, SurgeryDaySummary
+
+router = APIRouter(prefix="/api/surgery", tags=["surgery"])
+
+
+@router.get("/{surgery_id}/events")
+async def get_surgery_events(surgery_id: int, db: Session = Depends(get_read_db)):
+    """Change history of a surgery (append-only event log)"""
+    events = db.query(SurgeryEvent).filter(
+        SurgeryEvent.surgery_id == surgery_id
+    ).order_by(SurgeryEvent.id).all()
+    return [
+        {
+            "id": e.id,
+            "event_type": e.event_type,
+            "status": e.status,
+            "or_room": e.or_room,
+            "changes": e.changes,
+            "created_at": e.created_at,
+        }
+        for e in events
+    ]
+
+
+@router.get("/timeline/{surgery_date}")
+async def get_room_timelines(
+    surgery_date: date,
+    or_room: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Status transitions per OR room for a date (from the or_room_timeline projection)"""
+    query = db.query(OrRoomTimeline).filter(OrRoomTimeline.surgery_date == surgery_date)
+    if or_room:
+        query = query.filter(OrRoomTimeline.or_room == or_room)
+
+    rooms: dict = {}
+    for row in query.order_by(OrRoomTimeline.or_room, OrRoomTimeline.event_id):
+        rooms.setdefault(row.or_room or "", []).append({
+            "surgery_id": row.surgery_id,
+            "status": row.status,
+            "at": row.at,
+        })
+    return {"date": surgery_date, "rooms": rooms}
+
+
+@router.get("/summary/{surgery_date}")
+async def get_day_summary(surgery_date: date, db: Session = Depends(get_read_db)):
+    """Per-day case counts (from the day_summary projection)"""
+    summary = db.get(SurgeryDaySummary, surgery_date)
+    if summary is None:
+        return {
+            "date": surgery_date,
+            "total_cases": 0,
+            "completed_cases": 0,
+            "cancelled_cases": 0,
+            "status_changes": 0,
+            "first_start_time": None,
+            "last_end_time": None,
+        }
+    return {
+        "date": surgery_date,
+        "total_cases": summary.total_cases,
+        "completed_cases": summary.completed_cases,
+        "cancelled_cases": summary.cancelled_cases,
+        "status_changes": summary.status_changes,
+        "first_start_time": summary.first_start_time,
+        "last_end_time": summary.last_end_time,
+    }
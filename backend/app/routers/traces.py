@@ -0,0 +1,29 @@
+from typing import Optional
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from app.models.user import User
+from app.services.trace_recorder import trace_recorder
+from app.utils.security import get_current_admin_user
+
+router = APIRouter(prefix="/admin/traces", tags=["Admin"])
+
+
+class TraceSettingsUpdate(BaseModel):
+    enabled: Optional[bool] = None
+
+
+@router.get("/")
+async def get_trace_status(current_user: User = Depends(get_current_admin_user)):
+    """Get request trace recording status (Admin only)"""
+    return trace_recorder.status()
+
+
+@router.put("/")
+async def update_trace_settings(
+    data: TraceSettingsUpdate,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Start/stop recording request traces for load replay without a restart (Admin only)"""
+    if data.enabled is not None:
+        trace_recorder.enabled = data.enabled
+    return trace_recorder.status()
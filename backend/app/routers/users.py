@@ -1,10 +1,11 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
 from app.utils.security import get_password_hash, get_current_admin_user
+from app.services.version_store import version_store, conditional_get
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -13,7 +14,8 @@ async def get_users(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: User = Depends(get_current_admin_user),
+    etag: Optional[str] = Depends(conditional_get(User.__tablename__)),
 ):
     """Get all users (Admin only)"""
     users = db.query(User).offset(skip).limit(limit).all()
@@ -43,6 +45,7 @@ async def create_user(
         is_active=True
     )
     db.add(db_user)
+    version_store.bump_all(db, User.__tablename__)
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -82,6 +85,7 @@ async def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
     
+    version_store.bump_all(db, User.__tablename__)
     db.commit()
     db.refresh(user)
     return user
@@ -104,5 +108,6 @@ async def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     db.delete(user)
+    version_store.bump_all(db, User.__tablename__)
     db.commit()
     return None
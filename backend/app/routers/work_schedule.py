@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, extract
 from datetime import date
-from typing import List
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.work_schedule import WorkSchedule, ShiftType
 from app.schemas.work_schedule import WorkScheduleCreate, WorkScheduleResponse, ShiftTypeEnum
+from app.services.snapshot_cache import snapshot_response
+from app.services.version_store import version_store, conditional_get
 
 router = APIRouter(prefix="/api/work-schedule", tags=["Work Schedule"])
 
@@ -28,6 +30,7 @@ async def create_or_update_work_schedule(data: WorkScheduleCreate, db: Session =
         # Update existing record
         for field, value in data.model_dump(exclude={'date', 'shift_type'}).items():
             setattr(existing, field, value)
+        version_store.bump(db, WorkSchedule.__tablename__, data.date)
         db.commit()
         db.refresh(existing)
         return existing
@@ -50,27 +53,38 @@ async def create_or_update_work_schedule(data: WorkScheduleCreate, db: Session =
             key_person=data.key_person,
         )
         db.add(new_schedule)
+        version_store.bump(db, WorkSchedule.__tablename__, data.date)
         db.commit()
         db.refresh(new_schedule)
         return new_schedule
 
 
+def schedules_to_json(schedules: List[WorkSchedule]) -> list:
+    return [WorkScheduleResponse.model_validate(s).model_dump(mode="json") for s in schedules]
+
+
 @router.get("/{schedule_date}", response_model=List[WorkScheduleResponse])
-async def get_schedules_by_date(schedule_date: date, db: Session = Depends(get_db)):
+async def get_schedules_by_date(
+    request: Request,
+    schedule_date: date,
+    etag: Optional[str] = Depends(conditional_get(WorkSchedule.__tablename__, "schedule_date")),
+):
     """
     ดึงตารางเวรตามวันที่ (ทั้งเวรบ่ายและดึก)
     """
-    schedules = db.query(WorkSchedule).filter(
-        WorkSchedule.date == schedule_date
-    ).all()
-    return schedules
+    def build(db: Session):
+        return schedules_to_json(db.query(WorkSchedule).filter(
+            WorkSchedule.date == schedule_date
+        ).all())
+
+    return await snapshot_response(request, "work_schedule", ("date", schedule_date), build, etag)
 
 
 @router.get("/{schedule_date}/{shift_type}", response_model=WorkScheduleResponse)
 async def get_schedule_by_date_and_shift(
     schedule_date: date, 
     shift_type: ShiftTypeEnum, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     ดึงตารางเวรตามวันที่และประเภทเวร
@@ -88,17 +102,24 @@ async def get_schedule_by_date_and_shift(
 
 
 @router.get("/month/{year}/{month}", response_model=List[WorkScheduleResponse])
-async def get_schedules_by_month(year: int, month: int, db: Session = Depends(get_db)):
+async def get_schedules_by_month(
+    request: Request,
+    year: int,
+    month: int,
+    etag: Optional[str] = Depends(conditional_get(WorkSchedule.__tablename__, month_params=("year", "month"))),
+):
     """
     ดึงตารางเวรทั้งเดือน (สำหรับแสดงปฏิทิน)
     """
-    schedules = db.query(WorkSchedule).filter(
-        and_(
-            extract('year', WorkSchedule.date) == year,
-            extract('month', WorkSchedule.date) == month
-        )
-    ).order_by(WorkSchedule.date).all()
-    return schedules
+    def build(db: Session):
+        return schedules_to_json(db.query(WorkSchedule).filter(
+            and_(
+                extract('year', WorkSchedule.date) == year,
+                extract('month', WorkSchedule.date) == month
+            )
+        ).order_by(WorkSchedule.date).all())
+
+    return await snapshot_response(request, "work_schedule", ("month", year, month), build, etag)
 
 
 @router.delete("/{schedule_id}", status_code=status.HTTP_200_OK)
@@ -110,6 +131,8 @@ async def delete_schedule(schedule_id: int, db: Session = Depends(get_db)):
     if not schedule:
         raise HTTPException(status_code=404, detail="ไม่พบข้อมูลเวร")
     
+    schedule_date = schedule.date
     db.delete(schedule)
+    version_store.bump(db, WorkSchedule.__tablename__, schedule_date)
     db.commit()
     return {"message": "ลบข้อมูลเวรเรียบร้อยแล้ว"}
@@ -43,6 +43,7 @@ class PatientUpdate(BaseModel):
 class PatientStatusUpdate(BaseModel):
     status: SurgeryStatus
     notes: Optional[str] = None
+    version: Optional[int] = None  # เวอร์ชันที่แก้ไขจาก; ถ้าแถวถูกแก้ไปแล้วจะได้ 409
 
 # Schema for returning patient data
 class PatientResponse(PatientBase):
@@ -53,6 +54,7 @@ class PatientResponse(PatientBase):
     created_by: Optional[int] = None
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
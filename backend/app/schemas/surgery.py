@@ -54,6 +54,23 @@ class SurgeryUpdate(BaseModel):
     selected_or: Optional[str] = None
     start_time: Optional[str] = None
     end_time: Optional[str] = None
+    version: Optional[int] = Field(None, description="Row version the change is based on; 409 if the case changed since")
+
+
+class QueueMove(BaseModel):
+    """Place a case right after `after_id` and/or right before `before_id` (same date; their room is taken)"""
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+    or_room: Optional[str] = Field(None, max_length=20, description="Target room when it has no cases to move next to")
+    version: Optional[int] = Field(None, description="Row version the move is based on; 409 if the case changed since")
+
+
+class SurgeryBatchUpdateItem(SurgeryUpdate):
+    id: int
+
+
+class SurgeryBatchUpdate(BaseModel):
+    updates: list[SurgeryBatchUpdateItem]
 
 
 class SurgeryResponse(BaseModel):
@@ -78,10 +95,12 @@ class SurgeryResponse(BaseModel):
     scrub_nurse: Optional[str]
     circulate_nurse: Optional[str]
     queue_order: Optional[int]
+    queue_rank: Optional[int]
     selected_or: Optional[str]
     status: str
     not_ready_reason: Optional[str]
     created_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
@@ -89,3 +108,14 @@ class SurgeryResponse(BaseModel):
 
 class SurgeryBulkCreate(BaseModel):
     registrations: list[SurgeryCreate]
+
+
+class PlanAssignment(BaseModel):
+    id: int
+    or_room: str = Field(..., max_length=20)
+    queue_order: int
+    version: Optional[int] = Field(None, description="Row version the plan was made from (as returned by the planner); 409 if the case changed since")
+
+
+class PlanApply(BaseModel):
+    assignments: list[PlanAssignment]
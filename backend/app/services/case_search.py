@@ -0,0 +1,227 @@
+"""
+Case Search: inverted index over diagnosis + operation
+
+Answers "every laparoscopic cholecystectomy by Dr X this year" without
+`LIKE '%...%'` scans of the Text columns:
+
+- Words of `diagnosis` and `operation` (lowercased, split on non-word
+  characters) map to the set of surgery ids containing them. Query words are
+  ANDed; a query word of 3+ characters also matches words it prefixes
+  ("lap chole"), expanded through the sorted vocabulary with bisect.
+- Thai has no spaces between words, so a run of Thai characters (`\w` alone
+  would split it at every vowel and tone mark) is indexed by its character
+  trigrams, like name_index: a query run matches through the postings of its
+  trigrams and is then checked as a substring of the case's runs, so
+  "ไส้ติ่ง" finds "ผ่าตัดไส้ติ่ง" as `ILIKE '%ไส้ติ่ง%'` did. Shorter query
+  runs match the trigrams that contain them.
+- Per case, the fields needed for filtering (date, surgeon, department,
+  case_size) are kept alongside, so filters, counts and paging run in memory;
+  only the requested page is read from the database, by primary key.
+
+Loaded with one query at startup and updated incrementally from the
+`or_rooms` events every surgery write already publishes (see or_room_state).
+"""
+import bisect
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import NamedTuple, Optional
+
+from app.database import SessionLocal
+from app.models.surgery import SurgeryRegistration
+from app.services.event_bus import event_bus
+from app.services.or_room_state import OR_ROOMS_TOPIC
+
+_WORD = re.compile(r"[\u0e00-\u0e7f\w]+")  # Thai block incl. vowel/tone marks (category Mn)
+_THAI = re.compile(r"[\u0e00-\u0e7f]")
+MIN_PREFIX = 3
+GRAM = 3
+
+
+def tokenize(*texts: Optional[str]) -> set:
+    return {word for text in texts if text for word in _WORD.findall(text.lower())}
+
+
+def _is_thai(word: str) -> bool:
+    return _THAI.search(word) is not None
+
+
+def index_keys(words) -> set:
+    """Posting keys of the words: a Thai run is split into its trigrams (kept whole if shorter)"""
+    keys = set()
+    for word in words:
+        if _is_thai(word) and len(word) > GRAM:
+            keys.update(word[i:i + GRAM] for i in range(len(word) - GRAM + 1))
+        else:
+            keys.add(word)
+    return keys
+
+
+def _value(v):
+    return getattr(v, "value", v)
+
+
+class CaseDoc(NamedTuple):
+    surgery_date: str
+    surgeon: str
+    department: str
+    case_size: Optional[str]
+    words: frozenset
+
+
+class CaseSearch:
+    def __init__(self):
+        self._docs: dict[int, CaseDoc] = {}
+        self._postings: dict[str, set] = defaultdict(set)
+        self._vocabulary: list[str] = []  # sorted words, for prefix expansion
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Index every case (one query)"""
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                SurgeryRegistration.id,
+                SurgeryRegistration.diagnosis,
+                SurgeryRegistration.operation,
+                SurgeryRegistration.surgery_date,
+                SurgeryRegistration.surgeon,
+                SurgeryRegistration.department,
+                SurgeryRegistration.case_size,
+            ).all()
+        finally:
+            db.close()
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            for surgery_id, diagnosis, operation, day, surgeon, department, case_size in rows:
+                self._put(surgery_id, diagnosis, operation, day.isoformat() if day else "", surgeon, department, _value(case_size))
+            self._vocabulary = sorted(self._postings)
+        return len(self._docs)
+
+    # --- updates ---
+
+    def _put(self, surgery_id, diagnosis, operation, day, surgeon, department, case_size) -> list:
+        """Index a case; returns keys new to the vocabulary"""
+        self._remove(surgery_id)
+        words = frozenset(tokenize(diagnosis, operation))
+        self._docs[surgery_id] = CaseDoc(day or "", surgeon or "", department or "", case_size, words)
+        new_keys = []
+        for key in index_keys(words):
+            posting = self._postings[key]
+            if not posting:
+                new_keys.append(key)
+            posting.add(surgery_id)
+        return new_keys
+
+    def _remove(self, surgery_id: int):
+        doc = self._docs.pop(surgery_id, None)
+        if doc is None:
+            return
+        for key in index_keys(doc.words):
+            posting = self._postings.get(key)
+            if posting is not None:
+                posting.discard(surgery_id)
+                if not posting:
+                    del self._postings[key]
+                    i = bisect.bisect_left(self._vocabulary, key)
+                    if i < len(self._vocabulary) and self._vocabulary[i] == key:
+                        del self._vocabulary[i]
+
+    def apply(self, event: dict):
+        with self._lock:
+            op = event["op"]
+            if op == "reset":
+                self._docs.clear()
+                self._postings.clear()
+                self._vocabulary.clear()
+            elif op == "delete":
+                self._remove(event["id"])
+            else:
+                case = event["case"]
+                new_keys = self._put(
+                    case["id"], case.get("diagnosis"), case["operation"], case["surgery_date"],
+                    case["surgeon"], case["department"], case["case_size"],
+                )
+                for key in new_keys:
+                    bisect.insort(self._vocabulary, key)
+
+    # --- search ---
+
+    def _matching(self, word: str) -> set:
+        """Ids of cases with `word`, or (3+ characters) a word starting with it"""
+        if _is_thai(word):
+            return self._thai_matching(word)
+        if len(word) < MIN_PREFIX:
+            return set(self._postings.get(word, ()))
+        ids = set()
+        i = bisect.bisect_left(self._vocabulary, word)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(word):
+            ids |= self._postings[self._vocabulary[i]]
+            i += 1
+        return ids
+
+    def _thai_matching(self, run: str) -> set:
+        """Ids of cases with a Thai run containing `run`"""
+        if len(run) < GRAM:
+            ids = set()
+            for key in self._vocabulary:
+                if run in key:
+                    ids |= self._postings[key]
+            return ids
+        ids = None
+        for key in index_keys([run]):
+            posting = self._postings.get(key, set())
+            ids = set(posting) if ids is None else ids & posting
+            if not ids:
+                return set()
+        # The trigrams may all be present without being contiguous
+        return {i for i in ids if any(run in word for word in self._docs[i].words)}
+
+    def search(
+        self,
+        query: str,
+        surgeon: Optional[str] = None,
+        department: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        case_size: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> dict:
+        """Matching surgery ids newest first (one page), with the total and per-year counts"""
+        words = sorted(tokenize(query), key=len, reverse=True)  # longest (most selective) first
+        surgeon = (surgeon or "").strip().lower()
+        department = (department or "").strip().lower()
+        with self._lock:
+            ids = None
+            for word in words:
+                matches = self._matching(word)
+                ids = matches if ids is None else ids & matches
+                if not ids:
+                    break
+            hits = []
+            for surgery_id in ids or ():
+                doc = self._docs[surgery_id]
+                if surgeon and surgeon not in doc.surgeon.lower():
+                    continue
+                if department and department != doc.department.lower():
+                    continue
+                if case_size and doc.case_size != case_size:
+                    continue
+                if date_from and doc.surgery_date < date_from:
+                    continue
+                if date_to and doc.surgery_date > date_to:
+                    continue
+                hits.append((doc.surgery_date, surgery_id))
+        hits.sort(reverse=True)
+        by_year = Counter(day[:4] or "unknown" for day, _ in hits)
+        return {
+            "total": len(hits),
+            "by_year": dict(sorted(by_year.items(), reverse=True)),
+            "ids": [surgery_id for _, surgery_id in hits[skip:skip + limit]],
+        }
+
+
+case_search = CaseSearch()
+event_bus.subscribe(OR_ROOMS_TOPIC, case_search.apply)
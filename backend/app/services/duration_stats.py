@@ -0,0 +1,217 @@
+"""
+Case Duration Statistics + ETA
+
+Historical case durations (end_time - start_time) aggregated in memory per
+(operation, surgeon, case_size, department), with coarser fallbacks when a
+combination has too few cases. Loaded with one query at startup and updated
+incrementally over the event bus as cases get their end time, so ETA requests
+never run aggregate queries.
+
+`eta()` walks each OR room's live queue (see or_room_state) once and assigns
+expected start/end times: current case end = start + expected duration (or
+now, if it already overran), then each queued case starts at
+max(previous end + turnover, scheduled time).
+"""
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.surgery import SurgeryRegistration
+from app.services.event_bus import event_bus
+from app.services.or_room_state import or_room_state
+
+DURATIONS_TOPIC = "durations"
+
+# Used when no history matches at all
+DEFAULT_MINUTES = {"Major": 120.0, "Minor": 45.0, None: 90.0}
+
+
+def _value(v):
+    return getattr(v, "value", v)
+
+
+def _clean(text: Optional[str]) -> Optional[str]:
+    text = (text or "").strip()
+    return text or None
+
+
+def stats_key(operation, surgeon, case_size, department) -> tuple:
+    return (_clean(operation), _clean(surgeon), _value(case_size), _clean(department))
+
+
+def _fallback_keys(key: tuple) -> list:
+    """From the most to the least specific aggregate"""
+    operation, surgeon, case_size, department = key
+    return [
+        ("full", key),
+        ("operation", (operation, case_size)),
+        ("department", (department, case_size)),
+        ("case_size", (case_size,)),
+    ]
+
+
+def case_minutes(start: Optional[time], end: Optional[time]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    minutes = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+    if minutes < 0:
+        minutes += 24 * 60  # finished after midnight
+    return float(minutes) if minutes > 0 else None
+
+
+class DurationStats:
+    def __init__(self, min_cases: int):
+        self.min_cases = min_cases
+        self._aggregates: dict[tuple, list] = defaultdict(lambda: [0, 0.0, 0.0])  # (level, key) -> [n, sum, sum of squares]
+        self._samples: dict[int, tuple] = {}  # surgery id -> (key, minutes), to correct edited end times
+        self._lock = threading.Lock()
+        self.revision = 0  # bumped on every change, for caches derived from the statistics
+
+    def load(self) -> int:
+        """Aggregate every case with a start and end time (one query)"""
+        db = SessionLocal()
+        try:
+            rows = self._query(db)
+        finally:
+            db.close()
+        with self._lock:
+            self._aggregates.clear()
+            self._samples.clear()
+            for surgery_id, operation, surgeon, case_size, department, start, end in rows:
+                minutes = case_minutes(start, end)
+                if minutes is not None:
+                    self._add(surgery_id, stats_key(operation, surgeon, case_size, department), minutes)
+            self.revision += 1
+        return len(self._samples)
+
+    @staticmethod
+    def _query(db: Session) -> list:
+        return db.query(
+            SurgeryRegistration.id,
+            SurgeryRegistration.operation,
+            SurgeryRegistration.surgeon,
+            SurgeryRegistration.case_size,
+            SurgeryRegistration.department,
+            SurgeryRegistration.start_time,
+            SurgeryRegistration.end_time,
+        ).filter(
+            SurgeryRegistration.start_time.isnot(None),
+            SurgeryRegistration.end_time.isnot(None),
+        ).all()
+
+    def _add(self, surgery_id: int, key: tuple, minutes: float):
+        self._remove(surgery_id)
+        self._samples[surgery_id] = (key, minutes)
+        for aggregate_key in _fallback_keys(key):
+            agg = self._aggregates[aggregate_key]
+            agg[0] += 1
+            agg[1] += minutes
+            agg[2] += minutes * minutes
+
+    def _remove(self, surgery_id: int):
+        sample = self._samples.pop(surgery_id, None)
+        if sample is None:
+            return
+        key, minutes = sample
+        for aggregate_key in _fallback_keys(key):
+            agg = self._aggregates[aggregate_key]
+            agg[0] -= 1
+            agg[1] -= minutes
+            agg[2] -= minutes * minutes
+
+    # --- incremental updates ---
+
+    def observe(self, surgery: SurgeryRegistration):
+        """Called after a surgery write commits; publishes its duration if it has one"""
+        minutes = case_minutes(surgery.start_time, surgery.end_time)
+        if minutes is None and surgery.id not in self._samples:
+            return
+        key = stats_key(surgery.operation, surgery.surgeon, surgery.case_size, surgery.department)
+        event_bus.publish(DURATIONS_TOPIC, {"id": surgery.id, "key": list(key), "minutes": minutes})
+
+    def forget(self, surgery_id: int):
+        if surgery_id in self._samples:
+            event_bus.publish(DURATIONS_TOPIC, {"id": surgery_id, "key": None, "minutes": None})
+
+    def apply(self, event: dict):
+        with self._lock:
+            if event["minutes"] is None:
+                self._remove(event["id"])
+            else:
+                self._add(event["id"], tuple(event["key"]), event["minutes"])
+            self.revision += 1
+
+    # --- lookups ---
+
+    def expected(self, key: tuple) -> dict:
+        """Expected duration for a case, from the most specific aggregate with enough history"""
+        with self._lock:
+            for level, aggregate_key in _fallback_keys(key):
+                agg = self._aggregates.get((level, aggregate_key))
+                if agg is not None and agg[0] >= self.min_cases:
+                    n, total, total_sq = agg
+                    mean = total / n
+                    std = max(0.0, total_sq / n - mean * mean) ** 0.5
+                    return {"minutes": round(mean, 1), "std": round(std, 1), "n": n, "basis": level}
+        return {"minutes": DEFAULT_MINUTES.get(key[2], DEFAULT_MINUTES[None]), "std": None, "n": 0, "basis": "default"}
+
+    def eta(self, room: Optional[str] = None, now: Optional[datetime] = None) -> dict:
+        """Expected start/end of every case down each room's queue today"""
+        now = now or datetime.now()
+        live = or_room_state.live(room)
+        day = date.fromisoformat(live["date"])
+        turnover = timedelta(minutes=settings.CASE_TURNOVER_MINUTES)
+        day_start = datetime.combine(day, time.fromisoformat(settings.OR_DAY_START))
+
+        def at(hhmm: Optional[str]) -> Optional[datetime]:
+            return datetime.combine(day, time.fromisoformat(hhmm)) if hhmm else None
+
+        def expected_for(case: dict) -> dict:
+            return self.expected(stats_key(case["operation"], case["surgeon"], case["case_size"], case["department"]))
+
+        rooms = []
+        for view in live["rooms"]:
+            cases = []
+            cursor = max(now, day_start)
+            current = view["current"]
+            if current is not None:
+                expected = expected_for(current)
+                started = at(current["start_time"]) or now
+                end = max(now, started + timedelta(minutes=expected["minutes"]))
+                cases.append(self._eta_row(current, started, end, expected))
+                cursor = end + turnover
+            elif view["idle_since"]:
+                cursor = max(cursor, datetime.fromisoformat(view["idle_since"]) + turnover)
+
+            for case in view["queue"]:
+                expected = expected_for(case)
+                scheduled = at(case["scheduled_time"])
+                start = max(cursor, scheduled) if scheduled else cursor
+                end = start + timedelta(minutes=expected["minutes"])
+                cases.append(self._eta_row(case, start, end, expected))
+                cursor = end + turnover
+            rooms.append({"room": view["room"], "cases": cases})
+        return {"date": live["date"], "generated_at": now.isoformat(timespec="seconds"), "rooms": rooms}
+
+    @staticmethod
+    def _eta_row(case: dict, start: datetime, end: datetime, expected: dict) -> dict:
+        return {
+            "id": case["id"],
+            "hn": case["hn"],
+            "patient_name": case["patient_name"],
+            "status": case["status"],
+            "expected_start": start.strftime("%H:%M"),
+            "expected_end": end.strftime("%H:%M"),
+            "expected_minutes": expected["minutes"],
+            "basis": expected["basis"],
+            "history_cases": expected["n"],
+        }
+
+
+duration_stats = DurationStats(min_cases=settings.DURATION_STATS_MIN_CASES)
+event_bus.subscribe(DURATIONS_TOPIC, duration_stats.apply)
@@ -0,0 +1,188 @@
+"""
+Event Bus (cross-worker cache invalidation)
+
+Writes publish small JSON events (e.g. "versions" bumps, "or_rooms" changes);
+every worker subscribes and updates its in-memory caches. Backends:
+
+- inprocess: single worker, events are dispatched synchronously
+- unix:      one host, several uvicorn workers; each worker binds a Unix
+             datagram socket in EVENT_BUS_SOCKET_DIR and publishes to all peers
+- redis:     several hosts; Redis pub/sub (requires the optional `redis` package)
+
+Subscribers also receive events published by their own worker, so a cache
+has a single code path for local and remote writes.
+"""
+import json
+import os
+import secrets
+import socket
+import threading
+from collections import defaultdict
+from typing import Callable
+
+from app.config import settings
+
+REDIS_CHANNEL = "surgitrack:bus"
+
+
+class EventBus:
+    """In-process bus; base class for the cross-worker backends"""
+
+    backend = "inprocess"
+
+    def __init__(self):
+        self.node_id = self._new_node_id()
+        self._subscribers: dict[str, list[Callable[[dict], None]]] = defaultdict(list)
+        self.started = False
+
+    @staticmethod
+    def _new_node_id() -> str:
+        return f"{os.getpid()}-{secrets.token_hex(4)}"
+
+    def subscribe(self, topic: str, callback: Callable[[dict], None]):
+        self._subscribers[topic].append(callback)
+
+    def publish(self, topic: str, payload: dict):
+        self._dispatch(topic, payload)
+        if self.started:
+            message = json.dumps({"origin": self.node_id, "topic": topic, "payload": payload})
+            self._send_remote(message.encode("utf-8"))
+
+    def _dispatch(self, topic: str, payload: dict):
+        for callback in list(self._subscribers[topic]):
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"[BUS] Subscriber error on '{topic}': {e}")
+
+    def _receive(self, data: bytes):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get("origin") == self.node_id:
+            return  # already dispatched locally in publish()
+        self._dispatch(message["topic"], message["payload"])
+
+    def _send_remote(self, data: bytes):
+        pass
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+
+class UnixSocketBus(EventBus):
+    """Brokerless bus for workers on one host (Unix datagram sockets in a shared directory)"""
+
+    backend = "unix"
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.path = None
+        self._sock = None
+
+    def start(self):
+        # New id per worker process (the app module may have been imported before fork)
+        self.node_id = self._new_node_id()
+        self.path = os.path.join(self.directory, f"{self.node_id}.sock")
+        os.makedirs(self.directory, exist_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        threading.Thread(target=self._listen, name="event-bus", daemon=True).start()
+        super().start()
+        print(f"[OK] Event bus (unix) listening on {self.path}")
+
+    def _listen(self):
+        sock = self._sock
+        sock.settimeout(1.0)
+        while self._sock is sock:
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                return  # socket closed in stop()
+            self._receive(data)
+
+    def _send_remote(self, data: bytes):
+        for name in os.listdir(self.directory):
+            peer = os.path.join(self.directory, name)
+            if not name.endswith(".sock") or peer == self.path:
+                continue
+            try:
+                self._sock.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone; remove its stale socket file
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except OSError as e:
+                print(f"[BUS] Failed to deliver to {name}: {e}")
+
+    def stop(self):
+        super().stop()
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class RedisBus(EventBus):
+    """Bus over Redis pub/sub (multi-host); a local redis-server works for development"""
+
+    backend = "redis"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._client = None
+        self._thread = None
+
+    def start(self):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("EVENT_BUS_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self.node_id = self._new_node_id()
+        self._client = redis.Redis.from_url(self.url)
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{REDIS_CHANNEL: lambda message: self._receive(message["data"])})
+        self._thread = pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+        super().start()
+        print(f"[OK] Event bus (redis) subscribed to {REDIS_CHANNEL}")
+
+    def _send_remote(self, data: bytes):
+        try:
+            self._client.publish(REDIS_CHANNEL, data)
+        except Exception as e:
+            print(f"[BUS] Redis publish failed: {e}")
+
+    def stop(self):
+        super().stop()
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+def create_event_bus(backend: str) -> EventBus:
+    if backend == "unix":
+        return UnixSocketBus(settings.EVENT_BUS_SOCKET_DIR)
+    if backend == "redis":
+        return RedisBus(settings.REDIS_URL)
+    if backend != "inprocess":
+        raise ValueError(f"Unknown EVENT_BUS_BACKEND: {backend}")
+    return EventBus()
+
+
+event_bus = create_event_bus(settings.EVENT_BUS_BACKEND)
@@ -0,0 +1,154 @@
+"""
+HN Lookup: prefix index + patient summaries
+
+- Prefix index: every HN in `surgery_registrations` in a sorted array
+  (bisect), with the latest patient name, for typeahead while an HN is typed.
+  Loaded with one query at startup.
+- Summaries: name, age, case count and the last HN_SUMMARY_SURGERIES cases per
+  HN, built with two indexed queries on first lookup and kept in a bounded LRU.
+
+Every surgery write already publishes the changed case on the `or_rooms`
+topic (see or_room_state); this service listens to the same events, adds new
+HNs to the index and drops the HN's cached summary on every worker.
+"""
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.surgery import SurgeryRegistration
+from app.services.event_bus import event_bus
+from app.services.or_room_state import OR_ROOMS_TOPIC
+
+SUMMARY_FIELDS = ("id", "surgery_date", "surgery_type", "operation", "surgeon", "or_room", "status")
+
+
+def _value(v):
+    return getattr(v, "value", v)
+
+
+class HNLookup:
+    def __init__(self, summary_cases: int, max_summaries: int):
+        self.summary_cases = summary_cases
+        self.max_summaries = max_summaries
+        self._hns: list[str] = []                  # sorted, unique
+        self._names: dict[str, tuple] = {}         # hn -> (latest surgery date, patient name)
+        self._summaries: OrderedDict[str, dict] = OrderedDict()
+        self._invalidations: dict[str, int] = {}   # hn -> counter, so a summary built during a write is not kept
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Index every HN with its latest patient name (one query)"""
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                SurgeryRegistration.hn,
+                SurgeryRegistration.patient_name,
+                SurgeryRegistration.surgery_date,
+            ).all()
+        finally:
+            db.close()
+        names: dict[str, tuple] = {}
+        for hn, name, day in rows:
+            day = day.isoformat() if day else ""
+            if hn not in names or day >= names[hn][0]:
+                names[hn] = (day, name)
+        with self._lock:
+            self._names = names
+            self._hns = sorted(names)
+            self._summaries.clear()
+        return len(self._hns)
+
+    # --- updates (from the or_rooms event stream) ---
+
+    def apply(self, event: dict):
+        with self._lock:
+            op = event["op"]
+            if op == "reset":
+                self._hns.clear()
+                self._names.clear()
+                self._summaries.clear()
+                return
+            hn = event["case"]["hn"] if op == "upsert" else event.get("hn")
+            if hn is None:
+                return
+            if op == "upsert":
+                self._index(hn, event["case"]["surgery_date"] or "", event["case"]["patient_name"])
+            self._summaries.pop(hn, None)
+            self._invalidations[hn] = self._invalidations.get(hn, 0) + 1
+
+    def _index(self, hn: str, day: str, name: str):
+        if hn not in self._names:
+            bisect.insort(self._hns, hn)
+        if hn not in self._names or day >= self._names[hn][0]:
+            self._names[hn] = (day, name)
+
+    def _unindex(self, hn: str):
+        if self._names.pop(hn, None) is not None:
+            i = bisect.bisect_left(self._hns, hn)
+            if i < len(self._hns) and self._hns[i] == hn:
+                del self._hns[i]
+
+    # --- lookups ---
+
+    def suggest(self, prefix: str, limit: int) -> list:
+        """HNs starting with `prefix` (sorted), with the latest patient name"""
+        with self._lock:
+            start = bisect.bisect_left(self._hns, prefix)
+            result = []
+            for hn in self._hns[start:start + limit]:
+                if not hn.startswith(prefix):
+                    break
+                result.append({"hn": hn, "patient_name": self._names[hn][1]})
+            return result
+
+    def summary(self, db: Session, hn: str) -> Optional[dict]:
+        """Latest name/age, case count and last cases of an HN (None if it has no cases)"""
+        with self._lock:
+            if hn in self._summaries:
+                self._summaries.move_to_end(hn)
+                return self._summaries[hn]
+            generation = self._invalidations.get(hn, 0)
+
+        total = db.query(func.count(SurgeryRegistration.id)).filter(SurgeryRegistration.hn == hn).scalar()
+        summary = None
+        if total:
+            columns = [SurgeryRegistration.patient_name, SurgeryRegistration.age] + [
+                getattr(SurgeryRegistration, name) for name in SUMMARY_FIELDS
+            ]
+            rows = db.query(*columns).filter(SurgeryRegistration.hn == hn).order_by(
+                SurgeryRegistration.surgery_date.desc(), SurgeryRegistration.id.desc(),
+            ).limit(self.summary_cases).all()
+            cases = [
+                {name: _value(value) for name, value in zip(SUMMARY_FIELDS, row[2:])}
+                for row in rows
+            ]
+            for case in cases:
+                case["surgery_date"] = case["surgery_date"].isoformat() if case["surgery_date"] else None
+            summary = {
+                "hn": hn,
+                "patient_name": rows[0].patient_name,
+                "age": rows[0].age,
+                "total_surgeries": total,
+                "recent_surgeries": cases,
+            }
+
+        with self._lock:
+            if self._invalidations.get(hn, 0) != generation:
+                return summary  # changed while building: serve it, don't cache it
+            if summary is None:
+                self._unindex(hn)  # every case of this HN was deleted
+                return None
+            self._summaries[hn] = summary
+            while len(self._summaries) > self.max_summaries:
+                self._summaries.popitem(last=False)
+        return summary
+
+
+hn_lookup = HNLookup(summary_cases=settings.HN_SUMMARY_SURGERIES, max_summaries=settings.HN_SUMMARY_CACHE_SIZE)
+event_bus.subscribe(OR_ROOMS_TOPIC, hn_lookup.apply)
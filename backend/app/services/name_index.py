@@ -0,0 +1,191 @@
+"""
+Fuzzy Duplicate-Patient Detection
+
+Character trigram index over patient names from `surgery_registrations` and
+`patients`, so a person registered under a mistyped HN can still be found by
+name (and age) while the nurse is typing.
+
+Names are normalized before indexing: Thai/English titles (นาย, นาง, นางสาว,
+ด.ช., Mr ...; English ones only as a separate word) are dropped, tone marks
+and ์ are ignored (common typing slips), and words are joined with '#' so
+first and last name boundaries are grams too.
+Candidates are the entries sharing a trigram with the query, ranked by Dice
+similarity of the trigram sets, then adjusted for age and for an HN one typo
+away from the one being registered.
+
+Loaded with one query per table at startup and updated incrementally: surgery
+writes already publish each changed case on the `or_rooms` topic (see
+or_room_state); patient writes publish on the `names` topic.
+"""
+import re
+import threading
+import time as timer
+from collections import Counter, defaultdict
+from typing import Optional
+
+from app.database import SessionLocal
+from app.models.patient import Patient
+from app.models.surgery import SurgeryRegistration
+from app.services.event_bus import event_bus
+from app.services.or_room_state import OR_ROOMS_TOPIC
+
+NAMES_TOPIC = "names"
+
+# Longest first so "นางสาว" wins over "นาง"
+TITLES = sorted([
+    "นาย", "นาง", "นางสาว", "น.ส.", "น.ส", "ด.ช.", "ด.ญ.", "เด็กชาย", "เด็กหญิง",
+    "mr.", "mr", "mrs.", "mrs", "ms.", "ms", "miss",
+], key=len, reverse=True)
+_IGNORED = re.compile(r"[\u0e48-\u0e4c.\-']")  # tone marks, thanthakhat, punctuation
+
+NAME_WEIGHT = 0.85
+AGE_WEIGHT = 0.15
+AGE_TOLERANCE = 5  # years; registrations of the same person are often years apart
+HN_TYPO_BONUS = 0.1
+
+
+def normalize_patient_name(name: Optional[str]) -> str:
+    """Name without titles, tone marks and punctuation; words joined by '#'"""
+    text = (name or "").strip().lower()
+    for title in TITLES:
+        if text.startswith(title):
+            # Latin titles only as a whole word ("mr somchai", not "mrinal"); Thai ones are written attached
+            if title.isascii() and not title.endswith(".") and text[len(title):len(title) + 1] not in (" ", "."):
+                continue
+            text = text[len(title):]
+            break
+    return "#".join(_IGNORED.sub("", text).split())
+
+
+def trigrams(normalized: str) -> set:
+    padded = f"#{normalized}#"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def one_typo_apart(a: str, b: str) -> bool:
+    """Same length with one substituted or two swapped adjacent characters, or one character more/less"""
+    if a == b:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]])
+    if abs(len(a) - len(b)) != 1:
+        return False
+    short, long = (a, b) if len(a) < len(b) else (b, a)
+    i = next((i for i in range(len(short)) if short[i] != long[i]), len(short))
+    return short[i:] == long[i + 1:]
+
+
+class NameIndex:
+    def __init__(self):
+        self._entries: list[dict] = []                      # entry id -> {hn, patient_name, age, source, grams}
+        self._keys: dict[tuple, int] = {}                   # (source, hn, normalized name) -> entry id
+        self._postings: dict[str, list] = defaultdict(list)  # trigram -> entry ids
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Index every (HN, name) of both tables (one query each)"""
+        db = SessionLocal()
+        try:
+            surgeries = db.query(SurgeryRegistration.hn, SurgeryRegistration.patient_name, SurgeryRegistration.age).all()
+            patients = db.query(Patient.hn, Patient.full_name, Patient.age).all()
+        finally:
+            db.close()
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._postings.clear()
+            for hn, name, age in surgeries:
+                self._add("surgery", hn, name, age)
+            for hn, name, age in patients:
+                self._add("patients", hn, name, age)
+        return len(self._entries)
+
+    def _add(self, source: str, hn: str, name: str, age: Optional[int]):
+        normalized = normalize_patient_name(name)
+        if not normalized:
+            return
+        key = (source, hn, normalized)
+        entry_id = self._keys.get(key)
+        if entry_id is not None:
+            if age:
+                self._entries[entry_id]["age"] = age
+            return
+        grams = trigrams(normalized)
+        entry_id = len(self._entries)
+        self._entries.append({"hn": hn, "patient_name": name, "age": age, "source": source, "grams": len(grams)})
+        self._keys[key] = entry_id
+        for gram in grams:
+            self._postings[gram].append(entry_id)
+
+    # --- incremental updates ---
+
+    def publish_patients(self, patients: list):
+        """Called after patients are created/updated"""
+        rows = [{"hn": p.hn, "name": p.full_name, "age": p.age} for p in patients]
+        if rows:
+            event_bus.publish(NAMES_TOPIC, {"source": "patients", "rows": rows})
+
+    def apply(self, event: dict):
+        with self._lock:
+            for row in event["rows"]:
+                self._add(event["source"], row["hn"], row["name"], row["age"])
+
+    def apply_case(self, event: dict):
+        """or_rooms events: index the name of every created/updated surgery"""
+        if event["op"] != "upsert":
+            return  # deleted registrations stay indexed: still worth flagging
+        case = event["case"]
+        with self._lock:
+            self._add("surgery", case["hn"], case["patient_name"], case.get("age"))
+
+    # --- lookups ---
+
+    def candidates(self, name: str, age: Optional[int] = None, hn: Optional[str] = None,
+                   limit: int = 10, min_score: float = 0.5) -> dict:
+        """Ranked near-duplicates of a name (+ age), skipping the HN being registered itself"""
+        started = timer.perf_counter()
+        normalized = normalize_patient_name(name)
+        grams = trigrams(normalized) if normalized else set()
+        with self._lock:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._postings.get(gram, ()))
+            best: dict[tuple, dict] = {}
+            for entry_id, count in shared.items():
+                entry = self._entries[entry_id]
+                if hn and entry["hn"] == hn:
+                    continue
+                name_score = 2 * count / (len(grams) + entry["grams"])
+                score = name_score
+                if age is not None and entry["age"]:
+                    age_score = max(0.0, 1 - abs(age - entry["age"]) / AGE_TOLERANCE)
+                    score = NAME_WEIGHT * name_score + AGE_WEIGHT * age_score
+                hn_typo = bool(hn) and one_typo_apart(hn, entry["hn"])
+                if hn_typo:
+                    score = min(1.0, score + HN_TYPO_BONUS)
+                if score < min_score:
+                    continue
+                # One row per HN + name, whichever table scored higher
+                key = (entry["hn"], entry["patient_name"])
+                if key not in best or score > best[key]["score"]:
+                    best[key] = {
+                        "hn": entry["hn"],
+                        "patient_name": entry["patient_name"],
+                        "age": entry["age"],
+                        "source": entry["source"],
+                        "score": round(score, 3),
+                        "name_score": round(name_score, 3),
+                        "hn_typo": hn_typo,
+                    }
+        ranked = sorted(best.values(), key=lambda c: (-c["score"], c["hn"]))[:limit]
+        return {
+            "query": normalized,
+            "candidates": ranked,
+            "elapsed_ms": round((timer.perf_counter() - started) * 1000, 2),
+        }
+
+
+name_index = NameIndex()
+event_bus.subscribe(NAMES_TOPIC, name_index.apply)
+event_bus.subscribe(OR_ROOMS_TOPIC, name_index.apply_case)
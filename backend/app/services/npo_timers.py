@@ -0,0 +1,175 @@
+"""
+NPO Timer Scheduler
+
+Server-side replacement for the surgery board's per-tab `setInterval`: a case
+marked not ready because NPO is incomplete ("NPO ไม่ครบ (ครบ 10:30 น.)", the
+reason text the board already sends) becomes ready when its NPO deadline passes.
+
+Deadlines live in a min-heap served by one background thread that sleeps until
+the earliest one. Due cases are cleared in one transaction (reason cleared,
+NOT_READY -> REGISTERED), with a surgery event per case, and the change is
+published like any other surgery write (ETag versions, live OR room state).
+The heap is restored from the database at startup; scheduling changes are
+shared over the event bus, and due rows are locked before clearing, so each
+case is cleared once even when every worker holds the same timer.
+"""
+import heapq
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from app.database import SessionLocal
+from app.models.surgery import SurgeryRegistration, SurgeryStatusEnum
+from app.services import surgery_events
+from app.services.event_bus import event_bus
+from app.services.or_room_state import or_room_state
+from app.services.version_store import version_store
+
+NPO_TOPIC = "npo_timers"
+NPO_REASON_PREFIX = "NPO ไม่ครบ"
+RETRY_SECONDS = 30
+_DEADLINE_RE = re.compile(r"ครบ\s*(\d{1,2})[:.](\d{2})")
+
+
+def npo_deadline(surgery: SurgeryRegistration) -> Optional[datetime]:
+    """NPO deadline encoded in the not-ready reason, on the surgery date (None if not an NPO hold)"""
+    reason = surgery.not_ready_reason or ""
+    if not reason.startswith(NPO_REASON_PREFIX):
+        return None
+    match = _DEADLINE_RE.search(reason[len(NPO_REASON_PREFIX):])
+    if match is None:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    return datetime.combine(surgery.surgery_date or date.today(), datetime.min.time()).replace(hour=hour, minute=minute)
+
+
+class NPOTimers:
+    def __init__(self):
+        self._heap: list[tuple[datetime, int]] = []
+        self._deadlines: dict[int, datetime] = {}  # surgery id -> current deadline (stale heap entries are skipped)
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    # --- scheduling ---
+
+    def track(self, surgery: SurgeryRegistration):
+        """Called after a surgery write commits: (re)schedule or cancel its timer on every worker"""
+        deadline = npo_deadline(surgery)
+        if deadline is None and surgery.id not in self._deadlines:
+            return
+        event_bus.publish(NPO_TOPIC, {"id": surgery.id, "deadline": deadline.isoformat() if deadline else None})
+
+    def apply(self, event: dict):
+        deadline = datetime.fromisoformat(event["deadline"]) if event["deadline"] else None
+        with self._cond:
+            self._set(event["id"], deadline)
+            self._cond.notify()
+
+    def _set(self, surgery_id: int, deadline: Optional[datetime]):
+        if deadline is None:
+            self._deadlines.pop(surgery_id, None)
+            return
+        self._deadlines[surgery_id] = deadline
+        heapq.heappush(self._heap, (deadline, surgery_id))
+
+    def restore(self):
+        """Rebuild the heap from NPO holds of today and later"""
+        db = SessionLocal()
+        try:
+            surgeries = db.query(SurgeryRegistration).filter(
+                SurgeryRegistration.not_ready_reason.like(f"{NPO_REASON_PREFIX}%"),
+                SurgeryRegistration.surgery_date >= date.today(),
+            ).all()
+            with self._cond:
+                self._heap.clear()
+                self._deadlines.clear()
+                for surgery in surgeries:
+                    self._set(surgery.id, npo_deadline(surgery))
+                self._cond.notify()
+        finally:
+            db.close()
+        return len(self._deadlines)
+
+    # --- firing ---
+
+    def _pop_due(self, now: datetime) -> list[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, surgery_id = heapq.heappop(self._heap)
+            if self._deadlines.get(surgery_id) == deadline:
+                del self._deadlines[surgery_id]
+                due.append(surgery_id)
+        return due
+
+    def fire(self, surgery_ids: list[int]):
+        """Clear the NPO hold of due cases in one transaction"""
+        db = SessionLocal()
+        try:
+            surgeries = db.query(SurgeryRegistration).filter(
+                SurgeryRegistration.id.in_(surgery_ids),
+                SurgeryRegistration.not_ready_reason.like(f"{NPO_REASON_PREFIX}%"),
+            ).with_for_update().all()
+            # Another worker may have cleared them, or the reason may have been edited since
+            surgeries = [s for s in surgeries if (npo_deadline(s) or datetime.max) <= datetime.now()]
+            if not surgeries:
+                db.rollback()
+                return
+            for surgery in surgeries:
+                before = surgery_events.capture(surgery)
+                surgery.not_ready_reason = None
+                if surgery.status == SurgeryStatusEnum.NOT_READY:
+                    surgery.status = SurgeryStatusEnum.REGISTERED
+                surgery.version = SurgeryRegistration.version + 1
+                surgery_events.record_updated(db, surgery, before)
+            version_store.bump_many(db, SurgeryRegistration.__tablename__, (s.surgery_date for s in surgeries))
+            db.commit()
+            surgery_events.surgery_projections.notify()
+            for surgery in surgeries:
+                db.refresh(surgery)
+                or_room_state.publish_upsert(surgery)
+            print(f"[INFO] NPO complete: {len(surgeries)} case(s) ready")
+        finally:
+            db.close()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                due = self._pop_due(datetime.now())
+                if not due:
+                    # Re-check at least every minute (clock changes, day rollover)
+                    timeout = 60.0
+                    if self._heap:
+                        timeout = min(timeout, max(0.0, (self._heap[0][0] - datetime.now()).total_seconds()))
+                    self._cond.wait(timeout)
+                    continue
+            try:
+                self.fire(due)
+            except Exception as e:
+                print(f"[ERROR] NPO timers: {e}")
+                with self._cond:
+                    for surgery_id in due:
+                        self._deadlines.setdefault(surgery_id, datetime.now() + timedelta(seconds=RETRY_SECONDS))
+                        heapq.heappush(self._heap, (self._deadlines[surgery_id], surgery_id))
+
+    def start(self):
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name="npo-timers", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+npo_timers = NPOTimers()
+event_bus.subscribe(NPO_TOPIC, npo_timers.apply)
@@ -0,0 +1,207 @@
+"""
+OR Day Planner
+
+Proposes room assignments and queue order for a day's elective cases:
+
+1. Candidate rooms per case come from the OR/doctor rotation: the doctor's AM
+   room (from OR_DAY_START) and PM room (from OR_PM_START), own room first,
+   same-department room as fallback.
+2. Expected durations come from the historical duration statistics.
+3. Cases are placed longest first (Major before Minor) into the candidate room
+   that finishes earliest (LPT), then single-case moves between candidate
+   rooms are tried while they reduce total overtime past OR_ELECTIVE_END.
+4. Within a room, cases restricted to the PM block go last; otherwise Major
+   before Minor, then longest first.
+
+Cases already started or finished keep their room and are only counted as
+occupied time; planned cases are numbered after them in the room's queue. The plan is a proposal; applying it is a separate request.
+"""
+import time as timer
+from datetime import date, time
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.surgery import SurgeryRegistration, SurgeryStatusEnum, SurgeryTypeEnum
+from app.services.duration_stats import duration_stats, stats_key
+from app.services.or_rotation import AM, PM, CLOSED, or_rotation
+from app.services.queue_ranks import queue_positions
+
+PLANNED_STATUSES = (SurgeryStatusEnum.REGISTERED, SurgeryStatusEnum.WAITING, SurgeryStatusEnum.NOT_READY)
+FIXED_STATUSES = (SurgeryStatusEnum.IN_SURGERY, SurgeryStatusEnum.RECOVERY, SurgeryStatusEnum.COMPLETED)
+MAX_IMPROVEMENT_PASSES = 20
+
+
+def _minutes(hhmm: str) -> int:
+    t = time.fromisoformat(hhmm)
+    return t.hour * 60 + t.minute
+
+
+def _clock(minutes: float) -> str:
+    minutes = int(round(minutes))
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+class PlanCase(NamedTuple):
+    surgery: SurgeryRegistration
+    minutes: float
+    major: bool
+    candidates: tuple  # ((room, earliest start in minutes), ...)
+
+
+def _open_rooms(day: date) -> dict:
+    """Half-day -> rooms that are not CLOSED"""
+    schedule = or_rotation.schedule_for(day)
+    return {
+        half: {room for room, halves in schedule.items() if halves[half] and CLOSED not in halves[half]}
+        for half in (AM, PM)
+    }
+
+
+def _candidates(surgery: SurgeryRegistration, day: date, open_rooms: dict, day_start: int, pm_start: int) -> tuple:
+    am_room = or_rotation.room_for(surgery.surgeon, day, settings.OR_DAY_START)
+    pm_room = or_rotation.room_for(surgery.surgeon, day, settings.OR_PM_START)
+    candidates = []
+    if am_room in open_rooms[AM]:
+        candidates.append((am_room, day_start))
+    if pm_room in open_rooms[PM] and pm_room != am_room:
+        candidates.append((pm_room, pm_start))
+    if not candidates and surgery.or_room in open_rooms[AM] | open_rooms[PM]:
+        # Unknown surgeon: keep the room the scheduler chose
+        start = day_start if surgery.or_room in open_rooms[AM] else pm_start
+        candidates.append((surgery.or_room, start))
+    return tuple(candidates)
+
+
+def _room_order(case: PlanCase, room: str) -> tuple:
+    earliest = dict(case.candidates)[room]
+    scheduled = case.surgery.scheduled_time.strftime("%H:%M") if case.surgery.scheduled_time else "99:99"
+    return (earliest, not case.major, -case.minutes, scheduled, case.surgery.id)
+
+
+def _schedule_room(cases: list, room: str, start: float, turnover: float) -> list:
+    """Ordered (case, start, end) for one room"""
+    rows, cursor = [], start
+    for case in sorted(cases, key=lambda c: _room_order(c, room)):
+        begin = max(cursor, dict(case.candidates)[room])
+        end = begin + case.minutes
+        rows.append((case, begin, end))
+        cursor = end + turnover
+    return rows
+
+
+def _room_overtime(cases: list, room: str, start: float, turnover: float, block_end: float) -> float:
+    rows = _schedule_room(cases, room, start, turnover)
+    return max(0.0, rows[-1][2] - block_end) if rows else 0.0
+
+
+def plan_day(db: Session, day: date) -> dict:
+    started = timer.perf_counter()
+    day_start = _minutes(settings.OR_DAY_START)
+    pm_start = _minutes(settings.OR_PM_START)
+    block_end = _minutes(settings.OR_ELECTIVE_END)
+    turnover = settings.CASE_TURNOVER_MINUTES
+    open_rooms = _open_rooms(day)
+
+    surgeries = db.query(SurgeryRegistration).filter(
+        SurgeryRegistration.surgery_date == day,
+        SurgeryRegistration.surgery_type == SurgeryTypeEnum.ELECTIVE,
+        SurgeryRegistration.status.in_(PLANNED_STATUSES + FIXED_STATUSES),
+    ).all()
+    positions = queue_positions(SurgeryRegistration.surgery_date == day)
+    previous_order = dict(db.query(positions.c.id, positions.c.queue_order).all())
+
+    # Rooms already busy with started/finished cases start later
+    room_start = {room: float(day_start) for room in open_rooms[AM] | open_rooms[PM]}
+    fixed_cases = {room: 0 for room in room_start}
+    cases, unassigned = [], []
+    for surgery in surgeries:
+        expected = duration_stats.expected(stats_key(surgery.operation, surgery.surgeon, surgery.case_size, surgery.department))
+        if surgery.status in FIXED_STATUSES:
+            room = surgery.selected_or or surgery.or_room
+            if room in room_start:
+                if surgery.end_time is not None:
+                    busy_until = surgery.end_time.hour * 60 + surgery.end_time.minute
+                elif surgery.start_time is not None:
+                    busy_until = surgery.start_time.hour * 60 + surgery.start_time.minute + expected["minutes"]
+                else:
+                    busy_until = day_start + expected["minutes"]
+                room_start[room] = max(room_start[room], busy_until + turnover)
+                fixed_cases[room] += 1
+            continue
+        candidates = _candidates(surgery, day, open_rooms, day_start, pm_start)
+        if not candidates:
+            unassigned.append(surgery)
+            continue
+        case_size = getattr(surgery.case_size, "value", surgery.case_size)
+        cases.append(PlanCase(surgery, expected["minutes"], case_size != "Minor", candidates))
+
+    # Greedy LPT: most constrained and longest cases first, into the room finishing earliest
+    assignment: dict[int, str] = {}
+    by_room: dict[str, list] = {room: [] for room in room_start}
+    room_end = dict(room_start)
+    for case in sorted(cases, key=lambda c: (len(c.candidates), not c.major, -c.minutes, c.surgery.id)):
+        room = min(case.candidates, key=lambda rc: max(room_end[rc[0]], rc[1]) + case.minutes)[0]
+        assignment[case.surgery.id] = room
+        by_room[room].append(case)
+        room_end[room] = max(room_end[room], dict(case.candidates)[room]) + case.minutes + turnover
+
+    # Local search: move single cases between their candidate rooms while total overtime drops
+    overtime = {room: _room_overtime(by_room[room], room, room_start[room], turnover, block_end) for room in by_room}
+    for _ in range(MAX_IMPROVEMENT_PASSES):
+        improved = False
+        for case in cases:
+            if len(case.candidates) < 2:
+                continue
+            current = assignment[case.surgery.id]
+            for room, _earliest in case.candidates:
+                if room == current:
+                    continue
+                source = [c for c in by_room[current] if c is not case]
+                target = by_room[room] + [case]
+                source_ot = _room_overtime(source, current, room_start[current], turnover, block_end)
+                target_ot = _room_overtime(target, room, room_start[room], turnover, block_end)
+                if source_ot + target_ot < overtime[current] + overtime[room] - 1e-9:
+                    by_room[current], by_room[room] = source, target
+                    overtime[current], overtime[room] = source_ot, target_ot
+                    assignment[case.surgery.id] = current = room
+                    improved = True
+        if not improved:
+            break
+
+    rooms = []
+    for room in sorted(by_room):
+        rows = _schedule_room(by_room[room], room, room_start[room], turnover)
+        if not rows:
+            continue
+        rooms.append({
+            "room": room,
+            "overtime_minutes": round(overtime[room], 1),
+            "cases": [
+                {
+                    "id": case.surgery.id,
+                    "hn": case.surgery.hn,
+                    "patient_name": case.surgery.patient_name,
+                    "surgeon": case.surgery.surgeon,
+                    "case_size": getattr(case.surgery.case_size, "value", case.surgery.case_size),
+                    "expected_minutes": case.minutes,
+                    "or_room": room,
+                    "queue_order": position,
+                    "expected_start": _clock(begin),
+                    "expected_end": _clock(end),
+                    "previous_or_room": case.surgery.or_room,
+                    "previous_queue_order": previous_order.get(case.surgery.id),
+                    "version": case.surgery.version,
+                }
+                for position, (case, begin, end) in enumerate(rows, start=fixed_cases[room] + 1)
+            ],
+        })
+
+    return {
+        "date": day.isoformat(),
+        "rooms": rooms,
+        "total_overtime_minutes": round(sum(overtime.values()), 1),
+        "unassigned": [{"id": s.id, "hn": s.hn, "surgeon": s.surgeon} for s in unassigned],
+        "elapsed_ms": round((timer.perf_counter() - started) * 1000, 1),
+    }
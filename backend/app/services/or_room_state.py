@@ -0,0 +1,173 @@
+"""
+Live OR Room State
+
+Per-room model of today's surgeries (current case, queue by `queue_rank`,
+next case, idle since), built once from `surgery_registrations` and then kept
+up to date by the surgery write endpoints: each write publishes the changed
+case on the event bus and every worker applies it with a dict update.
+`/api/or-rooms/live` is answered from memory; the only query is the rebuild on
+the first request of a new day.
+"""
+import threading
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.surgery import SurgeryRegistration, SurgeryStatusEnum
+from app.services.event_bus import event_bus
+
+OR_ROOMS_TOPIC = "or_rooms"
+
+# Statuses that still wait in a room's queue (NOT_READY stays queued but is skipped for "next")
+QUEUED_STATUSES = {SurgeryStatusEnum.REGISTERED.value, SurgeryStatusEnum.WAITING.value, SurgeryStatusEnum.NOT_READY.value}
+NEXT_STATUSES = {SurgeryStatusEnum.REGISTERED.value, SurgeryStatusEnum.WAITING.value}
+
+
+def _value(v):
+    return getattr(v, "value", v)
+
+
+def case_payload(surgery: SurgeryRegistration) -> dict:
+    """JSON-safe view of a surgery as kept in the room state"""
+    return {
+        "id": surgery.id,
+        "hn": surgery.hn,
+        "patient_name": surgery.patient_name,
+        "age": surgery.age,
+        "surgery_date": surgery.surgery_date.isoformat() if surgery.surgery_date else None,
+        "scheduled_time": surgery.scheduled_time.strftime("%H:%M") if surgery.scheduled_time else None,
+        "surgery_type": _value(surgery.surgery_type),
+        "diagnosis": surgery.diagnosis,
+        "operation": surgery.operation,
+        "surgeon": surgery.surgeon,
+        "department": surgery.department,
+        "case_size": _value(surgery.case_size),
+        "room": surgery.selected_or or surgery.or_room or None,
+        "status": _value(surgery.status),
+        "not_ready_reason": surgery.not_ready_reason,
+        "queue_order": surgery.queue_order,
+        "queue_rank": surgery.queue_rank,
+        "start_time": surgery.start_time.strftime("%H:%M") if surgery.start_time else None,
+        "end_time": surgery.end_time.strftime("%H:%M") if surgery.end_time else None,
+    }
+
+
+def _queue_key(case: dict):
+    return (
+        case["queue_rank"] is None, case["queue_rank"] or 0,
+        case["queue_order"] is None, case["queue_order"] or 0,
+        case["scheduled_time"] or "99:99", case["id"],
+    )
+
+
+class ORRoomState:
+    def __init__(self):
+        self.day: Optional[date] = None
+        self._cases: dict[int, dict] = {}             # surgery id -> case
+        self._rooms: dict[str, dict[int, dict]] = {}  # room -> {surgery id -> case}
+        self._current: dict[str, Optional[int]] = {}  # room -> id of the case in surgery
+        self._idle_since: dict[str, Optional[str]] = {}
+        self._lock = threading.RLock()
+
+    def load(self, db: Session, day: Optional[date] = None):
+        """Rebuild the state for `day` (default today) from the database"""
+        day = day or date.today()
+        surgeries = db.query(SurgeryRegistration).filter(SurgeryRegistration.surgery_date == day).all()
+        with self._lock:
+            self.day = day
+            self._cases.clear()
+            self._rooms.clear()
+            self._current.clear()
+            self._idle_since.clear()
+            for surgery in surgeries:
+                self._upsert(case_payload(surgery), now=None)
+            # Idle since: the latest end time of the room's finished cases
+            for room, cases in self._rooms.items():
+                if self._current.get(room) is None:
+                    ends = [c["end_time"] for c in cases.values() if c["end_time"] and c["status"] not in QUEUED_STATUSES]
+                    self._idle_since[room] = f"{day.isoformat()}T{max(ends)}:00" if ends else None
+
+    def ensure_today(self):
+        if self.day != date.today():
+            db = SessionLocal()
+            try:
+                self.load(db)
+            finally:
+                db.close()
+
+    # --- updates (O(1) per case) ---
+
+    def publish_upsert(self, surgery: SurgeryRegistration):
+        event_bus.publish(OR_ROOMS_TOPIC, {"op": "upsert", "case": case_payload(surgery)})
+
+    def publish_delete(self, surgery_id: int, hn: Optional[str] = None):
+        event_bus.publish(OR_ROOMS_TOPIC, {"op": "delete", "id": surgery_id, "hn": hn})
+
+    def publish_reset(self):
+        event_bus.publish(OR_ROOMS_TOPIC, {"op": "reset"})
+
+    def apply(self, event: dict):
+        with self._lock:
+            if self.day is None:
+                return  # not built yet; the first read loads everything
+            op = event["op"]
+            now = datetime.now().isoformat(timespec="seconds")
+            if op == "reset":
+                self.day = None
+            elif op == "delete":
+                self._remove(event["id"], now)
+            elif event["case"]["surgery_date"] == self.day.isoformat():
+                self._upsert(event["case"], now)
+            else:
+                self._remove(event["case"]["id"], now)  # moved to another day
+
+    def _upsert(self, case: dict, now: Optional[str]):
+        self._remove(case["id"], now)
+        room = case["room"]
+        self._cases[case["id"]] = case
+        if room is None:
+            return
+        self._rooms.setdefault(room, {})[case["id"]] = case
+        if case["status"] == SurgeryStatusEnum.IN_SURGERY.value:
+            self._current[room] = case["id"]
+            self._idle_since[room] = None
+
+    def _remove(self, surgery_id: int, now: Optional[str]):
+        case = self._cases.pop(surgery_id, None)
+        if case is None or case["room"] is None:
+            return
+        room = case["room"]
+        self._rooms.get(room, {}).pop(surgery_id, None)
+        if self._current.get(room) == surgery_id:
+            self._current[room] = None
+            self._idle_since[room] = now
+
+    # --- reads ---
+
+    def room_view(self, room: str) -> dict:
+        current_id = self._current.get(room)
+        # queue_order: position in the room's day, as the list endpoints number it (not the stored value)
+        cases = {
+            c["id"]: {**c, "queue_order": position}
+            for position, c in enumerate(sorted(self._rooms.get(room, {}).values(), key=_queue_key), start=1)
+        }
+        queue = [c for c in cases.values() if c["status"] in QUEUED_STATUSES]
+        return {
+            "room": room,
+            "current": cases.get(current_id) if current_id is not None else None,
+            "next": next((c for c in queue if c["status"] in NEXT_STATUSES), None),
+            "queue": queue,
+            "idle_since": self._idle_since.get(room),
+        }
+
+    def live(self, room: Optional[str] = None) -> dict:
+        self.ensure_today()
+        with self._lock:
+            rooms = [room] if room else sorted(self._rooms)
+            return {"date": self.day.isoformat(), "rooms": [self.room_view(r) for r in rooms]}
+
+
+or_room_state = ORRoomState()
+event_bus.subscribe(OR_ROOMS_TOPIC, or_room_state.apply)
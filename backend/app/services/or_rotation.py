@@ -0,0 +1,259 @@
+"""
+OR / Doctor Rotation
+
+Backend copy of the weekly doctor-to-OR plan from frontend/src/lib/or-schedule.ts
+(week-of-month rules, AM/PM splits, department groups such as OBGYN_ANY, CLOSED rooms),
+compiled per date into lookup tables:
+
+- (date, half-day)          -> {room: [doctors]}
+- (date, half-day, doctor)  -> room   (the doctor's own room)
+- (date, half-day, dept)    -> room   (fallback: first room owned by the same department)
+
+Dates in the rolling horizon (OR_ROTATION_HORIZON_DAYS) are compiled at startup;
+other dates are compiled on first use. Free-text surgeon names are resolved to a
+known doctor once (exact, then the frontend's fuzzy rule) and cached, so
+`room_for()` is a few dict lookups per row.
+Keep the plan in sync with or-schedule.ts.
+"""
+import threading
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional, Union
+
+from app.config import settings
+
+CLOSED = "CLOSED"
+AM, PM = "AM", "PM"
+
+
+class DoctorSchedule(NamedTuple):
+    doctor: Union[str, tuple]
+    when: str  # 'ALLDAY' | 'AM' | 'PM'
+    weeks: tuple
+
+
+def _s(doctor, when, weeks=(1, 2, 3, 4)) -> DoctorSchedule:
+    return DoctorSchedule(doctor, when, tuple(weeks))
+
+
+# Monday=0 ... Friday=4
+WEEKLY_DOCTOR_OR_PLAN: dict[int, dict[str, list[DoctorSchedule]]] = {
+    0: {  # Monday
+        "OR1": [_s("นพ.สุริยา คุณาชน", "ALLDAY", [1]), _s("พญ.รัฐพร ตั้งเพียร", "ALLDAY", [2]), _s("นพ.พิชัย สุวัฒนพูนลาภ", "ALLDAY", [3]), _s("นพ.ธนวัฒน์ พันธุ์พรหม", "ALLDAY", [4])],
+        "OR2": [_s("นพ.ณัฐพงศ์ ศรีโพนทอง", "ALLDAY")],
+        "OR3": [_s("พญ.พิรุณยา แสนวันดี", "ALLDAY")],
+        "OR5": [_s("OBGYN_ANY", "ALLDAY")],
+        "OR6": [_s("OBGYN_ANY", "ALLDAY")],
+        "OR8": [_s("พญ.สีชมพู ตั้งสัตยาธิษฐาน", "ALLDAY")],
+    },
+    1: {  # Tuesday
+        "OR1": [_s("พญ.สายฝน บรรณจิตร์", "ALLDAY")],
+        "OR2": [_s("นพ.ชัชพล องค์โฆษิต", "ALLDAY")],
+        "OR3": [_s("พญ.สุภาภรณ์ พิณพาทย์", "AM"), _s("ทพญ.อรุณนภา คิสารัง", "PM")],
+        "OR5": [_s("OBGYN_ANY", "ALLDAY")],
+        "OR6": [_s("นพ.พิชัย สุวัฒนพูนลาภ", "ALLDAY")],
+        "OR8": [_s("พญ.สาวิตรี ถนอมวงศ์ไทย", "ALLDAY")],
+    },
+    2: {  # Wednesday
+        "OR1": [_s("นพ.สุริยา คุณาชน", "ALLDAY")],
+        "OR2": [_s("นพ.วิษณุ ผูกพันธ์", "ALLDAY")],
+        "OR3": [_s(CLOSED, "ALLDAY")],
+        "OR5": [_s("OBGYN_ANY", "ALLDAY")],
+        "OR6": [_s("พญ.รัฐพร ตั้งเพียร", "ALLDAY")],
+        "OR8": [_s("พญ.นันท์นภัส ชีวะเกรียงไกร", "ALLDAY")],
+    },
+    3: {  # Thursday
+        "OR1": [_s("พญ.สายฝน บรรณจิตร์", "AM"), _s("นพ.ชัชพล องค์โฆษิต", "PM", [1, 3]), _s(("นพ.ณัฐพงศ์ ศรีโพนทอง", "นพ.วิษณุ ผูกพันธ์"), "PM", [2, 4])],
+        "OR2": [_s("นพ.อำนาจ อนันต์วัฒนกุล", "ALLDAY")],
+        "OR3": [_s("นพ.วรวิช พลเวียงธรรม", "AM"), _s("ทพ.ฉลองรัฐ เดชา", "PM")],
+        "OR5": [_s("OBGYN_ANY", "ALLDAY")],
+        "OR6": [_s("นพ.ธนวัฒน์ พันธุ์พรหม", "ALLDAY")],
+        "OR8": [_s("พญ.ดวิษา อังศรีประเสริฐ", "ALLDAY")],
+    },
+    4: {  # Friday
+        "OR1": [_s("พญ.สุภาภรณ์ พิณพาทย์", "ALLDAY")],
+        "OR2": [_s("นพ.กฤษฎา อิ้งอำพร", "ALLDAY")],
+        "OR3": [_s("พญ.สุทธิพร หมวดไธสง", "ALLDAY")],
+        "OR5": [_s("OBGYN_ANY", "ALLDAY")],
+        "OR6": [_s(CLOSED, "ALLDAY")],
+        "OR8": [_s("นพ.สราวุธ สารีย์", "ALLDAY")],
+    },
+}
+
+# แพทย์ผ่าตัด แยกตามแผนก
+SURGEONS: dict[str, list[str]] = {
+    "Surgery": ["นพ.สุริยา คุณาชน", "นพ.ธนวัฒน์ พันธุ์พรหม", "พญ.สุภาภรณ์ พิณพาทย์", "พญ.รัฐพร ตั้งเพียร", "นพ.พิชัย สุวัฒนพูนลาภ"],
+    "Orthopedics": ["นพ.ชัชพล องค์โฆษิต", "นพ.ณัฐพงศ์ ศรีโพนทอง", "นพ.อำนาจ อนันต์วัฒนกุล", "นพ.อภิชาติ ลักษณะ", "นพ.กฤษฎา อิ้งอำพร", "นพ.วิษณุ ผูกพันธ์"],
+    "Urology": ["พญ.สายฝน บรรณจิตร์"],
+    "ENT": ["พญ.พิรุณยา แสนวันดี", "พญ.สุทธิพร หมวดไธสง", "นพ.วรวิช พลเวียงธรรม"],
+    "OBGYN": ["นพ.สุรจิตต์ นิมิตรวงษ์สกุล", "พญ.ขวัญตา ทุนประเทือง", "พญ.วัชราภรณ์ อนวัชชกุล", "พญ.รุ่งฤดี โขมพัตร", "พญ.ฐิติมน ชัยชนะทรัพย์"],
+    "Ophthalmology": ["นพ.สราวุธ สารีย์", "พญ.ดวิษา อังศรีประเสริฐ", "พญ.สาวิตรี ถนอมวงศ์ไทย", "พญ.สีชมพู ตั้งสัตยาธิษฐาน", "พญ.นันท์นภัส ชีวะเกรียงไกร"],
+    "Maxillofacial": ["ทพ.ฉลองรัฐ เดชา", "ทพญ.อรุณนภา คิสารัง"],
+}
+
+DOCTOR_GROUPS: dict[str, list[str]] = {
+    "SUR_ANY": SURGEONS["Surgery"],
+    "ORTHO_ANY": SURGEONS["Orthopedics"],
+    "URO_ANY": SURGEONS["Urology"],
+    "ENT_ANY": SURGEONS["ENT"],
+    "OBGYN_ANY": SURGEONS["OBGYN"],
+    "EYE_ANY": SURGEONS["Ophthalmology"],
+    "MAXILO_ANY": SURGEONS["Maxillofacial"],
+}
+
+KNOWN_DOCTORS = list(dict.fromkeys(
+    [doctor for doctors in SURGEONS.values() for doctor in doctors]
+    + [
+        doctor
+        for rooms in WEEKLY_DOCTOR_OR_PLAN.values()
+        for schedules in rooms.values()
+        for schedule in schedules
+        for doctor in ((schedule.doctor,) if isinstance(schedule.doctor, str) else schedule.doctor)
+        if doctor != CLOSED and not doctor.endswith("_ANY")
+    ]
+))
+
+
+def room_name(or_code: str) -> str:
+    return f"ห้องผ่าตัด {or_code.replace('OR', '')}"
+
+
+def week_of_month(day: date) -> int:
+    """Same rule as getWeekOfMonth() in or-schedule.ts (weeks start on Sunday)"""
+    first_weekday = (day.replace(day=1).weekday() + 1) % 7  # Sunday=0
+    return -(-(day.day + first_weekday) // 7)
+
+
+def half_day(scheduled_time: Optional[str]) -> str:
+    if not scheduled_time:
+        return AM
+    return PM if int(str(scheduled_time).split(":")[0]) >= 12 else AM
+
+
+def normalize_name(name: str) -> str:
+    name = "".join(name.split()).lower()
+    if name.endswith("ทัย"):
+        name = name[:-3] + "ไทย"  # common typo
+    if name.endswith("ศักดิ์"):
+        name = name[:-1]
+    return name
+
+
+def _fuzzy_match(a: str, b: str) -> bool:
+    """Normalized names equal, or the first 80% of characters match (typos at the end)"""
+    if a == b:
+        return True
+    check_len = int(min(len(a), len(b)) * 0.8)
+    return check_len > 5 and a[:check_len] == b[:check_len]
+
+
+_NORMALIZED_DOCTORS = {normalize_name(doctor): doctor for doctor in KNOWN_DOCTORS}
+
+
+@lru_cache(maxsize=4096)
+def resolve_doctor(surgeon: str) -> Optional[str]:
+    """Known doctor name for a free-text surgeon name (None if unknown)"""
+    if not surgeon:
+        return None
+    normalized = normalize_name(surgeon)
+    if normalized in _NORMALIZED_DOCTORS:
+        return _NORMALIZED_DOCTORS[normalized]
+    for candidate, doctor in _NORMALIZED_DOCTORS.items():
+        if _fuzzy_match(normalized, candidate):
+            return doctor
+    return None
+
+
+DOCTOR_DEPARTMENT = {}
+for _dept, _doctors in SURGEONS.items():
+    for _doctor in _doctors:
+        DOCTOR_DEPARTMENT.setdefault(_doctor, _dept)
+
+
+def _expand(doctor_entry) -> list[str]:
+    entries = (doctor_entry,) if isinstance(doctor_entry, str) else doctor_entry
+    doctors = []
+    for entry in entries:
+        doctors.extend(DOCTOR_GROUPS.get(entry, [entry]) if entry.endswith("_ANY") else [entry])
+    return doctors
+
+
+class DaySlots(NamedTuple):
+    rooms: dict     # room -> [plan entries as written, e.g. "OBGYN_ANY", "CLOSED"]
+    owners: dict    # doctor -> room
+    departments: dict  # department -> room
+
+
+def compile_day(day: date) -> dict[str, DaySlots]:
+    """Half-day -> lookup tables for one date (empty on weekends)"""
+    weekday = day.weekday()
+    plan = WEEKLY_DOCTOR_OR_PLAN.get(weekday, {})
+    week = week_of_month(day)
+    slots = {}
+    for half in (AM, PM):
+        rooms, owners, departments = {}, {}, {}
+        for or_code, schedules in plan.items():
+            room = room_name(or_code)
+            for schedule in schedules:
+                if week not in schedule.weeks or schedule.when not in ("ALLDAY", half):
+                    continue
+                entries = (schedule.doctor,) if isinstance(schedule.doctor, str) else schedule.doctor
+                rooms.setdefault(room, []).extend(entries)
+                for doctor in _expand(schedule.doctor):
+                    if doctor == CLOSED:
+                        continue
+                    owners.setdefault(doctor, room)
+                    dept = DOCTOR_DEPARTMENT.get(doctor)
+                    if dept is not None:
+                        departments.setdefault(dept, room)
+        slots[half] = DaySlots(rooms, owners, departments)
+    return slots
+
+
+class RotationIndex:
+    def __init__(self, horizon_days: int):
+        self.horizon_days = horizon_days
+        self._days: dict[date, dict[str, DaySlots]] = {}
+        self._lock = threading.Lock()
+
+    def build(self, start: Optional[date] = None) -> int:
+        """Compile the rolling horizon (a week back to horizon_days ahead)"""
+        start = (start or date.today()) - timedelta(days=7)
+        days = {start + timedelta(days=i): None for i in range(self.horizon_days + 8)}
+        compiled = {day: compile_day(day) for day in days}
+        with self._lock:
+            self._days = compiled
+        return len(compiled)
+
+    def day(self, day: date) -> dict[str, DaySlots]:
+        slots = self._days.get(day)
+        if slots is None:
+            slots = compile_day(day)
+            with self._lock:
+                if len(self._days) > 4 * (self.horizon_days + 8):
+                    self._days.clear()
+                self._days[day] = slots
+        return slots
+
+    def room_for(self, surgeon: Optional[str], day: Optional[date], scheduled_time: Optional[str] = None) -> Optional[str]:
+        """OR room for a surgeon on a date/half-day: their own room, else a room of their department"""
+        doctor = resolve_doctor(surgeon or "")
+        if doctor is None or day is None:
+            return None
+        slots = self.day(day)[half_day(scheduled_time)]
+        room = slots.owners.get(doctor)
+        if room is None:
+            room = slots.departments.get(DOCTOR_DEPARTMENT.get(doctor))
+        return room
+
+    def schedule_for(self, day: date) -> dict:
+        """Rooms with their AM/PM doctors (plan entries as written) for display"""
+        slots = self.day(day)
+        rooms = {}
+        for half in (AM, PM):
+            for room, doctors in slots[half].rooms.items():
+                rooms.setdefault(room, {AM: [], PM: []})[half] = doctors
+        return rooms
+
+
+or_rotation = RotationIndex(settings.OR_ROTATION_HORIZON_DAYS)
@@ -0,0 +1,241 @@
+"""
+SQL Query Profiler
+
+Hooks SQLAlchemy engine events to record every statement executed during a
+request (count, total time, duplicates), flags N+1 style patterns and writes
+slow queries with their EXPLAIN plan to a rotating log file (string parameters
+masked and URLs reduced to their route template).
+Can be switched on/off at runtime without restarting the server.
+"""
+import logging
+import os
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.services.trace_recorder import UNMATCHED_ROUTE
+
+# Statements that repeat at least this many times in one request are flagged
+DUPLICATE_THRESHOLD = 3
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("query_profile", default=None)
+
+# Bound values written to the slow-query log as-is; anything else (HN, names,
+# diagnoses, notes) is replaced by its type, as in the request trace
+LOGGED_PARAM_TYPES = (bool, int, float, Decimal, date, datetime, time_of_day)
+
+logger = logging.getLogger("surgitrack.profiler")
+
+_TABLE_RE = re.compile(r"\b(?:FROM|UPDATE|INTO)\s+[`\"]?(\w+)", re.IGNORECASE)
+
+
+def _statement_table(statement: str) -> Optional[str]:
+    match = _TABLE_RE.search(statement)
+    return match.group(1) if match else None
+
+
+def _statement_verb(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+
+
+def _masked_value(value):
+    if value is None or isinstance(value, LOGGED_PARAM_TYPES):
+        return value
+    return f"<{type(value).__name__}>"
+
+
+def masked_params(parameters, executemany: bool = False):
+    """Bound parameters with every string masked; an executemany batch is reduced to its size and first row"""
+    if executemany:
+        rows = list(parameters)
+        return [f"<rows:{len(rows)}>", masked_params(rows[0]) if rows else None]
+    if isinstance(parameters, dict):
+        return {key: _masked_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return tuple(_masked_value(value) for value in parameters)
+    return _masked_value(parameters)
+
+
+class RequestProfile:
+    """Statements recorded for a single HTTP request"""
+
+    def __init__(self, method: str, scope: dict):
+        self.method = method
+        self._scope = scope
+        self.queries: list[tuple[str, float]] = []  # (statement, elapsed ms)
+        self.header_query_count: Optional[int] = None  # queries done when the response headers went out
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.queries.append((statement, elapsed_ms))
+
+    @property
+    def path(self) -> str:
+        """Route template (an HN in the URL never reaches the logs)"""
+        route = self._scope.get("route")
+        return route.path if route is not None else UNMATCHED_ROUTE
+
+    @property
+    def total_ms(self) -> float:
+        return sum(ms for _, ms in self.queries)
+
+    def duplicates(self) -> dict[str, int]:
+        counts = Counter(stmt for stmt, _ in self.queries)
+        return {stmt: n for stmt, n in counts.items() if n > 1}
+
+    def warnings(self) -> list[str]:
+        """Detect N+1 patterns (repeated statements, re-SELECT after UPDATE)"""
+        found = []
+        for stmt, n in self.duplicates().items():
+            if n >= DUPLICATE_THRESHOLD:
+                found.append(f"N+1: statement executed {n} times: {stmt[:120]}")
+
+        # SELECT -> UPDATE -> re-SELECT on the same table (e.g. commit + refresh())
+        selected, updated = set(), set()
+        flagged = set()
+        for stmt, _ in self.queries:
+            verb, table = _statement_verb(stmt), _statement_table(stmt)
+            if table is None:
+                continue
+            if verb == "SELECT":
+                if table in updated and table in selected and table not in flagged:
+                    found.append(f"re-SELECT after UPDATE on '{table}' (consider returning the updated row)")
+                    flagged.add(table)
+                selected.add(table)
+            elif verb == "UPDATE":
+                updated.add(table)
+        return found
+
+    def summary(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "query_count": len(self.queries),
+            # Queries run while a streamed body was sent (not included in X-Query-Count)
+            "body_query_count": 0 if self.header_query_count is None else len(self.queries) - self.header_query_count,
+            "total_ms": round(self.total_ms, 2),
+            "duplicates": self.duplicates(),
+            "warnings": self.warnings(),
+        }
+
+
+class QueryProfiler:
+    """Engine-level profiler; `enabled` and `slow_threshold_ms` can be changed at any time"""
+
+    def __init__(self, enabled: bool, slow_threshold_ms: float, log_path: str, history_size: int = 100):
+        self.enabled = enabled
+        self.slow_threshold_ms = slow_threshold_ms
+        self.log_path = log_path
+        self.recent: deque = deque(maxlen=history_size)
+        self._slow_logger: Optional[logging.Logger] = None
+
+    # ----- request scope -----
+    def start_request(self, method: str, scope: dict):
+        if not self.enabled:
+            return None
+        return _current_profile.set(RequestProfile(method, scope))
+
+    def finish_request(self, token) -> Optional[RequestProfile]:
+        """Detach the profile from the middleware's context; the route keeps recording into it
+        until `complete()` (a streamed body runs its queries after the headers are sent)"""
+        if token is None:
+            return None
+        profile = _current_profile.get()
+        _current_profile.reset(token)
+        return profile
+
+    def complete(self, profile: RequestProfile):
+        summary = profile.summary()
+        self.recent.append(summary)
+        for warning in summary["warnings"]:
+            logger.warning("%s %s: %s", profile.method, profile.path, warning)
+
+    async def profile_body(self, profile: RequestProfile, body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Wrap a response body iterator so the profile is completed once the last chunk is sent"""
+        profile.header_query_count = len(profile.queries)
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            self.complete(profile)
+
+    # ----- engine events -----
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled:
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(statement, elapsed_ms)
+
+        if elapsed_ms >= self.slow_threshold_ms:
+            self._log_slow_query(conn, cursor, statement, parameters, elapsed_ms, executemany)
+
+    # ----- slow query log -----
+    def _get_slow_logger(self) -> logging.Logger:
+        if self._slow_logger is None:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            logger = logging.getLogger("surgitrack.slow_queries")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(self.log_path, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            self._slow_logger = logger
+        return self._slow_logger
+
+    def _explain(self, conn, cursor, statement, parameters) -> str:
+        """Run EXPLAIN for the statement on the same DBAPI connection"""
+        if _statement_verb(statement) not in ("SELECT", "UPDATE", "DELETE"):
+            return "(no plan)"
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            explain_cursor = cursor.connection.cursor()
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                return "\n".join(str(row) for row in explain_cursor.fetchall())
+            finally:
+                explain_cursor.close()
+        except Exception as e:
+            return f"(EXPLAIN failed: {e})"
+
+    def _log_slow_query(self, conn, cursor, statement, parameters, elapsed_ms, executemany):
+        plan = "(executemany)" if executemany else self._explain(conn, cursor, statement, parameters)
+        profile = _current_profile.get()
+        where = f"{profile.method} {profile.path}" if profile else "-"
+        self._get_slow_logger().info(
+            f"[{elapsed_ms:.1f} ms] {where}\n{statement}\nparams={masked_params(parameters, executemany)!r}\nplan:\n{plan}\n"
+        )
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "log_path": self.log_path,
+        }
+
+
+query_profiler = QueryProfiler(
+    enabled=settings.QUERY_PROFILER_ENABLED,
+    slow_threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    log_path=settings.SLOW_QUERY_LOG_PATH,
+)
@@ -0,0 +1,163 @@
+"""
+Gap-based Queue Ranks
+
+`queue_rank` orders a room's queue with large gaps between neighbours, so
+moving a case ("after X" / "before Y") only writes the moved row: its new rank
+is the midpoint of its new neighbours. `queue_order` (the position number
+clients already send and show) maps onto the same scale, queue_order *
+RANK_GAP, when a client sets it; responses never show the stored value but
+the case's position in its room's queue that day, numbered by the database
+(`queue_positions`), or in memory by the live room state.
+
+Repeated inserts at the same spot halve the gap each time; once it drops
+under MIN_GAP the room is renumbered in the background, order unchanged. If
+there is no integer left between two neighbours (or the room still has
+cases without a rank) the move renumbers the room first, in the same
+transaction. A renumber writes every row of the room: each gets a version
+bump and an 'updated' event like any other write.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.surgery import SurgeryRegistration
+from app.services import surgery_events
+from app.services.or_room_state import or_room_state
+from app.services.version_store import version_store
+
+RANK_GAP = 1 << 20
+MIN_GAP = 16
+
+# Effective room of a case, as shown on the board (emergency cases use selected_or)
+room_column = func.coalesce(func.nullif(SurgeryRegistration.selected_or, ""), SurgeryRegistration.or_room)
+
+# Queue order of a room: rank, then legacy queue_order, scheduled time, id (same as queue_key)
+QUEUE_ORDER_BY = (
+    SurgeryRegistration.queue_rank.is_(None), SurgeryRegistration.queue_rank,
+    SurgeryRegistration.queue_order.is_(None), SurgeryRegistration.queue_order,
+    SurgeryRegistration.scheduled_time.is_(None), SurgeryRegistration.scheduled_time,
+    SurgeryRegistration.id,
+)
+
+
+def rank_for_order(queue_order: Optional[int]) -> Optional[int]:
+    return queue_order * RANK_GAP if queue_order is not None else None
+
+
+def rank_between(before: Optional[int], after: Optional[int]) -> Optional[int]:
+    """Rank strictly between two neighbours (None = open end); None if there is no room left"""
+    if before is None and after is None:
+        return RANK_GAP
+    if before is None:
+        return after - RANK_GAP
+    if after is None:
+        return before + RANK_GAP
+    if after - before < 2:
+        return None
+    return (before + after) // 2
+
+
+def queue_key(surgery: SurgeryRegistration) -> tuple:
+    """Queue order of a room: rank, then legacy queue_order, scheduled time, id"""
+    scheduled = surgery.scheduled_time.strftime("%H:%M") if surgery.scheduled_time else "99:99"
+    return (
+        surgery.queue_rank is None, surgery.queue_rank or 0,
+        surgery.queue_order is None, surgery.queue_order or 0,
+        scheduled, surgery.id,
+    )
+
+
+def queue_positions(*criteria):
+    """
+    Subquery (id, queue_order): each case's position in its room's queue on its
+    date, for every date that has a case matching `criteria` (so a filtered list
+    still shows the board's numbers). Cases without a room get None.
+    """
+    dates = select(SurgeryRegistration.surgery_date).where(*criteria)
+    position = func.row_number().over(
+        partition_by=(SurgeryRegistration.surgery_date, room_column), order_by=QUEUE_ORDER_BY
+    )
+    return select(
+        SurgeryRegistration.id,
+        case((room_column.is_(None), None), else_=position).label("queue_order"),
+    ).where(SurgeryRegistration.surgery_date.in_(dates)).subquery()
+
+
+def positions_of(db: Session, surgery_ids: list) -> dict:
+    """{surgery id: queue position} for a few cases (one query)"""
+    positions = queue_positions(SurgeryRegistration.id.in_(surgery_ids))
+    return dict(db.query(positions.c.id, positions.c.queue_order).filter(positions.c.id.in_(surgery_ids)).all())
+
+
+def room_cases(db: Session, day: date, room: str, lock: bool = False) -> list:
+    query = db.query(SurgeryRegistration).filter(SurgeryRegistration.surgery_date == day, room_column == room)
+    if lock:
+        query = query.with_for_update()
+    return sorted(query.all(), key=queue_key)
+
+
+def neighbour_rank(db: Session, day: date, room: str, rank: int, below: bool, exclude_id: int) -> Optional[int]:
+    """Closest rank above (or below) `rank` in the room, ignoring the case being moved"""
+    column = SurgeryRegistration.queue_rank
+    return db.query(func.max(column) if below else func.min(column)).filter(
+        SurgeryRegistration.surgery_date == day,
+        room_column == room,
+        SurgeryRegistration.id != exclude_id,
+        column < rank if below else column > rank,
+    ).scalar()
+
+
+def has_unranked(db: Session, day: date, room: str, exclude_id: int) -> bool:
+    """Cases without a rank sort after every ranked case, so "end of room" is not max(rank)"""
+    return db.query(SurgeryRegistration.id).filter(
+        SurgeryRegistration.surgery_date == day,
+        room_column == room,
+        SurgeryRegistration.id != exclude_id,
+        SurgeryRegistration.queue_rank.is_(None),
+    ).first() is not None
+
+
+def rebalance(db: Session, day: date, room: str, exclude_id: Optional[int] = None) -> list:
+    """
+    Renumber a room's queue RANK_GAP apart in its current order (caller commits);
+    returns the changed cases. `exclude_id` is a case about to get a rank of its own.
+    """
+    cases = [c for c in room_cases(db, day, room, lock=True) if c.id != exclude_id]
+    changed = []
+    for position, surgery in enumerate(cases, start=1):
+        rank = position * RANK_GAP
+        if surgery.queue_rank == rank:
+            continue
+        before = surgery_events.capture(surgery)
+        surgery.queue_rank = rank
+        surgery.version = surgery.version + 1  # rows are locked: no concurrent bump to lose
+        surgery_events.record_updated(db, surgery, before)
+        changed.append(surgery)
+    db.flush()
+    return changed
+
+
+def rebalance_room(day: date, room: str):
+    """Background task: renumber a room whose gaps became too small"""
+    db = SessionLocal()
+    try:
+        changed = rebalance(db, day, room)
+        if not changed:
+            db.rollback()
+            return
+        version_store.bump(db, SurgeryRegistration.__tablename__, day)
+        for surgery in changed:
+            db.expunge(surgery)  # the new values are already on it; no refresh after commit
+        db.commit()
+        surgery_events.surgery_projections.notify()
+        for surgery in changed:
+            or_room_state.publish_upsert(surgery)
+        print(f"[INFO] Queue ranks rebalanced: {room} {day} ({len(changed)} case(s))")
+    except Exception as e:
+        db.rollback()
+        print(f"[ERROR] Queue rank rebalance {room} {day}: {e}")
+    finally:
+        db.close()
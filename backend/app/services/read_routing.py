@@ -0,0 +1,58 @@
+"""
+Read/Write Routing
+
+Decides whether a read-only request may use the replica:
+- a client that just wrote (PATCH/POST/PUT/DELETE) is pinned to the primary for
+  READ_YOUR_WRITES_SECONDS, so e.g. `update_surgery` followed by a board refresh
+  never shows stale data;
+- for REPLICA_LAG_SECONDS after any write, every read uses the primary, so a
+  version-counter ETag is never attached to a snapshot built from a lagging replica.
+Pins are shared with the other workers over the event bus.
+"""
+import threading
+import time
+
+from fastapi import Request
+
+from app.config import settings
+from app.services.event_bus import event_bus
+from app.services.version_store import version_store
+
+PINS_TOPIC = "read_pins"
+
+
+def client_key(request: Request) -> str:
+    """Identify a client: explicit X-Client-Id header, else IP + user agent"""
+    explicit = request.headers.get("x-client-id")
+    if explicit:
+        return explicit
+    host = request.client.host if request.client else "unknown"
+    return f"{host}|{request.headers.get('user-agent', '')}"
+
+
+class ReadRouter:
+    def __init__(self, pin_seconds: float, lag_seconds: float):
+        self.pin_seconds = pin_seconds
+        self.lag_seconds = lag_seconds
+        self._pins: dict[str, float] = {}  # client key -> wall-clock expiry
+        self._lock = threading.Lock()
+
+    def pin(self, key: str):
+        event_bus.publish(PINS_TOPIC, {"client": key, "until": time.time() + self.pin_seconds})
+
+    def apply_pin(self, event: dict):
+        now = time.time()
+        with self._lock:
+            self._pins[event["client"]] = event["until"]
+            if len(self._pins) > 1000:
+                self._pins = {k: until for k, until in self._pins.items() if until > now}
+
+    def use_primary(self, key: str) -> bool:
+        if time.monotonic() - version_store.last_write < self.lag_seconds:
+            return True
+        until = self._pins.get(key)
+        return until is not None and until > time.time()
+
+
+read_router = ReadRouter(settings.READ_YOUR_WRITES_SECONDS, settings.REPLICA_LAG_SECONDS)
+event_bus.subscribe(PINS_TOPIC, read_router.apply_pin)
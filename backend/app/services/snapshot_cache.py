@@ -0,0 +1,198 @@
+"""
+Snapshot Cache
+
+In-memory cache of serialized JSON snapshots (board, TV display, month
+calendar) together with their ETag and lazily compressed variants, so repeated
+hits skip the query, the serialization and the compression.
+Entries are grouped by namespace ("surgery", "patients", "work_schedule").
+When the caller passes the version-counter ETag (see version_store) an entry is
+only reused while that ETag is unchanged; a TTL guards against writes that
+bypass the API.
+
+Refreshes are coalesced: concurrent misses on the same key share one query.
+If the refresh fails or is slower than SNAPSHOT_REFRESH_WAIT_SECONDS (database
+stalled or down), the last good snapshot is served with an X-Snapshot-Stale
+header while the refresh keeps running in the background.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import read_sessionmaker
+from app.utils.compression import choose_encoding, compress
+from app.utils.fast_json import dumps
+
+
+class Snapshot:
+    """Serialized body plus its ETag and compressed variants"""
+
+    def __init__(self, body: bytes, etag: Optional[str] = None):
+        self.body = body
+        self.etag = etag or '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.created = time.monotonic()
+        self.saved_at = time.time()
+        self.encoded: dict[str, bytes] = {}
+
+    def body_for(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        data = self.encoded.get(encoding)
+        if data is None:
+            data = compress(self.body, encoding)
+            self.encoded[encoding] = data
+        return data
+
+
+class SnapshotCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self.on_put: Optional[Callable[[str, Hashable], None]] = None
+
+    def get(self, namespace: str, key: Hashable, etag: Optional[str] = None) -> Optional[Snapshot]:
+        """Fresh snapshot, or None (outdated entries are kept as last-good copies)"""
+        with self._lock:
+            snapshot = self._entries.get((namespace, key))
+            if snapshot is None:
+                return None
+            if (etag is not None and snapshot.etag != etag) or time.monotonic() - snapshot.created > self.ttl_seconds:
+                return None
+            self._entries.move_to_end((namespace, key))
+            return snapshot
+
+    def put_warm(self, namespace: str, key: Hashable, body: bytes, saved_at: float, etag: Optional[str]) -> Snapshot:
+        """
+        Insert an already serialized snapshot read from the warm snapshot file, with the
+        version ETag it was built under: it is fresh only while the shared version counters
+        still give that ETag (without one it gets a content hash and is only served stale)
+        """
+        snapshot = Snapshot(body, etag)
+        snapshot.created = time.monotonic() - max(0.0, time.time() - saved_at)
+        snapshot.saved_at = saved_at
+        with self._lock:
+            self._entries[(namespace, key)] = snapshot
+        return snapshot
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._entries.items())
+
+    def get_stale(self, namespace: str, key: Hashable, max_age: float) -> Optional[Snapshot]:
+        """Last good snapshot regardless of ETag/TTL, if younger than `max_age` seconds"""
+        with self._lock:
+            snapshot = self._entries.get((namespace, key))
+            if snapshot is None or time.monotonic() - snapshot.created > max_age:
+                return None
+            return snapshot
+
+    def put(self, namespace: str, key: Hashable, content: Any, etag: Optional[str] = None) -> Snapshot:
+        snapshot = Snapshot(dumps(content), etag)
+        with self._lock:
+            self._entries[(namespace, key)] = snapshot
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.on_put is not None:
+            self.on_put(namespace, key)
+        return snapshot
+
+    def invalidate(self, namespace: str):
+        """Drop every snapshot of a namespace"""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[entry_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+snapshot_cache = SnapshotCache(ttl_seconds=settings.SNAPSHOT_TTL_SECONDS)
+
+# In-flight refreshes: (namespace, key, etag) -> task, shared by concurrent misses
+_refreshes: dict[tuple, asyncio.Task] = {}
+
+
+def _refresh(make_session, namespace: str, key: Hashable, build: Callable[[Session], Any], etag: Optional[str]) -> asyncio.Task:
+    """Start (or join) the single refresh of a snapshot"""
+    flight = (namespace, key, etag)
+    task = _refreshes.get(flight)
+    if task is not None:
+        return task
+
+    def run() -> Snapshot:
+        db = make_session()
+        try:
+            return snapshot_cache.put(namespace, key, build(db), etag)
+        finally:
+            db.close()
+
+    async def refresh() -> Snapshot:
+        try:
+            return await run_in_threadpool(run)
+        finally:
+            _refreshes.pop(flight, None)
+
+    task = asyncio.ensure_future(refresh())
+    # Retrieve the exception of a refresh nobody awaited (served stale) so it is not logged as unhandled
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    _refreshes[flight] = task
+    return task
+
+
+async def snapshot_response(
+    request: Request,
+    namespace: str,
+    key: Hashable,
+    build: Callable[[Session], Any],
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Serve a cached snapshot: 304 when If-None-Match matches, otherwise the
+    (pre)compressed body. `build(db)` is only called on a cache miss, in a
+    worker thread with its own session (it may outlive the request).
+    `etag` is the version-counter ETag; without it the content hash is used.
+    """
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    snapshot = snapshot_cache.get(namespace, key, etag)
+    if snapshot is None:
+        snapshot_cache.misses += 1
+        task = _refresh(read_sessionmaker(request), namespace, key, build, etag)
+        stale = snapshot_cache.get_stale(namespace, key, settings.SNAPSHOT_MAX_STALE_SECONDS)
+        if stale is None:
+            snapshot = await asyncio.shield(task)
+        else:
+            try:
+                snapshot = await asyncio.wait_for(asyncio.shield(task), settings.SNAPSHOT_REFRESH_WAIT_SECONDS)
+            except Exception as e:
+                if not isinstance(e, asyncio.TimeoutError):
+                    print(f"[ERROR] Snapshot refresh failed ({namespace}), serving stale copy: {e}")
+                snapshot = stale
+                snapshot_cache.stale_served += 1
+                headers["X-Snapshot-Stale"] = f"{time.monotonic() - stale.created:.0f}"
+    else:
+        snapshot_cache.hits += 1
+
+    headers["ETag"] = snapshot.etag
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+
+    encoding = None
+    if len(snapshot.body) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=snapshot.body_for(encoding), media_type="application/json", headers=headers)
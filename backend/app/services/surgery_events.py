@@ -0,0 +1,248 @@
+"""
+Surgery Event Log + Projections
+
+Every write to SurgeryRegistration appends a SurgeryEvent in the same
+transaction (the registration row itself is still updated in place).
+Projections read the event stream from their checkpoint and incrementally
+maintain derived tables, so analytics never rescan `surgery_registrations`:
+
+- or_room_timeline: one row per status/room change (OrRoomTimeline)
+- day_summary:      per-day case counts and first start / last end (SurgeryDaySummary)
+
+The projection runner is a background thread started in `lifespan`; writes
+wake it up, and it also polls every PROJECTION_INTERVAL_SECONDS to pick up
+events committed by other workers. A checkpoint row is locked (SELECT ... FOR
+UPDATE) while a batch is applied, so several workers never apply the same event
+twice, and projection rows and checkpoint commit together.
+
+Event ids are assigned at insert but become visible at commit, so a lower id
+can show up after a higher one (another worker, the NPO timer thread,
+background rebalances). The checkpoint therefore never moves past a missing
+id until it has been missing for PROJECTION_GAP_GRACE_SECONDS; after that the
+id is taken to belong to a rolled-back transaction and skipped.
+"""
+import enum
+import threading
+import time as timer
+from datetime import date, datetime, time
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.surgery import SurgeryRegistration, SurgeryStatusEnum
+from app.models.surgery_event import SurgeryEvent, ProjectionCheckpoint, OrRoomTimeline, SurgeryDaySummary
+
+# Fields changed by PATCH /api/surgery/{id} and queue moves (recorded as {"field": [old, new]})
+TRACKED_FIELDS = ("or_room", "selected_or", "status", "not_ready_reason", "queue_order", "queue_rank", "start_time", "end_time")
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def capture(surgery: SurgeryRegistration) -> dict:
+    """Tracked field values of a surgery (call before modifying it)"""
+    return {field: _json_value(getattr(surgery, field)) for field in TRACKED_FIELDS}
+
+
+def _event(surgery: SurgeryRegistration, event_type: str, changes: dict, status: Optional[str]) -> SurgeryEvent:
+    return SurgeryEvent(
+        surgery_id=surgery.id,
+        surgery_date=surgery.surgery_date,
+        or_room=surgery.selected_or or surgery.or_room,
+        event_type=event_type,
+        status=status,
+        changes=changes,
+    )
+
+
+def record_created(db: Session, surgery: SurgeryRegistration):
+    """Add a 'created' event (the surgery must be flushed so its id is known)"""
+    changes = {field: [None, value] for field, value in capture(surgery).items() if value is not None}
+    db.add(_event(surgery, "created", changes, _json_value(surgery.status)))
+
+
+def record_updated(db: Session, surgery: SurgeryRegistration, before: dict) -> Optional[SurgeryEvent]:
+    """Add an 'updated' event with the fields that differ from `before`; None if nothing changed"""
+    after = capture(surgery)
+    changes = {field: [before[field], after[field]] for field in TRACKED_FIELDS if before[field] != after[field]}
+    if not changes:
+        return None
+    event = _event(surgery, "updated", changes, after["status"])
+    db.add(event)
+    return event
+
+
+def record_deleted(db: Session, surgery: SurgeryRegistration):
+    changes = {field: [value, None] for field, value in capture(surgery).items() if value is not None}
+    db.add(_event(surgery, "deleted", changes, None))
+
+
+def record_reset(db: Session):
+    """All surgeries were deleted at once; projections start over"""
+    db.add(SurgeryEvent(event_type="reset"))
+
+
+class RoomTimelineProjection:
+    name = "or_room_timeline"
+
+    def apply(self, db: Session, event: SurgeryEvent):
+        if event.event_type == "reset":
+            db.query(OrRoomTimeline).delete()
+            return
+        changes = event.changes or {}
+        if event.event_type == "updated" and not {"status", "or_room", "selected_or"} & changes.keys():
+            return
+        db.add(OrRoomTimeline(
+            surgery_date=event.surgery_date,
+            or_room=event.or_room,
+            surgery_id=event.surgery_id,
+            event_id=event.id,
+            status=event.status if event.event_type != "deleted" else "deleted",
+            at=event.created_at,
+        ))
+
+
+class DaySummaryProjection:
+    name = "day_summary"
+
+    def apply(self, db: Session, event: SurgeryEvent):
+        if event.event_type == "reset":
+            db.query(SurgeryDaySummary).delete()
+            return
+        if event.surgery_date is None:
+            return
+        summary = db.get(SurgeryDaySummary, event.surgery_date)
+        if summary is None:
+            summary = SurgeryDaySummary(
+                surgery_date=event.surgery_date,
+                total_cases=0, completed_cases=0, cancelled_cases=0, status_changes=0,
+            )
+            db.add(summary)
+            db.flush()  # sessions don't autoflush; later events of the batch must find this row
+
+        changes = event.changes or {}
+        old_status, new_status = changes.get("status", [None, None])
+        if event.event_type == "created":
+            summary.total_cases += 1
+        elif event.event_type == "deleted":
+            summary.total_cases -= 1
+        elif "status" in changes:
+            summary.status_changes += 1
+        if old_status != new_status:
+            summary.completed_cases += (new_status == SurgeryStatusEnum.COMPLETED.value) - (old_status == SurgeryStatusEnum.COMPLETED.value)
+            summary.cancelled_cases += (new_status == SurgeryStatusEnum.CANCELLED.value) - (old_status == SurgeryStatusEnum.CANCELLED.value)
+
+        if event.event_type != "deleted":
+            start = changes.get("start_time", [None, None])[1]
+            end = changes.get("end_time", [None, None])[1]
+            if start is not None:
+                start = time.fromisoformat(start)
+                if summary.first_start_time is None or start < summary.first_start_time:
+                    summary.first_start_time = start
+            if end is not None:
+                end = time.fromisoformat(end)
+                if summary.last_end_time is None or end > summary.last_end_time:
+                    summary.last_end_time = end
+
+
+class ProjectionRunner:
+    def __init__(self, projections: list, interval_seconds: float, gap_grace_seconds: float, batch_size: int = 500):
+        self.projections = projections
+        self.interval_seconds = interval_seconds
+        self.gap_grace_seconds = gap_grace_seconds
+        self.batch_size = batch_size
+        self._gaps: dict[tuple, float] = {}  # (projection, missing event id) -> first seen (monotonic)
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def notify(self):
+        """Called after a write commits: process the new events now"""
+        self._wake.set()
+
+    def run_once(self) -> int:
+        """Apply pending events to every projection; returns the number of events applied"""
+        applied = 0
+        db = SessionLocal()
+        try:
+            for projection in self.projections:
+                while True:
+                    count = self._advance(db, projection)
+                    applied += count
+                    if count < self.batch_size:
+                        break
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return applied
+
+    def _advance(self, db: Session, projection) -> int:
+        checkpoint = db.query(ProjectionCheckpoint).filter(
+            ProjectionCheckpoint.name == projection.name
+        ).with_for_update().first()
+        if checkpoint is None:
+            checkpoint = ProjectionCheckpoint(name=projection.name, last_event_id=0)
+            db.add(checkpoint)
+
+        events = db.query(SurgeryEvent).filter(
+            SurgeryEvent.id > checkpoint.last_event_id
+        ).order_by(SurgeryEvent.id).limit(self.batch_size).all()
+        events = self._contiguous(projection.name, checkpoint.last_event_id, events)
+        for event in events:
+            projection.apply(db, event)
+        if events:
+            checkpoint.last_event_id = events[-1].id
+            self._gaps = {key: seen for key, seen in self._gaps.items() if key[0] != projection.name or key[1] > checkpoint.last_event_id}
+        db.commit()
+        return len(events)
+
+    def _contiguous(self, name: str, last_event_id: int, events: list) -> list:
+        """Leading events up to the first id gap that may still be filled by an uncommitted transaction"""
+        now = timer.monotonic()
+        expected = last_event_id + 1
+        for i, event in enumerate(events):
+            if event.id != expected:
+                first_seen = self._gaps.setdefault((name, expected), now)
+                if now - first_seen < self.gap_grace_seconds:
+                    return events[:i]
+            expected = event.id + 1
+        return events
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[ERROR] Surgery projections: {e}")
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._loop, name="surgery-projections", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+surgery_projections = ProjectionRunner(
+    [RoomTimelineProjection(), DaySummaryProjection()],
+    interval_seconds=settings.PROJECTION_INTERVAL_SECONDS,
+    gap_grace_seconds=settings.PROJECTION_GAP_GRACE_SECONDS,
+)
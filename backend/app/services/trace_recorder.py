@@ -0,0 +1,138 @@
+"""
+Request Trace Recorder
+
+Records method, path, body shape and timing of every API request to a JSONL
+file so real traffic (e.g. the 07:30-08:30 shift change) can be replayed
+offline with `python -m benchmarks.replay`.
+
+Body values are NOT stored except for a small allowlist of non-identifying
+fields (status, room, queue order, ...) — names, HN and diagnoses are reduced
+to their type so traces can be shared without patient data (PDPA). The same
+goes for URLs: the route template is stored instead of the concrete path
+(`/api/surgery/check-hn/{hn}`), and path/query parameters keep their value
+only if allowlisted (ids, dates, rooms, paging, ...).
+"""
+import json
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+from urllib.parse import parse_qs
+
+from app.config import settings
+
+# Fields whose values are kept in the trace (needed to replay realistic transitions)
+KEPT_FIELDS = {
+    "status", "surgery_type", "case_size", "or_room", "selected_or", "queue_order", "queue_rank",
+    "shift_type", "patient_type", "surgery_date", "scheduled_time", "start_time", "end_time",
+    "enabled", "grant_type",
+}
+
+# Path/query parameters whose values are kept (no HN, names, diagnosis or search text)
+KEPT_PARAMS = {
+    "surgery_id", "patient_id", "user_id", "schedule_id", "anchor_id",
+    "surgery_date", "plan_date", "rotation_date", "schedule_date", "scheduled_date", "date",
+    "from", "to", "date_from", "date_to", "year", "month", "time",
+    "type", "status", "case_size", "shift_type", "room", "or_room",
+    "fields", "skip", "limit", "runs",
+}
+UNMATCHED_ROUTE = "<unmatched>"
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def body_shape(value, key: str = None):
+    """Reduce a JSON value to its shape, keeping only allowlisted scalar values"""
+    if isinstance(value, dict):
+        return {k: body_shape(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [f"<list:{len(value)}>", body_shape(value[0]) if value else None]
+    if value is None:
+        return None
+    if key in KEPT_FIELDS:
+        return value
+    if isinstance(value, bool):
+        return "<bool>"
+    if isinstance(value, int):
+        return "<int>"
+    if isinstance(value, float):
+        return "<float>"
+    return "<str>"
+
+
+def params_shape(params) -> Optional[dict]:
+    """Path/query parameters with values masked unless allowlisted"""
+    return {k: (v if k in KEPT_PARAMS else "<str>") for k, v in params.items()} or None
+
+
+class TraceRecorder:
+    """Appends one JSON line per request; `enabled` can be changed at any time"""
+
+    def __init__(self, enabled: bool, log_path: str):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.recorded = 0
+        self._logger: Optional[logging.Logger] = None
+
+    def _get_logger(self) -> logging.Logger:
+        if self._logger is None:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            logger = logging.getLogger("surgitrack.request_traces")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(self.log_path, maxBytes=50 * 1024 * 1024, backupCount=10, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    async def capture_body(self, request) -> Optional[dict]:
+        """Read the request body (cached by Starlette for the endpoint) and return its shape"""
+        if request.method not in ("POST", "PUT", "PATCH"):
+            return None
+        if int(request.headers.get("content-length") or 0) > MAX_BODY_BYTES:
+            return {"kind": "too_large"}
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("application/json"):
+            try:
+                return {"kind": "json", "shape": body_shape(json.loads(await request.body() or b"null"))}
+            except ValueError:
+                return {"kind": "invalid_json"}
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            form = parse_qs((await request.body()).decode("utf-8", errors="replace"))
+            return {"kind": "form", "fields": sorted(form.keys())}
+        if content_type.startswith("multipart/form-data"):
+            return {"kind": "multipart"}
+        return None
+
+    def record(self, request, body: Optional[dict], started: float, status_code: int):
+        route = request.scope.get("route")
+        entry = {
+            "ts": round(started, 4),
+            "method": request.method,
+            "path": route.path if route is not None else UNMATCHED_ROUTE,
+            "path_params": params_shape(request.path_params),
+            "query": params_shape(request.query_params),
+            "auth": "authorization" in request.headers,
+            "body": body,
+            "status": status_code,
+            "duration_ms": round((time.time() - started) * 1000, 2),
+        }
+        self._get_logger().info(json.dumps(entry, ensure_ascii=False, default=str))
+        self.recorded += 1
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "log_path": self.log_path,
+            "recorded": self.recorded,
+        }
+
+
+trace_recorder = TraceRecorder(
+    enabled=settings.TRACE_RECORDING_ENABLED,
+    log_path=settings.TRACE_LOG_PATH,
+)
@@ -0,0 +1,176 @@
+"""
+Version Store
+
+Per-table, per-date version counters bumped on every write. GET endpoints
+derive their ETag from the counter, so a polling client's If-None-Match is
+answered with 304 after a single in-memory lookup — no query, no serialization.
+
+The counters and the ETag epoch live in the `cache_versions` table, so every
+worker (and every restart) issues the same ETag for the same data. A write
+bumps the counters in its own transaction, right before `db.commit()` (one
+UPDATE and one SELECT; the counter rows stay locked until the commit, so
+bump last), and the new values are published over the event bus once the
+transaction commits (nothing is published on rollback). Each worker keeps
+the highest value it has seen, and `load()` reads the table at startup.
+"""
+import secrets
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.cache_version import CacheVersion
+from app.services.event_bus import event_bus
+
+VERSIONS_TOPIC = "versions"
+ALL_SCOPE = "*"          # whole-table generation (bulk delete/reset)
+EPOCH_NAME = "_epoch"    # row holding the shared epoch
+PENDING_KEY = "version_bumps"  # Session.info key: {table: {scope: version}} to publish on commit
+
+
+class VersionStore:
+    def __init__(self):
+        # Private until load() reads the shared one, so early ETags never match another worker's
+        self.epoch = secrets.token_hex(4)
+        self._versions: dict[tuple, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.last_write = float("-inf")  # time.monotonic() of the latest applied bump
+
+    def load(self) -> int:
+        """Read the shared epoch and counters (creating the epoch on first start)"""
+        db = SessionLocal()
+        try:
+            epoch = db.get(CacheVersion, (EPOCH_NAME, ALL_SCOPE))
+            if epoch is None:
+                try:
+                    db.add(CacheVersion(name=EPOCH_NAME, scope=ALL_SCOPE, version=secrets.randbits(32)))
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()  # another worker created it first
+                epoch = db.get(CacheVersion, (EPOCH_NAME, ALL_SCOPE))
+            rows = db.query(CacheVersion.name, CacheVersion.scope, CacheVersion.version).filter(
+                CacheVersion.name != EPOCH_NAME
+            ).all()
+        finally:
+            db.close()
+        with self._lock:
+            self.epoch = f"{epoch.version:08x}"
+            for name, scope, version in rows:
+                self._versions[(name, scope)] = max(self._versions[(name, scope)], version)
+        return len(rows)
+
+    def bump(self, db: Session, table: str, *days: Optional[date]):
+        """Record a write to `table` affecting the given date(s); call before `db.commit()`"""
+        days = {day.isoformat() for day in days if day is not None}
+        if days:
+            # A write on a date also changes its month (calendar views)
+            self._stage(db, table, sorted(days | {day[:7] for day in days}))
+
+    def bump_many(self, db: Session, table: str, days: Iterable[Optional[date]]):
+        self.bump(db, table, *days)
+
+    def bump_all(self, db: Session, table: str):
+        """Record a write that may touch every date of `table` (bulk delete/reset)"""
+        self._stage(db, table, [ALL_SCOPE])
+
+    def _stage(self, db: Session, table: str, scopes: list):
+        versions = self._increment(db, table, scopes)
+        db.info.setdefault(PENDING_KEY, {}).setdefault(table, {}).update(versions)
+
+    def _increment(self, db: Session, table: str, scopes: list) -> dict:
+        """Increment the stored counters in the caller's transaction; returns the new values"""
+        increment = (
+            update(CacheVersion)
+            .where(CacheVersion.name == table, CacheVersion.scope.in_(scopes))
+            .values(version=CacheVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if db.execute(increment).rowcount < len(scopes):
+            # First write on a date/month: create the missing rows (a savepoint, since
+            # another worker may insert the same row first; then it is incremented)
+            existing = {scope for (scope,) in db.query(CacheVersion.scope).filter(
+                CacheVersion.name == table, CacheVersion.scope.in_(scopes)
+            )}
+            for scope in scopes:
+                if scope in existing:
+                    continue
+                try:
+                    with db.begin_nested():
+                        db.add(CacheVersion(name=table, scope=scope, version=1))
+                except IntegrityError:
+                    db.execute(increment.where(CacheVersion.scope == scope))
+        rows = db.query(CacheVersion.scope, CacheVersion.version).filter(
+            CacheVersion.name == table, CacheVersion.scope.in_(scopes)
+        ).all()
+        return dict(rows)
+
+    def apply(self, event: dict):
+        """Apply a bump event (from this or another worker)"""
+        table = event["table"]
+        with self._lock:
+            self.last_write = time.monotonic()
+            for scope, version in event["versions"].items():
+                if version > self._versions[(table, scope)]:
+                    self._versions[(table, scope)] = version
+
+    def version(self, table: str, scope: str) -> str:
+        return f"{self._versions[(table, ALL_SCOPE)]}.{self._versions[(table, scope)]}"
+
+    def etag(self, table: str, scope: str, variant: str = "") -> str:
+        """Weak ETag for a (table, scope) view; `variant` distinguishes paths/query strings"""
+        return f'W/"{self.epoch}-{self.version(table, scope)}-{zlib.crc32(variant.encode()):08x}"'
+
+
+version_store = VersionStore()
+event_bus.subscribe(VERSIONS_TOPIC, version_store.apply)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_bumps(db: Session):
+    if db.in_nested_transaction():
+        return  # a savepoint was released; the bumps are not committed yet
+    for table, versions in db.info.pop(PENDING_KEY, {}).items():
+        event_bus.publish(VERSIONS_TOPIC, {"table": table, "versions": versions})
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _discard_bumps(db: Session, transaction):
+    if transaction.parent is None:
+        db.info.pop(PENDING_KEY, None)  # rolled back (a commit has already published them)
+
+
+def conditional_get(table: str, date_param: Optional[str] = None, month_params: Optional[tuple] = None):
+    """
+    Dependency factory: answers If-None-Match with 304 using only the version counter.
+
+    The scope is the path parameter `date_param` (a date), the path parameters
+    `month_params` (year, month), or today's date when neither is given.
+    Returns the ETag so the endpoint can attach it to its 200 response
+    (None if the path parameters are invalid).
+    """
+    def dependency(request: Request, response: Response) -> Optional[str]:
+        try:
+            if date_param is not None:
+                scope = date.fromisoformat(request.path_params[date_param]).isoformat()
+            elif month_params is not None:
+                year, month = (int(request.path_params[name]) for name in month_params)
+                scope = f"{year:04d}-{month:02d}"
+            else:
+                scope = date.today().isoformat()
+        except ValueError:
+            return None  # let the endpoint's own validation report the bad parameter
+        etag = version_store.etag(table, scope, f"{request.url.path}?{request.url.query}")
+        if request.headers.get("if-none-match") == etag:
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return etag
+
+    return dependency
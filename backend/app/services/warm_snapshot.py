@@ -0,0 +1,142 @@
+"""
+Warm Snapshot File
+
+Persists today's snapshots (board, public TV display, today's roster) to a
+local file whenever one of them is rebuilt, and loads them back in `lifespan`.
+After a restart the first wave of board/TV requests is answered from memory
+instead of all hitting a cold database, and the displays keep working
+read-only if the database is unreachable at boot.
+
+Each body keeps the version ETag it was built under. The version counters are
+stored in the database and bumped in the same transaction as the data, so a
+loaded body is served as fresh only while they still give that ETag; after any
+write (before or after the restart) it is only a stale copy, served with
+X-Snapshot-Stale while the first refresh runs.
+
+File format (length-prefixed binary, bodies stored as-is):
+    MAGIC | u32 entry count | per entry: u32 meta length, u32 body length, meta JSON, body
+where meta is {"namespace", "key", "saved_at", "etag"} with dates/tuples tagged.
+"""
+import json
+import os
+import struct
+import threading
+import time
+from datetime import date
+from typing import Any, Hashable
+
+from app.config import settings
+from app.services.snapshot_cache import SnapshotCache, snapshot_cache
+
+MAGIC = b"SGWS\x01"
+SAVE_DELAY_SECONDS = 0.5  # coalesce bursts of rebuilds into one write
+
+
+def _encode_key(key: Any) -> Any:
+    if isinstance(key, tuple):
+        return {"t": [_encode_key(k) for k in key]}
+    if isinstance(key, date):
+        return {"d": key.isoformat()}
+    return key
+
+
+def _decode_key(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        if "t" in value:
+            return tuple(_decode_key(v) for v in value["t"])
+        return date.fromisoformat(value["d"])
+    return value
+
+
+def _is_today(key: Any, today: date) -> bool:
+    if isinstance(key, tuple):
+        return any(_is_today(k, today) for k in key)
+    return key == today
+
+
+class WarmSnapshotStore:
+    def __init__(self, path: str, cache: SnapshotCache):
+        self.path = path
+        self.cache = cache
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Load today's snapshots into the cache; returns the number loaded"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        if not data.startswith(MAGIC):
+            print(f"[ERROR] Ignoring warm snapshot file with unknown format: {self.path}")
+            return 0
+
+        today = date.today()
+        offset = len(MAGIC)
+        (count,) = struct.unpack_from(">I", data, offset)
+        offset += 4
+        loaded = 0
+        for _ in range(count):
+            meta_len, body_len = struct.unpack_from(">II", data, offset)
+            offset += 8
+            meta = json.loads(data[offset:offset + meta_len])
+            offset += meta_len
+            body = data[offset:offset + body_len]
+            offset += body_len
+            key = _decode_key(meta["key"])
+            if not _is_today(key, today) or time.time() - meta["saved_at"] > settings.SNAPSHOT_MAX_STALE_SECONDS:
+                continue
+            self.cache.put_warm(meta["namespace"], key, body, meta["saved_at"], meta.get("etag"))
+            loaded += 1
+        return loaded
+
+    def schedule_save(self, namespace: str, key: Hashable):
+        """Snapshot-cache hook: write the file shortly after today's snapshot changes"""
+        if not _is_today(key, date.today()):
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(SAVE_DELAY_SECONDS, self.save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def save(self):
+        with self._lock:
+            self._timer = None
+        today = date.today()
+        entries = [
+            (namespace, key, snapshot)
+            for (namespace, key), snapshot in self.cache.items()
+            if _is_today(key, today)
+        ]
+        chunks = [MAGIC, struct.pack(">I", len(entries))]
+        for namespace, key, snapshot in entries:
+            meta = json.dumps({
+                "namespace": namespace,
+                "key": _encode_key(key),
+                "saved_at": snapshot.saved_at,
+                "etag": snapshot.etag,
+            }).encode("utf-8")
+            chunks.append(struct.pack(">II", len(meta), len(snapshot.body)))
+            chunks.append(meta)
+            chunks.append(snapshot.body)
+
+        # Write to a temp file and rename, so a crash never leaves a torn file
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(chunks))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[ERROR] Failed to write warm snapshot file: {e}")
+
+    def attach(self):
+        self.cache.on_put = self.schedule_save
+
+
+warm_snapshots = WarmSnapshotStore(settings.SNAPSHOT_WARM_PATH, snapshot_cache) if settings.SNAPSHOT_WARM_PATH else None
@@ -0,0 +1,59 @@
+"""
+Response compression helpers (gzip, and brotli when the `brotli` package is installed)
+"""
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Streaming/binary responses that must not be buffered or are already compressed
+SKIP_CONTENT_TYPES = ("application/x-ndjson", "text/event-stream", "image/", "application/zip", "application/octet-stream")
+
+
+def _accepted(accept_encoding: str) -> dict:
+    """Accept-Encoding as {coding: q}; malformed q-values count as 0"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.lower().startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if coding:
+            accepted[coding.lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header (highest q; br on a tie; q=0 refuses)"""
+    if not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    return not content_type.startswith(SKIP_CONTENT_TYPES)
@@ -0,0 +1,58 @@
+"""
+Fast JSON serialization helpers
+
+- `FastJSONResponse`: JSONResponse rendered with orjson (falls back to the stdlib encoder)
+- `compile_row_encoder`: builds a row -> dict function for column tuples selected
+  directly from the database, so list endpoints skip ORM objects, per-row
+  `hasattr` checks and FastAPI's `jsonable_encoder`.
+"""
+import json
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is used instead
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes (orjson if available)"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; return it directly to bypass jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Inline conversion expressions per field kind ({v} is the row value)
+_CONVERTERS = {
+    None: "{v}",
+    "date": "({v}.isoformat() if {v} is not None else None)",
+    "datetime": "({v}.isoformat() if {v} is not None else None)",
+    "time": "({v}.isoformat(timespec='minutes') if {v} is not None else None)",
+    "enum": "(getattr({v}, 'value', {v}) if {v} is not None else None)",
+}
+
+
+def compile_row_encoder(fields: Sequence[tuple[str, Optional[str]]]) -> Callable[[Sequence], dict]:
+    """
+    Compile a function that turns a selected row (tuple) into a response dict.
+
+    `fields` is a list of (name, kind) in the same order as the selected
+    columns; kind is one of None, "date", "datetime", "time" (HH:MM) or "enum".
+    """
+    items = []
+    for index, (name, kind) in enumerate(fields):
+        expression = _CONVERTERS[kind].format(v=f"row[{index}]")
+        items.append(f"{name!r}: {expression}")
+    source = "def encode(row):\n    return {" + ", ".join(items) + "}\n"
+    namespace: dict = {}
+    exec(compile(source, f"<row_encoder:{len(fields)} fields>", "exec"), namespace)
+    return namespace["encode"]
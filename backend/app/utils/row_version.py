@@ -0,0 +1,36 @@
+"""
+Optimistic concurrency for rows with a `version` column.
+
+`conditional_update` writes with `UPDATE ... SET ..., version = v + 1 WHERE
+id = ? AND version = v`: 0 rows matched means someone else changed the row
+since version v was read. On success the new values are mirrored onto the
+loaded object, so the response needs no second SELECT.
+"""
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+# Re-reads allowed when the client sent no version (lost race against another write)
+UPDATE_ATTEMPTS = 3
+
+
+def changed_values(row, values: dict) -> dict:
+    """The part of `values` that differs from the row (an unchanged row keeps its version)"""
+    return {field: value for field, value in values.items() if getattr(row, field) != value}
+
+
+def conditional_update(db: Session, row, values: dict, expected_version: int) -> bool:
+    """Apply `values` to `row` only if its version is still `expected_version`"""
+    model = type(row)
+    new_values = {**values, "version": expected_version + 1}
+    result = db.execute(
+        update(model)
+        .where(model.id == row.id, model.version == expected_version)
+        .values(**new_values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    for field, value in new_values.items():
+        set_committed_value(row, field, value)
+    return True
@@ -0,0 +1,10 @@
+"""
+SurgiTrack API benchmark suite
+
+1. Seed a local database (SQLite or local MySQL) with realistic volumes:
+       DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --years 5 --per-day 40
+2. Drive the hot endpoints with concurrent clients:
+       DATABASE_URL=sqlite:///./bench.db python -m benchmarks.run --spawn --out bench-results/HEAD.json
+3. Compare two result files (e.g. before/after a change):
+       python -m benchmarks.compare bench-results/base.json bench-results/HEAD.json
+"""
@@ -0,0 +1,41 @@
+"""
+Compare two benchmark result files.
+
+Usage: python -m benchmarks.compare bench-results/base.json bench-results/HEAD.json
+"""
+import argparse
+import json
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "   n/a"
+    return f"{(after - before) / before * 100:+6.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+
+    print(f"base: {base['commit']} ({base['timestamp']})  head: {head['commit']} ({head['timestamp']})")
+    print(f"{'endpoint':24s} " + " ".join(f"{m:>22s}" for m in METRICS))
+    for name in sorted(set(base["results"]) | set(head["results"])):
+        b, h = base["results"].get(name), head["results"].get(name)
+        if b is None or h is None:
+            print(f"{name:24s} (only in {'head' if b is None else 'base'})")
+            continue
+        cells = [f"{b[m]:8.1f}->{h[m]:8.1f} {change(b[m], h[m])}" for m in METRICS]
+        print(f"{name:24s} " + " ".join(f"{c:>22s}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
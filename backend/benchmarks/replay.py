@@ -0,0 +1,207 @@
+"""
+Replay recorded request traces against a test instance.
+
+Traces are recorded by the running app when trace recording is on
+(PUT /api/admin/traces {"enabled": true}) and written to TRACE_LOG_PATH.
+
+Usage:
+    python -m benchmarks.replay logs/request_traces.jsonl --base-url http://test-host:8000 --speed 5
+    python -m benchmarks.replay logs/request_traces.jsonl --window 07:30-08:30 --speed 20 --out bench-results/replay.json
+
+Requests are sent at their original relative offsets divided by --speed.
+Bodies, path and query parameters are rebuilt from the recorded shape (masked
+values are replaced with placeholders); authenticated requests use the
+benchmark user's token. Requests that matched no route are skipped.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode
+
+from benchmarks.run import Client, login, percentile, git_commit
+from benchmarks.seed import BENCH_USERNAME, BENCH_PASSWORD
+
+# Path segments that are ids -> grouped as {id} in the report
+_ID_SEGMENT_CHARS = set("0123456789-")
+# Recorded instead of a path for requests that matched no route (see trace_recorder)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def load_traces(path: str, window: str = None) -> list[dict]:
+    traces = []
+    start, end = None, None
+    if window:
+        start, end = window.split("-")
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if window:
+                clock = datetime.fromtimestamp(entry["ts"]).strftime("%H:%M")
+                if not start <= clock < end:
+                    continue
+            if entry["path"] == UNMATCHED_ROUTE:
+                continue
+            traces.append(entry)
+    traces.sort(key=lambda e: e["ts"])
+    return traces
+
+
+def placeholder(value, key: str, rng: random.Random):
+    """Turn a recorded shape back into a concrete value"""
+    if isinstance(value, dict):
+        return {k: placeholder(v, k, rng) for k, v in value.items()}
+    if isinstance(value, list) and value and isinstance(value[0], str) and value[0].startswith("<list:"):
+        length = int(value[0][6:-1])
+        return [placeholder(value[1], key, rng) for _ in range(length)]
+    if value == "<str>":
+        if key == "hn":
+            return f"{rng.randint(100000000, 999999999)}"
+        if key == "age":  # masked query parameter
+            return f"{rng.randint(1, 80)}"
+        return "replay"
+    if value == "<int>":
+        return rng.randint(1, 80) if key == "age" else 1
+    if value == "<float>":
+        return 1.0
+    if value == "<bool>":
+        return True
+    return value
+
+
+def build_path(entry: dict, rng: random.Random) -> str:
+    """Concrete URL from the recorded route template and parameters"""
+    path = entry["path"]
+    for name, value in (entry.get("path_params") or {}).items():
+        path = path.replace(f"{{{name}}}", str(placeholder(value, name, rng)))
+    query = entry.get("query")
+    if isinstance(query, dict):
+        query = urlencode({name: placeholder(value, name, rng) for name, value in query.items()})
+    return path + (f"?{query}" if query else "")
+
+
+def build_request(entry: dict, rng: random.Random):
+    path = build_path(entry, rng)
+    body = entry.get("body") or {}
+    if body.get("kind") == "json":
+        return path, json.dumps(placeholder(body["shape"], None, rng)).encode(), "application/json"
+    if body.get("kind") == "form":
+        fields = {name: "replay" for name in body["fields"]}
+        if "username" in fields:
+            fields.update(username=BENCH_USERNAME, password=BENCH_PASSWORD)
+        return path, urlencode(fields).encode(), "application/x-www-form-urlencoded"
+    return path, None, None
+
+
+def endpoint_key(method: str, path: str) -> str:
+    parts = ["{id}" if part and set(part) <= _ID_SEGMENT_CHARS else part for part in path.split("/")]
+    return f"{method} {'/'.join(parts)}"
+
+
+def replay(traces: list[dict], base_url: str, speed: float, max_workers: int, seed: int) -> dict:
+    token = login(base_url)
+    rng = random.Random(seed)
+    local = threading.local()
+    lock = threading.Lock()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lateness: list[float] = []
+
+    def send(entry, due):
+        if not hasattr(local, "client"):
+            local.client = Client(base_url)
+        local.client.token = token if entry.get("auth") else None
+        with lock:
+            path, body, content_type = build_request(entry, rng)
+        started = time.perf_counter()
+        status = local.client.request(entry["method"], path, body, content_type)
+        elapsed = (time.perf_counter() - started) * 1000
+        key = endpoint_key(entry["method"], entry["path"])
+        with lock:
+            latencies[key].append(elapsed)
+            lateness.append((started - due) * 1000)
+            if not 200 <= status < 400:
+                errors[key] += 1
+
+    t0 = traces[0]["ts"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for entry in traces:
+            due = started + (entry["ts"] - t0) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, entry, due)
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for key, values in sorted(latencies.items()):
+        values.sort()
+        results[key] = {
+            "requests": len(values),
+            "errors": errors[key],
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "max_ms": round(values[-1], 3),
+        }
+    lateness.sort()
+    return {
+        "requests": len(traces),
+        "recorded_span_s": round(traces[-1]["ts"] - t0, 2),
+        "replay_span_s": round(elapsed, 2),
+        "throughput_rps": round(len(traces) / elapsed, 2) if elapsed else 0.0,
+        "errors": sum(errors.values()),
+        "dispatch_lag_p99_ms": round(percentile(lateness, 99), 3),
+        "endpoints": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded request traces")
+    parser.add_argument("trace_file")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier (1, 5, 20, ...)")
+    parser.add_argument("--window", default=None, help="only replay requests recorded in HH:MM-HH:MM")
+    parser.add_argument("--workers", type=int, default=64, help="max in-flight requests")
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--out", default=None, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    traces = load_traces(args.trace_file, args.window)
+    if not traces:
+        raise SystemExit("[ERROR] No traces to replay")
+    print(f"[INFO] Replaying {len(traces)} requests at {args.speed:g}x against {args.base_url}")
+
+    summary = replay(traces, args.base_url, args.speed, args.workers, args.seed)
+    for key, r in summary["endpoints"].items():
+        print(f"{key:48s} n={r['requests']:6d}  p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+              f"p99 {r['p99_ms']:8.2f} ms  errors {r['errors']}")
+    print(f"[OK] {summary['throughput_rps']} req/s, {summary['errors']} errors, "
+          f"dispatch lag p99 {summary['dispatch_lag_p99_ms']} ms")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": {"speed": args.speed, "window": args.window, "trace_file": args.trace_file},
+        **summary,
+    }
+    if args.out:
+        directory = os.path.dirname(args.out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"[OK] Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Drive the API's hot endpoints with concurrent clients and record latency.
+
+Usage:
+    python -m benchmarks.run --base-url http://localhost:8000 --out bench-results/HEAD.json
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.run --spawn --out bench-results/HEAD.json
+
+Results (throughput, p50/p95/p99 per endpoint) are written as JSON together
+with the git commit so they can be compared with `benchmarks.compare`.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode, urlparse
+
+from benchmarks.seed import BENCH_USERNAME, BENCH_PASSWORD
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+class Client:
+    """Keep-alive HTTP client (one per worker thread)"""
+
+    def __init__(self, base_url: str, token: str = None):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.token = token
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+
+    def request(self, method: str, path: str, body: bytes = None, content_type: str = None) -> int:
+        headers = {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if content_type:
+            headers["Content-Type"] = content_type
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            return response.status
+        except (http.client.HTTPException, ConnectionError):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            return 0
+
+
+def login(base_url: str) -> str:
+    client = Client(base_url)
+    body = urlencode({"username": BENCH_USERNAME, "password": BENCH_PASSWORD})
+    client.conn.request("POST", "/api/auth/login", body=body,
+                        headers={"Content-Type": "application/x-www-form-urlencoded"})
+    response = client.conn.getresponse()
+    payload = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(f"Benchmark login failed ({response.status}): {payload}")
+    return payload["access_token"]
+
+
+def build_scenarios(rng: random.Random, sample_hns: list[str], years: int, hot_ids: dict) -> dict:
+    """Each scenario returns (method, path, body, content_type) for one request"""
+    today = date.today()
+
+    def random_date() -> str:
+        return (today - timedelta(days=rng.randint(0, 365 * years))).isoformat()
+
+    def bulk_body() -> bytes:
+        rows = [{
+            "hn": f"{rng.randint(100000000, 999999999)}",
+            "patient_name": "ผู้ป่วยทดสอบ",
+            "age": rng.randint(1, 90),
+            "surgery_date": today.isoformat(),
+            "surgery_type": "elective",
+            "operation": "Appendectomy",
+        } for _ in range(10)]
+        return json.dumps({"registrations": rows}).encode()
+
+    def status_body(statuses: tuple) -> bytes:
+        return json.dumps({"status": rng.choice(statuses)}).encode()
+
+    login_body = urlencode({"username": BENCH_USERNAME, "password": BENCH_PASSWORD}).encode()
+
+    return {
+        "surgery_today": lambda: ("GET", "/api/surgery/today", None, None),
+        "surgery_elective": lambda: ("GET", f"/api/surgery/elective/{random_date()}", None, None),
+        "surgery_check_hn": lambda: ("GET", f"/api/surgery/check-hn/{rng.choice(sample_hns)}", None, None),
+        "patients_stats": lambda: ("GET", "/api/patients/stats", None, None),
+        "patients_public": lambda: ("GET", "/api/patients/public", None, None),
+        "auth_login": lambda: ("POST", "/api/auth/login", login_body, "application/x-www-form-urlencoded"),
+        "surgery_register_bulk": lambda: ("POST", "/api/surgery/register/bulk", bulk_body(), "application/json"),
+        # Concurrent edits of a few hot rows (several nurses updating the same board)
+        "surgery_update": lambda: ("PATCH", f"/api/surgery/{rng.choice(hot_ids['surgery'])}",
+                                   status_body(("registered", "waiting")), "application/json"),
+        "patients_status": lambda: ("PATCH", f"/api/patients/{rng.choice(hot_ids['patients'])}/status",
+                                    status_body(("waiting", "in_surgery")), "application/json"),
+    }
+
+
+def run_scenario(base_url: str, token: str, make_request, requests: int, concurrency: int, warmup: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    per_worker = max(requests // concurrency, 1)
+
+    def worker():
+        nonlocal errors
+        client = Client(base_url, token)
+        for _ in range(warmup):
+            client.request(*make_request())
+        local, local_errors = [], 0
+        for _ in range(per_worker):
+            method, path, body, content_type = make_request()
+            started = time.perf_counter()
+            status = client.request(method, path, body, content_type)
+            local.append((time.perf_counter() - started) * 1000)
+            if not 200 <= status < 300:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def sample_hns(limit: int = 200) -> list[str]:
+    from app.database import SessionLocal
+    from app.models.surgery import SurgeryRegistration
+
+    db = SessionLocal()
+    try:
+        rows = db.query(SurgeryRegistration.hn).distinct().limit(limit).all()
+        return [row[0] for row in rows] or ["000000000"]
+    finally:
+        db.close()
+
+
+def sample_hot_ids(limit: int = 20) -> dict:
+    """A few ids per table, so concurrent update scenarios contend on the same rows"""
+    from app.database import SessionLocal
+    from app.models.patient import Patient
+    from app.models.surgery import SurgeryRegistration
+
+    db = SessionLocal()
+    try:
+        surgery_ids = [row[0] for row in db.query(SurgeryRegistration.id).order_by(SurgeryRegistration.id.desc()).limit(limit)]
+        patient_ids = [row[0] for row in db.query(Patient.id).order_by(Patient.id.desc()).limit(limit)]
+        return {"surgery": surgery_ids or [0], "patients": patient_ids or [0]}
+    finally:
+        db.close()
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not start within 30 seconds")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SurgiTrack hot endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="start uvicorn against DATABASE_URL for the run")
+    parser.add_argument("--port", type=int, default=8765, help="port for --spawn")
+    parser.add_argument("--requests", type=int, default=400, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=3, help="warm-up requests per worker")
+    parser.add_argument("--years", type=int, default=5, help="date span used for random dates")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--out", default=None, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if args.spawn:
+        server = spawn_server(args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        token = login(base_url)
+        rng = random.Random(args.seed)
+        scenarios = build_scenarios(rng, sample_hns(), args.years, sample_hot_ids())
+        if args.only:
+            scenarios = {name: fn for name, fn in scenarios.items() if name in args.only}
+
+        results = {}
+        for name, make_request in scenarios.items():
+            results[name] = run_scenario(base_url, token, make_request, args.requests, args.concurrency, args.warmup)
+            r = results[name]
+            print(f"{name:24s} {r['throughput_rps']:9.1f} req/s  p50 {r['p50_ms']:8.2f} ms  "
+                  f"p95 {r['p95_ms']:8.2f} ms  p99 {r['p99_ms']:8.2f} ms  errors {r['errors']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": os.environ.get("DATABASE_URL", "(config default)").split("@")[-1],
+        "params": {"requests": args.requests, "concurrency": args.concurrency, "seed": args.seed},
+        "results": results,
+    }
+    if args.out:
+        directory = os.path.dirname(args.out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"[OK] Results written to {args.out}")
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
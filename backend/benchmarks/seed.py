@@ -0,0 +1,184 @@
+"""
+Seed a benchmark database with realistic volumes.
+
+Usage: DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed [--years 5] [--per-day 40] [--seed 2026]
+
+The data is generated from a fixed random seed so every run produces the
+same database and results stay comparable across commits.
+"""
+import argparse
+import random
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import insert
+
+from app.database import engine, Base, SessionLocal
+from app.models.user import User, UserRole
+from app.models.patient import Patient, StatusHistory, SurgeryStatus, PatientType, Gender
+from app.models.session_log import SessionLog
+from app.models.surgery import SurgeryRegistration
+from app.models.work_schedule import WorkSchedule, ShiftType
+from app.utils.security import get_password_hash
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench1234"
+
+OR_ROOMS = ["OR1", "OR2", "OR3", "OR4", "OR5", "OR6", "OR7", "OR8"]
+DEPARTMENTS = ["Surgery", "Ortho", "OB-GYN", "ENT", "Eye", "Uro"]
+SURGEONS = [f"นพ.ศัลยแพทย์ {i}" for i in range(1, 21)]
+WARDS = ["ศัลยกรรมชาย", "ศัลยกรรมหญิง", "กระดูก", "สูติกรรม", "ICU", "พิเศษ 1"]
+FIRST_NAMES = ["สมชาย", "สมหญิง", "ประเสริฐ", "มาลี", "วิชัย", "สุดา", "อนันต์", "บุญมี", "จันทร์เพ็ญ", "ธนพล"]
+LAST_NAMES = ["ใจดี", "มีสุข", "ทองคำ", "ศรีสวัสดิ์", "แก้วมณี", "บุญเรือง", "สายทอง", "พรหมมา"]
+TITLES = ["นาย", "นาง", "นางสาว"]
+OPERATIONS = [
+    ("Gallstone", "Laparoscopic cholecystectomy"),
+    ("Acute appendicitis", "Appendectomy"),
+    ("Inguinal hernia", "Herniorrhaphy"),
+    ("Fracture femur", "ORIF femur"),
+    ("Cataract", "Phacoemulsification with IOL"),
+    ("Myoma uteri", "Total abdominal hysterectomy"),
+    ("Chronic tonsillitis", "Tonsillectomy"),
+    ("Renal stone", "Percutaneous nephrolithotomy"),
+]
+SURGERY_STATUSES = ["registered", "waiting", "in_surgery", "recovery", "completed", "cancelled", "not_ready"]
+NURSES = [f"พยาบาล {i}" for i in range(1, 31)]
+
+BATCH_SIZE = 5000
+
+
+def _flush(db, model, rows):
+    if rows:
+        db.execute(insert(model), rows)
+        rows.clear()
+
+
+def seed(years: int, per_day: int, rng_seed: int):
+    rng = random.Random(rng_seed)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == BENCH_USERNAME).first()
+        if not user:
+            user = User(
+                username=BENCH_USERNAME,
+                password_hash=get_password_hash(BENCH_PASSWORD),
+                full_name="Benchmark User",
+                role=UserRole.admin,
+                is_active=True,
+            )
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+
+        today = date.today()
+        start = today - timedelta(days=365 * years)
+        hn_pool = [f"{rng.randint(100000000, 999999999)}" for _ in range(per_day * 120)]
+
+        surgeries, patients, schedules, sessions = [], [], [], []
+        day = start
+        total_days = 0
+        while day <= today:
+            for n in range(per_day):
+                diagnosis, operation = rng.choice(OPERATIONS)
+                start_hour = 8 + (n % 8)
+                completed = day < today
+                status = "completed" if completed and rng.random() < 0.9 else rng.choice(SURGERY_STATUSES)
+                name = f"{rng.choice(TITLES)}{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                surgeries.append({
+                    "hn": rng.choice(hn_pool),
+                    "patient_name": name,
+                    "age": rng.randint(1, 95),
+                    "surgery_date": day,
+                    "scheduled_time": time(start_hour, rng.choice([0, 15, 30, 45])),
+                    "surgery_type": "emergency" if rng.random() < 0.2 else "elective",
+                    "or_room": rng.choice(OR_ROOMS),
+                    "department": rng.choice(DEPARTMENTS),
+                    "surgeon": rng.choice(SURGEONS),
+                    "diagnosis": diagnosis,
+                    "operation": operation,
+                    "ward": rng.choice(WARDS),
+                    "case_size": rng.choice(["Major", "Minor"]),
+                    "start_time": time(start_hour, 10) if status in ("in_surgery", "recovery", "completed") else None,
+                    "end_time": time(min(start_hour + 1, 23), rng.randint(0, 59)) if status == "completed" else None,
+                    "assist1": rng.choice(NURSES),
+                    "scrub_nurse": rng.choice(NURSES),
+                    "circulate_nurse": rng.choice(NURSES),
+                    "queue_order": n % 5 + 1,
+                    "status": status,
+                    "created_by": user.id,
+                })
+                patients.append({
+                    "hn": surgeries[-1]["hn"],
+                    "full_name": name,
+                    "age": surgeries[-1]["age"],
+                    "gender": rng.choice([Gender.male, Gender.female]),
+                    "diagnosis": diagnosis,
+                    "operation": operation,
+                    "surgeon": surgeries[-1]["surgeon"],
+                    "or_room": surgeries[-1]["or_room"],
+                    "patient_type": PatientType.emergency if surgeries[-1]["surgery_type"] == "emergency" else PatientType.elective,
+                    "status": rng.choice(list(SurgeryStatus)),
+                    "scheduled_date": day,
+                    "scheduled_time": surgeries[-1]["scheduled_time"],
+                    "created_by": user.id,
+                })
+            for shift in ShiftType:
+                schedules.append({
+                    "date": day,
+                    "shift_type": shift,
+                    "incharge": rng.choice(NURSES),
+                    **{f"nurse_{i}": rng.choice(NURSES) for i in range(1, 7)},
+                })
+            for _ in range(20):
+                sessions.append({
+                    "user_id": user.id,
+                    "username": BENCH_USERNAME,
+                    "action": "login",
+                    "ip_address": f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                    "user_agent": "benchmark-seed",
+                    "success": True,
+                    "created_at": datetime.combine(day, time(7, rng.randint(0, 59))),
+                })
+
+            if len(surgeries) >= BATCH_SIZE:
+                _flush(db, SurgeryRegistration, surgeries)
+                _flush(db, Patient, patients)
+                _flush(db, WorkSchedule, schedules)
+                _flush(db, SessionLog, sessions)
+                db.commit()
+            day += timedelta(days=1)
+            total_days += 1
+
+        _flush(db, SurgeryRegistration, surgeries)
+        _flush(db, Patient, patients)
+        _flush(db, WorkSchedule, schedules)
+        _flush(db, SessionLog, sessions)
+        db.commit()
+
+        # Status history: two transitions for every patient
+        patient_ids = [row[0] for row in db.query(Patient.id).all()]
+        history = []
+        for patient_id in patient_ids:
+            history.append({"patient_id": patient_id, "old_status": None, "new_status": "waiting", "changed_by": user.id})
+            history.append({"patient_id": patient_id, "old_status": "waiting", "new_status": "in_surgery", "changed_by": user.id})
+            if len(history) >= BATCH_SIZE:
+                _flush(db, StatusHistory, history)
+        _flush(db, StatusHistory, history)
+        db.commit()
+
+        print(f"[OK] Seeded {total_days} days x {per_day} cases ({total_days * per_day} surgeries)")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a benchmark database")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--per-day", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=2026)
+    args = parser.parse_args()
+    seed(args.years, args.per_day, args.seed)
+
+
+if __name__ == "__main__":
+    main()
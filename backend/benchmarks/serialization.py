@@ -0,0 +1,104 @@
+"""
+Micro-benchmark: legacy vs fast serialization of a 500-row surgery day list.
+
+Usage: python -m benchmarks.serialization [--rows 500] [--repeat 50]
+
+legacy = ORM objects -> surgery_to_response -> jsonable_encoder -> json.dumps
+fast   = column tuples -> compiled row encoder -> orjson
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, datetime, time as dtime
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.surgery import SurgeryRegistration
+from app.routers.surgery import surgery_to_response, query_surgery_rows
+from app.utils.fast_json import dumps, orjson
+
+
+def legacy_json(content) -> bytes:
+    # What JSONResponse does after FastAPI's jsonable_encoder
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def seed_day(db, day: date, rows: int):
+    rng = random.Random(500)
+    db.execute(insert(SurgeryRegistration), [{
+        "hn": f"{rng.randint(100000000, 999999999)}",
+        "patient_name": "นายทดสอบ ระบบ",
+        "age": rng.randint(1, 90),
+        "surgery_date": day,
+        "scheduled_time": dtime(8 + i % 9, 30),
+        "surgery_type": rng.choice(["elective", "emergency"]),
+        "or_room": f"OR{i % 8 + 1}",
+        "department": "Surgery",
+        "surgeon": "นพ.ทดสอบ",
+        "diagnosis": "Gallstone with chronic cholecystitis " * 3,
+        "operation": "Laparoscopic cholecystectomy " * 3,
+        "ward": "ศัลยกรรมชาย",
+        "case_size": rng.choice(["Major", "Minor"]),
+        "start_time": dtime(9, 0),
+        "queue_order": i % 5 + 1,
+        "status": "waiting",
+        "created_at": datetime(2026, 1, 1, 7, 0),
+    } for i in range(rows)])
+    db.commit()
+
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization micro-benchmark")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    day = date(2026, 1, 5)
+    seed_day(db, day, args.rows)
+    criteria = SurgeryRegistration.surgery_date == day
+
+    def legacy_full():
+        db.expunge_all()
+        surgeries = db.query(SurgeryRegistration).filter(criteria).order_by(SurgeryRegistration.scheduled_time).all()
+        return legacy_json([surgery_to_response(s) for s in surgeries])
+
+    def fast_full():
+        return dumps(query_surgery_rows(db, criteria))
+
+    assert json.loads(legacy_full()) == json.loads(fast_full()), "fast path output differs from legacy"
+
+    db.expunge_all()
+    orm_rows = db.query(SurgeryRegistration).filter(criteria).order_by(SurgeryRegistration.scheduled_time).all()
+    dicts = query_surgery_rows(db, criteria)
+
+    results = {
+        "legacy end-to-end (query + encode)": measure(legacy_full, args.repeat),
+        "fast end-to-end (query + encode)": measure(fast_full, args.repeat),
+        "legacy encode only": measure(lambda: legacy_json([surgery_to_response(s) for s in orm_rows]), args.repeat),
+        "fast encode only": measure(lambda: dumps(dicts), args.repeat),
+    }
+    print(f"{args.rows} rows, median of {args.repeat} runs (orjson {'on' if orjson else 'off'})")
+    for name, ms in results.items():
+        print(f"  {name:38s} {ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
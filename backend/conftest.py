@@ -0,0 +1,9 @@
+"""
+pytest: point the app at a throwaway SQLite database before any test module imports it
+(the test scripts set the same variables when run directly)
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.gettempdir(), "surgitrack_test.db")
+os.environ["SNAPSHOT_WARM_PATH"] = ""
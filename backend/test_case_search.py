@@ -0,0 +1,52 @@
+"""
+Test case search tokenization and lookups for Thai operation names (tone marks included)
+"""
+from app.services.case_search import CaseSearch, tokenize
+
+
+def upsert(index, surgery_id, operation, diagnosis="", surgery_date="2026-10-19"):
+    index.apply({"op": "upsert", "case": {
+        "id": surgery_id, "operation": operation, "diagnosis": diagnosis, "surgery_date": surgery_date,
+        "surgeon": "นพ.สมศักดิ์", "department": "Surgery", "case_size": "Major",
+    }})
+
+
+def test_thai_search():
+    assert tokenize("ผ่าตัดไส้ติ่ง, Lap-chole") == {"ผ่าตัดไส้ติ่ง", "lap", "chole"}
+
+    index = CaseSearch()
+    upsert(index, 1, "ผ่าตัดไส้ติ่ง", "ไส้ติ่งอักเสบ")
+    upsert(index, 2, "Laparoscopic cholecystectomy", "นิ่วในถุงน้ำดี")
+    upsert(index, 3, "ผ่าตัดถุงน้ำดี", "นิ่วในถุงน้ำดี", surgery_date="2025-01-10")
+
+    assert index.search("ผ่าตัดไส้ติ่ง")["ids"] == [1]
+    assert index.search("ผ่าตัด")["ids"] == [1, 3]           # prefix of a Thai word, newest first
+    assert index.search("ไส้ติ่งอักเสบ")["ids"] == [1]
+    assert index.search("นิ่วในถุงน้ำดี")["by_year"] == {"2026": 1, "2025": 1}
+    assert index.search("ผ่าตัด lap")["ids"] == []
+
+
+def test_thai_substring():
+    index = CaseSearch()
+    upsert(index, 1, "ผ่าตัดไส้ติ่ง", "ไส้ติ่งอักเสบ")
+    upsert(index, 2, "Laparoscopic cholecystectomy", "นิ่วในถุงน้ำดี")
+    upsert(index, 3, "ผ่าตัดถุงน้ำดี", "นิ่วในถุงน้ำดี", surgery_date="2025-01-10")
+    upsert(index, 4, "กขคง คงจฉ")
+
+    assert index.search("ถุงน้ำดี")["ids"] == [2, 3]          # middle/end of a Thai run
+    assert index.search("ตัดไส้")["ids"] == [1]
+    assert index.search("ดี")["ids"] == [2, 3]                # shorter than a trigram
+    assert index.search("ไส้ติ่ง chole")["ids"] == []
+    assert index.search("กขคงจฉ")["ids"] == []                # every trigram present, but not contiguous
+
+    upsert(index, 1, "ผ่าตัดต่อมไทรอยด์")
+    assert index.search("ไส้ติ่ง")["ids"] == []
+
+
+if __name__ == "__main__":
+    try:
+        test_thai_search()
+        test_thai_substring()
+        print("[OK] Thai case search works")
+    except AssertionError as e:
+        print(f"[ERROR] Thai case search failed: {e!r}")
@@ -0,0 +1,120 @@
+"""
+Test queue moves: one row written per move, versions and events for every written row, derived queue_order
+(runs against a throwaway SQLite database)
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.gettempdir(), "surgitrack_test.db")
+os.environ["SNAPSHOT_WARM_PATH"] = ""
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models.surgery import SurgeryRegistration
+from app.models.surgery_event import SurgeryEvent
+from app.services.queue_ranks import RANK_GAP
+
+DAY = date(2030, 1, 8)
+
+
+def add_room(room: str, count: int, ranked: bool = True) -> list:
+    db = SessionLocal()
+    try:
+        cases = [
+            SurgeryRegistration(
+                hn=f"Q{i:04d}", patient_name="ทดสอบ คิว", surgery_date=DAY, or_room=room,
+                queue_rank=i * RANK_GAP if ranked else None,
+            )
+            for i in range(1, count + 1)
+        ]
+        db.add_all(cases)
+        db.commit()
+        return [case.id for case in cases]
+    finally:
+        db.close()
+
+
+def versions(ids: list) -> dict:
+    db = SessionLocal()
+    try:
+        return dict(db.query(SurgeryRegistration.id, SurgeryRegistration.version).filter(SurgeryRegistration.id.in_(ids)))
+    finally:
+        db.close()
+
+
+def events_of(ids: list) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(SurgeryEvent).filter(SurgeryEvent.surgery_id.in_(ids)).count()
+    finally:
+        db.close()
+
+
+def room_order(client, room: str) -> list:
+    cases = [c for c in client.get(f"/api/surgery/date/{DAY}").json() if c["or_room"] == room]
+    return [c["id"] for c in sorted(cases, key=lambda c: c["queue_order"])]
+
+
+class UpdatedRows:
+    """Counts rows written to surgery_registrations by UPDATE statements"""
+
+    def __enter__(self):
+        self.rows = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE surgery_registrations"):
+            self.rows += len(parameters) if executemany else 1
+
+
+def test_move_writes_one_row():
+    with TestClient(app) as client:
+        ids = add_room("OR 9", 10)
+        before = versions(ids)
+
+        with UpdatedRows() as updated:
+            r = client.post(f"/api/surgery/{ids[-1]}/move", json={"before_id": ids[0], "version": before[ids[-1]]})
+        assert r.status_code == 200, r.text
+        assert updated.rows == 1, updated.rows
+        assert r.json()["queue_order"] == 1
+
+        after = versions(ids)
+        assert after[ids[-1]] == before[ids[-1]] + 1
+        assert all(after[i] == before[i] for i in ids[:-1])
+        assert room_order(client, "OR 9") == [ids[-1]] + ids[:-1]
+        assert events_of(ids) == 1
+
+        # The same move from the old version is a conflict
+        r = client.post(f"/api/surgery/{ids[-1]}/move", json={"before_id": ids[0], "version": before[ids[-1]]})
+        assert r.status_code == 409, r.status_code
+
+
+def test_rebalance_versions_every_written_row():
+    with TestClient(app) as client:
+        ids = add_room("OR 10", 4, ranked=False)
+        before = versions(ids)
+
+        r = client.post(f"/api/surgery/{ids[0]}/move", json={"after_id": ids[2]})
+        assert r.status_code == 200, r.text
+        after = versions(ids)
+        assert all(after[i] == before[i] + 1 for i in ids), (before, after)
+        assert events_of(ids) == len(ids)
+        assert room_order(client, "OR 10") == [ids[1], ids[2], ids[0], ids[3]]
+
+
+if __name__ == "__main__":
+    for test in (test_move_writes_one_row, test_rebalance_versions_every_written_row):
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            print(f"[ERROR] {test.__name__} failed: {e!r}")
@@ -0,0 +1,70 @@
+"""
+Test that a board loaded from the warm snapshot file is only fresh while no write happened since it was saved
+(runs against a throwaway SQLite database)
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.gettempdir(), "surgitrack_test.db")
+os.environ["SNAPSHOT_WARM_PATH"] = ""
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.surgery import SurgeryRegistration
+from app.services.snapshot_cache import snapshot_cache
+from app.services.version_store import version_store
+from app.services.warm_snapshot import WarmSnapshotStore
+
+
+def add_today_case() -> int:
+    db = SessionLocal()
+    try:
+        surgery = SurgeryRegistration(hn="W0001", patient_name="ทดสอบ สแนปช็อต", surgery_date=date.today(), or_room="OR 1")
+        db.add(surgery)
+        db.commit()
+        return surgery.id
+    finally:
+        db.close()
+
+
+def restart(store: WarmSnapshotStore):
+    """What a new worker sees: an empty cache filled from the file, counters read from the database"""
+    snapshot_cache.clear()
+    assert store.load() > 0
+    version_store.load()
+
+
+def test_warm_snapshot_after_write():
+    store = WarmSnapshotStore(os.path.join(tempfile.mkdtemp(), "warm_snapshots.bin"), snapshot_cache)
+    with TestClient(app) as client:
+        surgery_id = add_today_case()
+        saved = client.get("/api/surgery/today")
+        store.save()
+
+        # No write since the file was saved: the warm body is current and served without a query
+        restart(store)
+        hits = snapshot_cache.hits
+        r = client.get("/api/surgery/today")
+        assert r.headers["etag"] == saved.headers["etag"] and snapshot_cache.hits == hits + 1
+
+        # A write before the restart: the warm body must not pass for the current version
+        r = client.patch(f"/api/surgery/{surgery_id}", json={"status": "cancelled"})
+        assert r.status_code == 200
+        restart(store)
+        r = client.get("/api/surgery/today")
+        assert r.headers["etag"] != saved.headers["etag"]
+        assert "x-snapshot-stale" not in r.headers
+        assert next(c for c in r.json() if c["id"] == surgery_id)["status"] == "cancelled"
+        assert client.get("/api/surgery/today", headers={"If-None-Match": saved.headers["etag"]}).status_code == 200
+
+
+if __name__ == "__main__":
+    try:
+        test_warm_snapshot_after_write()
+        print("[OK] test_warm_snapshot_after_write")
+    except AssertionError as e:
+        print(f"[ERROR] test_warm_snapshot_after_write failed: {e!r}")
@@ -0,0 +1,79 @@
+"""
+Test optimistic concurrency of surgery updates (PATCH and batch PATCH) against a throwaway SQLite database
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.gettempdir(), "surgitrack_test.db")
+os.environ["SNAPSHOT_WARM_PATH"] = ""
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.surgery import SurgeryRegistration
+
+DAY = date(2030, 1, 7)
+
+
+def add_case(**values) -> int:
+    db = SessionLocal()
+    try:
+        surgery = SurgeryRegistration(hn="T0001", patient_name="ทดสอบ ระบบ", surgery_date=DAY, **values)
+        db.add(surgery)
+        db.commit()
+        return surgery.id
+    finally:
+        db.close()
+
+
+def stored(surgery_id: int) -> SurgeryRegistration:
+    db = SessionLocal()
+    try:
+        return db.get(SurgeryRegistration, surgery_id)
+    finally:
+        db.close()
+
+
+def test_patch_versions():
+    with TestClient(app) as client:
+        surgery_id = add_case(or_room="OR 1")
+        version = stored(surgery_id).version
+
+        r = client.patch(f"/api/surgery/{surgery_id}", json={"or_room": "OR 2", "version": version})
+        assert r.status_code == 200 and r.json()["version"] == version + 1
+
+        # The same change again from the old version: already in place, but still a conflict
+        r = client.patch(f"/api/surgery/{surgery_id}", json={"or_room": "OR 2", "version": version})
+        assert r.status_code == 409, r.status_code
+        assert r.json()["detail"]["current"]["version"] == version + 1
+
+        # A no-op from the current version writes nothing
+        r = client.patch(f"/api/surgery/{surgery_id}", json={"or_room": "OR 2", "version": version + 1})
+        assert r.status_code == 200 and stored(surgery_id).version == version + 1
+
+
+def test_batch_all_or_nothing():
+    with TestClient(app) as client:
+        first, second = add_case(or_room="OR 3"), add_case(or_room="OR 3")
+        versions = {i: stored(i).version for i in (first, second)}
+
+        r = client.patch("/api/surgery/batch", json={"updates": [
+            {"id": first, "or_room": "OR 4", "version": versions[first]},
+            {"id": second, "or_room": "OR 4", "version": versions[second] - 1},
+        ]})
+        assert r.status_code == 409, r.status_code
+        for surgery_id in (first, second):
+            surgery = stored(surgery_id)
+            assert (surgery.or_room, surgery.version) == ("OR 3", versions[surgery_id])
+
+
+if __name__ == "__main__":
+    for test in (test_patch_versions, test_batch_all_or_nothing):
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            print(f"[ERROR] {test.__name__} failed: {e!r}")
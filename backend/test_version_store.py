@@ -0,0 +1,66 @@
+"""
+Test version ETags: 304 until a write commits, nothing published on rollback, same ETag in every worker
+(runs against a throwaway SQLite database)
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.gettempdir(), "surgitrack_test.db")
+os.environ["SNAPSHOT_WARM_PATH"] = ""
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.surgery import SurgeryRegistration
+from app.services.version_store import VersionStore, version_store
+
+DAY = date(2030, 1, 9)
+URL = f"/api/surgery/date/{DAY}"
+
+
+def add_case() -> int:
+    db = SessionLocal()
+    try:
+        surgery = SurgeryRegistration(hn="V0001", patient_name="ทดสอบ เวอร์ชัน", surgery_date=DAY, or_room="OR 1")
+        db.add(surgery)
+        db.commit()
+        return surgery.id
+    finally:
+        db.close()
+
+
+def test_etag_follows_writes():
+    with TestClient(app) as client:
+        surgery_id = add_case()
+        etag = client.get(URL).headers["etag"]
+        assert client.get(URL, headers={"If-None-Match": etag}).status_code == 304
+
+        # A bump that is rolled back changes nothing
+        db = SessionLocal()
+        version_store.bump(db, SurgeryRegistration.__tablename__, DAY)
+        db.rollback()
+        db.close()
+        assert client.get(URL, headers={"If-None-Match": etag}).status_code == 304
+
+        assert client.patch(f"/api/surgery/{surgery_id}", json={"or_room": "OR 2"}).status_code == 200
+        r = client.get(URL, headers={"If-None-Match": etag})
+        assert r.status_code == 200 and r.headers["etag"] != etag
+        assert next(c for c in r.json() if c["id"] == surgery_id)["or_room"] == "OR 2"
+        assert client.get(URL, headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+        # Another worker (or a restart) reads the same counters and issues the same ETag
+        other = VersionStore()
+        other.load()
+        scope, variant = DAY.isoformat(), f"{URL}?"
+        assert other.etag(SurgeryRegistration.__tablename__, scope, variant) == r.headers["etag"]
+
+
+if __name__ == "__main__":
+    try:
+        test_etag_follows_writes()
+        print("[OK] test_etag_follows_writes")
+    except AssertionError as e:
+        print(f"[ERROR] test_etag_follows_writes failed: {e!r}")
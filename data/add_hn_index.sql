@@ -0,0 +1,14 @@
+-- HN history lookups (check-hn, paginated history) ordered by surgery date
+-- Run this in MySQL on existing databases
+
+USE surgitrack;
+
+ALTER TABLE surgery_registrations
+    ADD INDEX idx_hn_date (hn, surgery_date);
+
+-- idx_hn (hn), if the table was created from setup_database.sql, is covered by idx_hn_date:
+-- ALTER TABLE surgery_registrations DROP INDEX idx_hn;
+
+SHOW INDEX FROM surgery_registrations;
+
+SELECT 'HN index added successfully!' AS message;
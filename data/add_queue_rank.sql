@@ -0,0 +1,14 @@
+-- Gap-based queue ranks: moving a case in a room's queue updates only that row
+-- Run this in MySQL on existing databases
+
+USE surgitrack;
+
+ALTER TABLE surgery_registrations
+    ADD COLUMN queue_rank BIGINT NULL COMMENT 'ลำดับคิวแบบเว้นช่วง (ย้ายคิวแก้ไขแถวเดียว)' AFTER queue_order;
+
+-- Existing queue numbers keep their order (RANK_GAP = 2^20)
+UPDATE surgery_registrations SET queue_rank = queue_order * 1048576 WHERE queue_order IS NOT NULL;
+
+DESCRIBE surgery_registrations;
+
+SELECT 'queue_rank added successfully!' AS message;
@@ -0,0 +1,16 @@
+-- Row versions for optimistic concurrency: updates run as
+-- UPDATE ... WHERE id = ? AND version = ? and a mismatch is answered with 409
+-- Run this in MySQL on existing databases
+
+USE surgitrack;
+
+ALTER TABLE surgery_registrations
+    ADD COLUMN version INT NOT NULL DEFAULT 1 COMMENT 'เวอร์ชันแถว (ตรวจการแก้ไขชนกัน)';
+
+ALTER TABLE patients
+    ADD COLUMN version INT NOT NULL DEFAULT 1 COMMENT 'เวอร์ชันแถว (ตรวจการแก้ไขชนกัน)';
+
+DESCRIBE surgery_registrations;
+DESCRIBE patients;
+
+SELECT 'Row versions added successfully!' AS message;
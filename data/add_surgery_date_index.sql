@@ -0,0 +1,13 @@
+-- Date-range scans (/api/surgery/range) read surgery_date in index order
+-- Run this in MySQL on existing databases whose tables were created by the
+-- backend at startup (create_surgery_table.sql / setup_database.sql already
+-- include idx_surgery_date; check with SHOW INDEX first)
+
+USE surgitrack;
+
+ALTER TABLE surgery_registrations
+    ADD INDEX idx_surgery_date (surgery_date);
+
+SHOW INDEX FROM surgery_registrations;
+
+SELECT 'Surgery date index added successfully!' AS message;
@@ -41,6 +41,7 @@ CREATE TABLE IF NOT EXISTS surgery_registrations (
     
     -- Queue Management
     queue_order INT NULL COMMENT 'ลำดับคิว',
+    queue_rank BIGINT NULL COMMENT 'ลำดับคิวแบบเว้นช่วง (ย้ายคิวแก้ไขแถวเดียว)',
     selected_or VARCHAR(20) NULL COMMENT 'ห้องผ่าตัดที่เลือก (Emergency)',
     
     -- Status
@@ -51,6 +52,7 @@ CREATE TABLE IF NOT EXISTS surgery_registrations (
     created_by INT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    version INT NOT NULL DEFAULT 1 COMMENT 'เวอร์ชันแถว (ตรวจการแก้ไขชนกัน)',
     
     -- Foreign Key
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL,
@@ -59,7 +61,7 @@ CREATE TABLE IF NOT EXISTS surgery_registrations (
     INDEX idx_surgery_date (surgery_date),
     INDEX idx_surgery_type (surgery_type),
     INDEX idx_status (status),
-    INDEX idx_hn (hn),
+    INDEX idx_hn_date (hn, surgery_date),
     INDEX idx_or_room (or_room)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='ตารางลงทะเบียนผ่าตัด';
 
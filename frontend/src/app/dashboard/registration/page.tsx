@@ -299,7 +299,10 @@ export default function RegistrationPage() {
 
             if (data.exists && data.history && data.history.length > 0) {
                 // Build history table HTML
-                const historyRows = data.history.slice(0, 5).map((s: any) => `
+                const shownHistory = data.history.slice(0, 5);
+                // history holds only the latest cases; total_surgeries counts them all
+                const moreSurgeries = (data.total_surgeries ?? data.history.length) - shownHistory.length;
+                const historyRows = shownHistory.map((s: any) => `
                     <tr style="border-bottom: 1px solid #e5e7eb;">
                         <td style="padding: 8px; text-align: center;">${s.surgery_date || '-'}</td>
                         <td style="padding: 8px;">${s.operation || '-'}</td>
@@ -341,7 +344,7 @@ export default function RegistrationPage() {
                                 <tbody>${historyRows}</tbody>
                             </table>
                         </div>
-                        ${data.history.length > 5 ? `<p style="color: #6b7280; font-size: 12px; margin-top: 8px;">+${data.history.length - 5} รายการ</p>` : ''}
+                        ${moreSurgeries > 0 ? `<p style="color: #6b7280; font-size: 12px; margin-top: 8px;">+${moreSurgeries} รายการ</p>` : ''}
                     `,
                     showCancelButton: true,
                     confirmButtonText: '🔄 ผ่าตัดครั้งใหม่',